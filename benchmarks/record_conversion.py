@@ -0,0 +1,141 @@
+"""Micro-benchmark of the conversion of result rows into records.
+
+Compares the generic path, which builds a dict from the row mapping and conforms
+it to the schema with the Singer SDK, with the precomputed `RecordConverter`.
+
+Usage:
+    python -m benchmarks.record_conversion --rows 200000 --columns 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import decimal
+import logging
+import time
+import typing as t
+
+import sqlalchemy as sa
+from singer_sdk.helpers._typing import TypeConformanceLevel, conform_record_data_types
+
+from tap_db2.connector import DB2Connector
+from tap_db2.converter import RecordConverter
+
+COLUMN_TYPES: list[tuple[sa.types.TypeEngine, t.Callable[[int], t.Any]]] = [
+    (sa.Integer(), lambda idx: idx),
+    (sa.VARCHAR(40), lambda idx: f"value {idx}"),
+    (sa.CHAR(10), lambda idx: f"{idx % 1000:<10}"),
+    (sa.Numeric(12, 2), lambda idx: decimal.Decimal(idx) / 100),
+    (
+        sa.DateTime(),
+        lambda idx: datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=idx),
+    ),
+    (sa.Date(), lambda idx: datetime.date(2024, 1, 1) + datetime.timedelta(idx % 365)),
+]
+
+
+def create_rows(row_count: int, column_count: int) -> tuple[sa.Table, list[sa.Row]]:
+    """Create a wide table in SQLite and fetch its rows.
+
+    Args:
+        row_count: The number of rows.
+        column_count: The number of columns.
+
+    Returns:
+        The table and its rows.
+    """
+    engine = sa.create_engine("sqlite://")
+    table = sa.Table(
+        "wide",
+        sa.MetaData(),
+        *(
+            sa.Column(f"col_{idx}", COLUMN_TYPES[idx % len(COLUMN_TYPES)][0])
+            for idx in range(column_count)
+        ),
+    )
+    table.create(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            table.insert(),
+            [
+                {
+                    column.name: COLUMN_TYPES[idx % len(COLUMN_TYPES)][1](row_idx)
+                    for idx, column in enumerate(table.columns)
+                }
+                for row_idx in range(row_count)
+            ],
+        )
+        rows = list(conn.execute(table.select()))
+    return table, rows
+
+
+def convert_generic(table: sa.Table, schema: dict, rows: list[sa.Row]) -> None:
+    """Convert rows the generic way.
+
+    Args:
+        table: The table of the rows.
+        schema: The JSON schema of the table.
+        rows: The result rows.
+    """
+    logger = logging.getLogger(__name__)
+    for row in rows:
+        conform_record_data_types(
+            stream_name=table.name,
+            record=dict(row._mapping),
+            schema=schema,
+            level=TypeConformanceLevel.RECURSIVE,
+            logger=logger,
+        )
+
+
+def convert_precomputed(table: sa.Table, schema: dict, rows: list[sa.Row]) -> None:
+    """Convert rows with the `RecordConverter`.
+
+    Args:
+        table: The table of the rows.
+        schema: The JSON schema of the table.
+        rows: The result rows.
+    """
+    convert_row = RecordConverter(list(table.columns), schema)
+    for row in rows:
+        convert_row(row)
+
+
+def main() -> None:
+    """Run the benchmark and print the throughput of both paths."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--columns", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    table, rows = create_rows(args.rows, args.columns)
+    connector = DB2Connector({}, sqlalchemy_url="sqlite://")
+    schema = {
+        "type": "object",
+        "properties": {
+            column.name: connector.to_jsonschema_type(column.type)
+            for column in table.columns
+        },
+    }
+
+    results = {}
+    for name, convert in (
+        ("generic", convert_generic),
+        ("precomputed", convert_precomputed),
+    ):
+        elapsed = min(_timed(convert, table, schema, rows) for _ in range(args.repeat))
+        results[name] = len(rows) / elapsed
+        print(f"{name:>12}: {results[name]:>12,.0f} rows/s")
+    print(f"{'speedup':>12}: {results['precomputed'] / results['generic']:>12.2f}x")
+
+
+def _timed(convert: t.Callable[..., None], *args: t.Any) -> float:
+    start = time.perf_counter()
+    convert(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
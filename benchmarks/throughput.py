@@ -0,0 +1,451 @@
+"""End-to-end throughput benchmark of the tap against a local SQLite stand-in.
+
+Generates tables of different shapes in SQLite and syncs them with `TapDB2` like
+the tests do. Every scenario runs in a separate process, which reports the rows
+per second and its peak RSS. The results are appended to a JSON Lines file and
+compared with the latest results of another revision.
+
+Shapes:
+    narrow   - id, a few short columns and a timestamp
+    wide     - 60 columns of mixed types
+    lob      - an 8 KB CLOB and a 2 KB BLOB per row
+    decimal  - 20 DECIMAL(31, 8) columns
+
+Scenarios:
+    full_table   - a full table sync
+    fast_writer  - a full table sync with the fast writer
+    incremental  - an incremental sync of the newer half of the rows
+    partitioned  - a full table sync with keyset pagination
+    key_ranges   - a partitioned sync of 4 key ranges read in parallel
+    discovery    - the discovery of a schema with `--tables` tables
+
+Usage:
+    python -m benchmarks.throughput --rows 1000000
+    python -m benchmarks.throughput --rows 100000 --shapes lob --scenarios full_table
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import importlib.metadata
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import typing as t
+from pathlib import Path
+
+import sqlalchemy as sa
+
+from tap_db2.connector import DB2Connector
+from tap_db2.tap import TapDB2
+
+BENCHMARK_DIR = Path(__file__).parent
+
+SHAPES = ["narrow", "wide", "lob", "decimal"]
+SCENARIOS = [
+    "full_table",
+    "fast_writer",
+    "incremental",
+    "partitioned",
+    "key_ranges",
+    "discovery",
+]
+
+TAP_CONFIG = {
+    "host": "localhost",
+    "port": 50000,
+    "database": "benchmark",
+    "user": "db2inst1",
+    "password": "password",
+}
+
+# Columns of every shape and the SQLite expressions generating their values from
+# the row number `n`
+WIDE_COLUMNS: list[tuple[sa.types.TypeEngine, str]] = [
+    (sa.Integer(), "n * 7 % 100000"),
+    (sa.VARCHAR(40), "printf('value %d', n)"),
+    (sa.CHAR(10), "printf('%-10d', n % 1000)"),
+    (sa.Numeric(12, 2), "round(n / 100.0, 2)"),
+    (sa.DateTime(), "datetime('2024-01-01', printf('+%d seconds', n))"),
+    (sa.Date(), "date('2024-01-01', printf('+%d days', n % 365))"),
+]
+SHAPE_COLUMNS: dict[str, list[tuple[str, sa.types.TypeEngine, str]]] = {
+    "narrow": [
+        ("customer", sa.VARCHAR(20), "printf('customer %d', n % 1000)"),
+        ("quantity", sa.Integer(), "n % 50"),
+        ("status", sa.CHAR(1), "char(65 + n % 3)"),
+    ],
+    "wide": [
+        (f"col_{idx}", *WIDE_COLUMNS[idx % len(WIDE_COLUMNS)]) for idx in range(60)
+    ],
+    "lob": [
+        ("notes", sa.Text(), "printf('%d %.*c', n, 8192, 'x')"),
+        ("payload", sa.LargeBinary(), "zeroblob(2048)"),
+    ],
+    "decimal": [
+        (f"amount_{idx}", sa.Numeric(31, 8), f"round(n * {idx + 1}.12345678, 8)")
+        for idx in range(20)
+    ],
+}
+
+# Start of the `updated_at` column, one second per row
+UPDATED_AT_START = datetime.datetime(2024, 1, 1)
+
+
+def get_table(shape: str, metadata: sa.MetaData, name: str | None = None) -> sa.Table:
+    """Return the definition of a benchmark table.
+
+    Args:
+        shape: The shape of the table.
+        metadata: The metadata the table is added to.
+        name: The table name, defaults to the shape.
+
+    Returns:
+        The table.
+    """
+    return sa.Table(
+        name or shape,
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("updated_at", sa.DateTime, nullable=False),
+        *(
+            sa.Column(column_name, column_type)
+            for column_name, column_type, _ in SHAPE_COLUMNS[shape]
+        ),
+    )
+
+
+def create_database(path: Path, shape: str, row_count: int) -> None:
+    """Create a SQLite database with a populated table of the given shape.
+
+    The rows are generated by SQLite, so millions of rows take seconds.
+
+    Args:
+        path: The path of the database file.
+        shape: The shape of the table.
+        row_count: The number of rows.
+    """
+    path.unlink(missing_ok=True)
+    engine = sa.create_engine(f"sqlite:///{path}")
+    table = get_table(shape, sa.MetaData())
+    table.create(engine)
+    expressions = [
+        "n",
+        "datetime('2024-01-01', printf('+%d seconds', n))",
+        *(expression for _, _, expression in SHAPE_COLUMNS[shape]),
+    ]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq "
+            f"WHERE n < {int(row_count)}) "
+            f"INSERT INTO {table.name} SELECT {', '.join(expressions)} FROM seq"
+        )
+    engine.dispose()
+
+
+def create_discovery_database(path: Path, table_count: int) -> None:
+    """Create a SQLite database with many wide tables and no rows.
+
+    Args:
+        path: The path of the database file.
+        table_count: The number of tables.
+    """
+    path.unlink(missing_ok=True)
+    engine = sa.create_engine(f"sqlite:///{path}")
+    metadata = sa.MetaData()
+    for idx in range(table_count):
+        get_table("wide", metadata, f"table_{idx}")
+    metadata.create_all(engine)
+    engine.dispose()
+
+
+def get_database(data_dir: Path, shape: str, row_count: int) -> Path:
+    """Return the database of a shape, creating it unless it exists.
+
+    Args:
+        data_dir: The directory of the generated databases.
+        shape: The shape of the table, or `discovery`.
+        row_count: The number of rows, or tables for the discovery database.
+
+    Returns:
+        The path of the database file.
+    """
+    path = data_dir / f"{shape}_{row_count}.db"
+    if not path.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        print(f"Generating {path} ...", file=sys.stderr)
+        if shape == "discovery":
+            create_discovery_database(path, row_count)
+        else:
+            create_database(path, shape, row_count)
+    return path
+
+
+def get_scenario_config(scenario: str) -> tuple[dict, str | None]:
+    """Return the tap config and replication key of a scenario.
+
+    Args:
+        scenario: The scenario.
+
+    Returns:
+        The tap config and the replication key, if any.
+    """
+    if scenario == "partitioned":
+        partition_config = {"partition_key": "id", "partition_size": 50_000}
+        return {"query_partition": {"*": partition_config}}, None
+    if scenario == "key_ranges":
+        partition_config = {
+            "partition_key": "id",
+            "partition_size": 50_000,
+            "key_ranges": 4,
+        }
+        return {"query_partition": {"*": partition_config}}, None
+    if scenario == "fast_writer":
+        return {"fast_writer": {}}, None
+    if scenario == "incremental":
+        return {}, "updated_at"
+    return {}, None
+
+
+def run_sync(url: str, scenario: str, row_count: int) -> int:
+    """Sync the table of a database and return the number of rows read.
+
+    Args:
+        url: The SQLAlchemy URL of the database.
+        scenario: The scenario.
+        row_count: The number of rows of the table.
+
+    Returns:
+        The number of rows read.
+    """
+    config, replication_key = get_scenario_config(scenario)
+    tap_config = {**TAP_CONFIG, **config}
+    connector = DB2Connector(tap_config, sqlalchemy_url=url)
+    catalog = {"streams": connector.discover_catalog_entries()}
+    for catalog_entry in catalog["streams"]:
+        for metadata in catalog_entry["metadata"]:
+            if not metadata["breadcrumb"]:
+                metadata["metadata"]["selected"] = True
+                if replication_key:
+                    metadata["metadata"]["replication-key"] = replication_key
+                    metadata["metadata"]["replication-method"] = "INCREMENTAL"
+        if replication_key:
+            catalog_entry["replication_key"] = replication_key
+            catalog_entry["replication_method"] = "INCREMENTAL"
+
+    state = None
+    if replication_key:
+        # Resume from the middle of the table
+        bookmark = UPDATED_AT_START + datetime.timedelta(seconds=row_count // 2)
+        state = {
+            "bookmarks": {
+                catalog_entry["tap_stream_id"]: {
+                    "replication_key": replication_key,
+                    "replication_key_value": bookmark.isoformat(),
+                }
+                for catalog_entry in catalog["streams"]
+            }
+        }
+
+    tap = TapDB2(config=tap_config, catalog=catalog, state=state)
+    tap._tap_connector = DB2Connector(dict(tap.config), sqlalchemy_url=url)
+    with Path(os.devnull).open("w") as devnull, contextlib.redirect_stdout(devnull):
+        tap.sync_all()
+    return sum(stream.telemetry.row_count for stream in tap.streams.values())  # type: ignore[attr-defined]
+
+
+def run_scenario(url: str, scenario: str, row_count: int) -> dict[str, t.Any]:
+    """Run a scenario in this process and measure it.
+
+    Args:
+        url: The SQLAlchemy URL of the database.
+        scenario: The scenario.
+        row_count: The number of rows, or tables for the discovery scenario.
+
+    Returns:
+        The rows and seconds measured and the peak RSS in MB.
+    """
+    start = time.perf_counter()
+    if scenario == "discovery":
+        connector = DB2Connector(TAP_CONFIG, sqlalchemy_url=url)
+        rows = len(connector.discover_catalog_entries())
+    else:
+        rows = run_sync(url, scenario, row_count)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / 1024**2 if sys.platform == "darwin" else max_rss / 1024
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1),
+        "peak_rss_mb": round(max_rss_mb, 1),
+    }
+
+
+def measure(url: str, scenario: str, row_count: int) -> dict[str, t.Any]:
+    """Run a scenario in a new process, so the peak RSS is its own.
+
+    Args:
+        url: The SQLAlchemy URL of the database.
+        scenario: The scenario.
+        row_count: The number of rows, or tables for the discovery scenario.
+
+    Returns:
+        The measures of the scenario.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.throughput",
+            "--run-scenario",
+            scenario,
+            "--url",
+            url,
+            "--rows",
+            str(row_count),
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode:
+        msg = f"Scenario {scenario} failed:\n{result.stderr}"
+        raise RuntimeError(msg)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def get_revision() -> dict[str, str]:
+    """Return the version of the tap and the git revision of the working tree.
+
+    Returns:
+        The version and revision, `unknown` if not available.
+    """
+    try:
+        version = importlib.metadata.version("tap-ibm-db2")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    try:
+        revision = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=BENCHMARK_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = "unknown"
+    return {"version": version, "revision": revision}
+
+
+def load_results(path: Path) -> list[dict[str, t.Any]]:
+    """Load the stored results.
+
+    Args:
+        path: The path of the JSON Lines results file.
+
+    Returns:
+        The results, oldest first.
+    """
+    if not path.exists():
+        return []
+    with path.open(encoding="utf-8") as results_file:
+        return [json.loads(line) for line in results_file if line.strip()]
+
+
+def get_baseline(
+    results: list[dict[str, t.Any]], result: dict[str, t.Any]
+) -> dict[str, t.Any] | None:
+    """Return the latest stored result of the same benchmark of another revision.
+
+    Args:
+        results: The stored results.
+        result: The new result.
+
+    Returns:
+        The baseline result, if any.
+    """
+    for stored in reversed(results):
+        if (
+            stored["scenario"] == result["scenario"]
+            and stored["shape"] == result["shape"]
+            and stored["rows_requested"] == result["rows_requested"]
+            and stored["revision"] != result["revision"]
+        ):
+            return stored
+    return None
+
+
+def main() -> None:
+    """Run the benchmarks, print and store the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=SHAPES)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--data-dir", type=Path, default=BENCHMARK_DIR / ".data")
+    parser.add_argument("--results", type=Path, default=BENCHMARK_DIR / "results.jsonl")
+    parser.add_argument("--run-scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(args.url, args.run_scenario, args.rows)))
+        return
+
+    revision = get_revision()
+    stored_results = load_results(args.results)
+    benchmarks = [
+        (scenario, shape)
+        for scenario in args.scenarios
+        if scenario != "discovery"
+        for shape in args.shapes
+    ]
+    if "discovery" in args.scenarios:
+        benchmarks.append(("discovery", "discovery"))
+
+    new_results = []
+    print(
+        f"{'scenario':<12} {'shape':<10} {'rows':>10} {'rows/s':>12} "
+        f"{'peak RSS':>10} {'change':>8}"
+    )
+    for scenario, shape in benchmarks:
+        row_count = args.tables if scenario == "discovery" else args.rows
+        path = get_database(args.data_dir, shape, row_count)
+        result = {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            **revision,
+            "python": platform.python_version(),
+            "scenario": scenario,
+            "shape": shape,
+            "rows_requested": row_count,
+            **measure(f"sqlite:///{path}", scenario, row_count),
+        }
+        baseline = get_baseline(stored_results, result)
+        change = (
+            f"{result['rows_per_second'] / baseline['rows_per_second'] - 1:+.1%}"
+            if baseline
+            else ""
+        )
+        print(
+            f"{scenario:<12} {shape:<10} {result['rows']:>10,} "
+            f"{result['rows_per_second']:>12,.0f} "
+            f"{result['peak_rss_mb']:>8,.0f}MB {change:>8}"
+        )
+        new_results.append(result)
+
+    with args.results.open("a", encoding="utf-8") as results_file:
+        for result in new_results:
+            results_file.write(json.dumps(result) + "\n")
+    print(f"Results appended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Writing of records to BATCH files."""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import itertools
+import typing as t
+from uuid import uuid4
+
+import sqlalchemy as sa
+from singer_sdk._singerlib.json import serialize_json
+from singer_sdk.batch import BaseBatcher
+
+if t.TYPE_CHECKING:
+    from singer_sdk.helpers._batch import BatchConfig
+
+# Rows per Parquet row group, the rows of a row group are held in memory
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+
+class DB2Batcher(BaseBatcher):
+    """Writes records to gzipped JSON Lines or Parquet files.
+
+    Unlike the batchers of the Singer SDK, records are written while they are read,
+    so at most one Parquet row group is held in memory. A file is completed once it
+    holds `batch_size` records or has grown to `max_file_size` bytes.
+    """
+
+    def __init__(
+        self,
+        tap_name: str,
+        stream_name: str,
+        batch_config: BatchConfig,
+        *,
+        max_file_size: int | None = None,
+        columns: t.Sequence[sa.ColumnElement] = (),
+    ) -> None:
+        """Initialize the batcher.
+
+        Args:
+            tap_name: The name of the tap.
+            stream_name: The name of the stream.
+            batch_config: The batch configuration.
+            max_file_size: The size in bytes after which a file is completed.
+            columns: The columns of the records, which determine the Parquet schema.
+        """
+        super().__init__(tap_name, stream_name, batch_config)
+        self.max_file_size = max_file_size
+        self.columns = columns
+
+    def get_batches(self, records: t.Iterator[dict]) -> t.Iterator[list[str]]:
+        """Write the records to files and yield a manifest per file.
+
+        Args:
+            records: The records to batch.
+
+        Yields:
+            A list with the URL of the written file.
+        """
+        encoding = self.batch_config.encoding
+        storage = self.batch_config.storage
+        sync_id = f"{self.tap_name}--{self.stream_name}-{uuid4()}"
+        extension = "parquet" if encoding.format == "parquet" else "json"
+        if encoding.compression == "gzip":
+            extension += ".gz"
+
+        records = iter(records)
+        for file_number in itertools.count(1):
+            first_record = next(records, None)
+            if first_record is None:
+                return
+            file_records = itertools.chain(
+                [first_record],
+                itertools.islice(records, self.batch_config.batch_size - 1),
+            )
+            filename = f"{storage.prefix or ''}{sync_id}-{file_number}.{extension}"
+            with storage.fs(writeable=True, create=True) as fs:
+                with fs.open(filename, "wb") as batch_file:
+                    if encoding.format == "parquet":
+                        self._write_parquet(batch_file, file_records)
+                    else:
+                        self._write_jsonl(batch_file, file_records)
+                file_url = fs.geturl(filename)
+            yield [file_url]
+
+    def _is_full(self, batch_file: t.IO[bytes]) -> bool:
+        return (
+            self.max_file_size is not None and batch_file.tell() >= self.max_file_size
+        )
+
+    def _write_jsonl(self, batch_file: t.IO[bytes], records: t.Iterator[dict]) -> None:
+        with contextlib.ExitStack() as stack:
+            output: t.IO[bytes] | gzip.GzipFile = batch_file
+            if self.batch_config.encoding.compression == "gzip":
+                output = stack.enter_context(
+                    gzip.GzipFile(fileobj=batch_file, mode="wb")
+                )
+            for record in records:
+                output.write(serialize_json(record).encode() + b"\n")
+                # The size of gzipped files lags behind by the compressor's buffer
+                if self._is_full(batch_file):
+                    break
+
+    def _write_parquet(
+        self, batch_file: t.IO[bytes], records: t.Iterator[dict]
+    ) -> None:
+        try:
+            import pyarrow as pa  # type: ignore
+            import pyarrow.parquet as pq  # type: ignore
+        except ImportError as ex:
+            msg = (
+                "Parquet batch files require the 'pyarrow' package, "
+                "install the tap with the 'parquet' extra."
+            )
+            raise RuntimeError(msg) from ex
+
+        schema = pa.schema(
+            [(column.name, get_arrow_type(column.type)) for column in self.columns]
+        )
+        # DOUBLE values are returned as decimals, which Arrow doesn't cast to doubles
+        decimal_float_names = [
+            str(column.name)
+            for column in self.columns
+            if _is_float(column.type) and getattr(column.type, "asdecimal", False)
+        ]
+        compression = (
+            "gzip" if self.batch_config.encoding.compression == "gzip" else "snappy"
+        )
+        with pq.ParquetWriter(batch_file, schema, compression=compression) as writer:
+            while chunk := list(itertools.islice(records, PARQUET_ROW_GROUP_SIZE)):
+                if decimal_float_names:
+                    chunk = [
+                        _decimals_to_floats(record, decimal_float_names)
+                        for record in chunk
+                    ]
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                if self._is_full(batch_file):
+                    break
+
+
+def _is_float(sql_type: sa.types.TypeEngine) -> bool:
+    # ibm_db_sa declares DOUBLE as a NUMERIC type without precision
+    return isinstance(sql_type, sa.Float) or (
+        isinstance(sql_type, sa.Numeric)
+        and (not sql_type.asdecimal or sql_type.precision is None)
+    )
+
+
+def _decimals_to_floats(record: dict, names: t.Sequence[str]) -> dict:
+    record = dict(record)
+    for name in names:
+        value = record.get(name)
+        if value is not None:
+            record[name] = float(value)
+    return record
+
+
+def get_arrow_type(sql_type: sa.types.TypeEngine) -> t.Any:
+    """Return the Arrow type of the values the `RecordConverter` returns for a type.
+
+    Args:
+        sql_type: The SQL type of a column.
+
+    Returns:
+        The Arrow type.
+    """
+    import pyarrow as pa  # type: ignore
+
+    if isinstance(sql_type, sa.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, sa.Integer):
+        return pa.int64()
+    if _is_float(sql_type):
+        return pa.float64()
+    if isinstance(sql_type, sa.Numeric):
+        return pa.decimal128(sql_type.precision, sql_type.scale or 0)
+    # Dates and times are converted to ISO strings, binary values to hex strings
+    return pa.string()
@@ -5,15 +5,81 @@ from __future__ import annotations
 import re
 import typing as t
 
+import ibm_db  # type: ignore
 import sqlalchemy as sa
+from ibm_db_sa.reflection import DB2Reflector  # type: ignore
 from singer_sdk import SQLConnector
 from singer_sdk import typing as th
+from singer_sdk._singerlib import CatalogEntry, Metadata
+
+from tap_db2.discovery_cache import DiscoveryCache
+from tap_db2.syscat import SYSCAT_TABLES, SyscatInspector, SyscatObject, get_objects
 
 if t.TYPE_CHECKING:
     from sqlalchemy.engine import Engine
+    from sqlalchemy.engine.reflection import Inspector
     from sqlalchemy.types import TypeEngine
 
-SUPPLIED_USER_TABLES_PATTERN = r"^(DSN_|PLAN_TABLE)"
+SUPPLIED_USER_TABLES_PATTERNS = ["DSN_*", "PLAN_TABLE*"]
+
+# Above this many changed tables in a schema, read all selected tables from SYSCAT
+DISCOVERY_CACHE_MAX_TABLE_FILTER = 1000
+
+# ibm_db fetches rowsets of SQL_ATTR_ROW_ARRAY_SIZE rows since version 3.3, older
+# versions bind single-row buffers whatever the attribute
+_SUPPORTS_ROWSETS = tuple(
+    int(part) for part in re.findall(r"\d+", getattr(ibm_db, "__version__", ""))[:2]
+) >= (3, 3)
+
+
+def _glob_to_like(pattern: str) -> str:
+    like_pattern = pattern.strip().upper()
+    for char in ("\\", "%", "_"):
+        like_pattern = like_pattern.replace(char, f"\\{char}")
+    return like_pattern.replace("*", "%").replace("?", "_")
+
+
+def _glob_to_regex(pattern: str) -> re.Pattern:
+    regex = re.escape(pattern.strip().upper())
+    return re.compile(regex.replace(r"\*", ".*").replace(r"\?", "."))
+
+
+def _glob_criteria(
+    column: sa.ColumnElement[str], includes: list[str], excludes: list[str]
+) -> list[sa.ColumnElement[bool]]:
+    name = sa.func.upper(column)
+    criteria: list[sa.ColumnElement[bool]] = [
+        sa.not_(name.like(_glob_to_like(pattern), escape="\\")) for pattern in excludes
+    ]
+    if includes:
+        criteria.append(
+            sa.or_(
+                *(
+                    name.like(_glob_to_like(pattern), escape="\\")
+                    for pattern in includes
+                )
+            )
+        )
+    return criteria
+
+
+def _glob_match(name: str, includes: list[str], excludes: list[str]) -> bool:
+    name = name.strip().upper()
+    if any(_glob_to_regex(pattern).fullmatch(name) for pattern in excludes):
+        return False
+    return not includes or any(
+        _glob_to_regex(pattern).fullmatch(name) for pattern in includes
+    )
+
+
+def _set_row_array_size(conn: sa.engine.Connection, cursor: t.Any, *_: t.Any) -> None:
+    # ibm_db_sa doesn't support server-side cursors, so `yield_per` alone only sizes
+    # the client-side `fetchmany` calls. The rowset size of the statement makes the
+    # driver fetch as many rows per request to DB2.
+    yield_per = conn.get_execution_options().get("yield_per")
+    stmt_handler = getattr(cursor, "stmt_handler", None)
+    if yield_per and stmt_handler is not None and _SUPPORTS_ROWSETS:
+        ibm_db.set_option(stmt_handler, {ibm_db.SQL_ATTR_ROW_ARRAY_SIZE: yield_per}, 0)
 
 
 class DB2Connector(SQLConnector):
@@ -51,12 +117,27 @@ class DB2Connector(SQLConnector):
 
     def create_engine(self) -> Engine:
         """Creates and returns a new engine."""
+        sqlalchemy_connection_kwargs: dict[str, t.Any] = {}
         if "sqlalchemy_execution_options" in self.config:
-            sqlalchemy_connection_kwargs = {
-                "execution_options": self.config["sqlalchemy_execution_options"]
-            }
-            return sa.create_engine(self.sqlalchemy_url, **sqlalchemy_connection_kwargs)
-        return sa.create_engine(self.sqlalchemy_url)
+            sqlalchemy_connection_kwargs["execution_options"] = self.config[
+                "sqlalchemy_execution_options"
+            ]
+        max_key_ranges = max(
+            (
+                partition_config.get("key_ranges", 1)
+                for partition_config in self.config.get("query_partition", {}).values()
+                if partition_config
+            ),
+            default=1,
+        )
+        pool_size = self.config.get("max_parallel_streams", 1) * max_key_ranges
+        if pool_size > 1:
+            # Keep one idle connection per stream and key range worker instead of
+            # reconnecting
+            sqlalchemy_connection_kwargs["pool_size"] = pool_size
+        engine = sa.create_engine(self.sqlalchemy_url, **sqlalchemy_connection_kwargs)
+        sa.event.listen(engine, "after_cursor_execute", _set_row_array_size)
+        return engine
 
     def to_jsonschema_type(
         self,
@@ -79,45 +160,205 @@ class DB2Connector(SQLConnector):
     def discover_catalog_entries(self) -> list[dict]:
         """Return a list of catalog entries from discovery.
 
+        On DB2 for Linux, UNIX and Windows the catalog is read in bulk from the
+        SYSCAT views. Other platforms fall back to per-table reflection.
+
         Returns:
             The discovered catalog entries as a list.
         """
-        result: list[dict] = []
         engine = self._engine
-        inspected = sa.inspect(engine)
+        with self._connect() as conn:
+            reflector = getattr(engine.dialect, "_reflector", None)
+            if isinstance(reflector, DB2Reflector):
+                return self._discover_catalog_entries_bulk(engine, conn, reflector)
+
+        self.logger.info(
+            "SYSCAT catalog views are not available, "
+            "falling back to per-table reflection."
+        )
+        return self._discover_catalog_entries_reflected(engine, sa.inspect(engine))
+
+    def _discover_catalog_entries_bulk(
+        self,
+        engine: Engine,
+        conn: sa.engine.Connection,
+        reflector: DB2Reflector,
+    ) -> list[dict]:
+        cache = self._get_discovery_cache()
+        criteria = self._get_object_criteria()
+        objects_by_schema: dict[str, list[SyscatObject]] = {}
+        for syscat_object in get_objects(conn, reflector, criteria):
+            objects_by_schema.setdefault(syscat_object.schema_name, []).append(
+                syscat_object
+            )
+
+        result: list[dict] = []
+        for schema_name, syscat_objects in objects_by_schema.items():
+            catalog_entries: dict[str, dict | None] = {}
+            for syscat_object in syscat_objects:
+                cache_key = f"{schema_name}.{syscat_object.table_name}"
+                catalog_entries[syscat_object.table_name] = (
+                    cache.get(cache_key, syscat_object.fingerprint)
+                    if cache is not None
+                    else None
+                )
+
+            stale_table_names = [
+                table_name
+                for table_name, catalog_entry in catalog_entries.items()
+                if catalog_entry is None
+            ]
+            inspected = SyscatInspector(reflector)
+            if stale_table_names:
+                if (
+                    len(stale_table_names) == len(syscat_objects)
+                    or len(stale_table_names) > DISCOVERY_CACHE_MAX_TABLE_FILTER
+                ):
+                    inspected.load(conn, schema_name, criteria=criteria)
+                else:
+                    inspected.load(conn, schema_name, stale_table_names)
+
+            for syscat_object in syscat_objects:
+                catalog_entry = catalog_entries[syscat_object.table_name]
+                if catalog_entry is None:
+                    catalog_entry = self.discover_catalog_entry(
+                        engine,
+                        inspected,  # type: ignore[arg-type]
+                        schema_name,
+                        syscat_object.table_name,
+                        syscat_object.is_view,
+                    ).to_dict()
+                    if cache is not None:
+                        cache.put(
+                            f"{schema_name}.{syscat_object.table_name}",
+                            syscat_object.fingerprint,
+                            catalog_entry,
+                        )
+                result.append(self._apply_default_replication(catalog_entry))
+
+        if cache is not None:
+            self.logger.info(
+                "Discovery cache: %d tables unchanged, %d tables reflected.",
+                cache.hits,
+                cache.misses,
+            )
+            cache.save()
+        return result
+
+    def discover_catalog_entry(
+        self,
+        engine: Engine,
+        inspected: Inspector,
+        schema_name: str,
+        table_name: str,
+        is_view: bool,
+    ) -> CatalogEntry:
+        """Create a catalog entry for a table or view.
+
+        The ROW CHANGE TIMESTAMP column of a table read from the SYSCAT views is
+        marked as a valid replication key.
+
+        Args:
+            engine: The SQLAlchemy engine.
+            inspected: The inspector of the engine, or a `SyscatInspector`.
+            schema_name: The schema name.
+            table_name: The table or view name.
+            is_view: Whether the object is a view.
+
+        Returns:
+            The catalog entry.
+        """
+        catalog_entry = super().discover_catalog_entry(
+            engine, inspected, schema_name, table_name, is_view
+        )
+        if isinstance(inspected, SyscatInspector):
+            column_name = inspected.get_row_change_timestamp_column(table_name)
+            if column_name is not None:
+                catalog_entry.metadata.root.valid_replication_keys = [column_name]
+                catalog_entry.metadata[
+                    ("properties", column_name)
+                ].inclusion = Metadata.InclusionType.AUTOMATIC
+        return catalog_entry
+
+    def _apply_default_replication(self, catalog_entry: dict) -> dict:
+        # Applied after the discovery cache, which is independent of the config
+        if not self.config.get("incremental_row_change_timestamp"):
+            return catalog_entry
+        entry = CatalogEntry.from_dict(catalog_entry)
+        replication_keys = entry.metadata.root.valid_replication_keys
+        if not replication_keys:
+            return catalog_entry
+        entry.replication_method = "INCREMENTAL"
+        entry.replication_key = replication_keys[0]
+        return entry.to_dict()
+
+    def _get_discovery_cache(self) -> DiscoveryCache | None:
+        cache_config = self.config.get("discovery_cache")
+        if not cache_config or "path" not in cache_config:
+            return None
+        cache = DiscoveryCache(
+            cache_config["path"],
+            source=(
+                f"{self.config.get('host')}:{self.config.get('port')}"
+                f"/{self.config.get('database')}"
+            ),
+        )
+        if not cache_config.get("refresh", False):
+            cache.load()
+        return cache
+
+    def _discover_catalog_entries_reflected(
+        self, engine: Engine, inspected: Inspector
+    ) -> list[dict]:
+        result: list[dict] = []
         for schema_name in self.get_schema_names(engine, inspected):
+            if not self._is_selected_schema(schema_name):
+                continue
             # Iterate through each table and view
             for table_name, is_view in self.get_object_names(
                 engine,
                 inspected,
                 schema_name,
             ):
-                if (
-                    is_view
-                    and "ignore_views" in self.config
-                    and self.config["ignore_views"]
-                ):
+                if not self._is_selected_object(table_name, is_view):
                     continue
-                if not re.match(
-                    SUPPLIED_USER_TABLES_PATTERN, table_name, re.IGNORECASE
-                ) or (
-                    "ignore_supplied_tables" in self.config
-                    and not self.config["ignore_supplied_tables"]
-                ):
-                    # Filter by schema
-                    # Connection parameter 'CURRENTSCHEMA=mySchema;' doesn't work
-                    # https://www.ibm.com/support/pages/525-error-nullidsysstat-package-when-trying-set-current-schema-against-db2-zos-database
-                    target_schema = self.config.get("schema", None)
-                    if (
-                        target_schema is None
-                        or target_schema.strip().lower() == schema_name.strip().lower()
-                    ):
-                        catalog_entry = self.discover_catalog_entry(
-                            engine,
-                            inspected,
-                            schema_name,
-                            table_name,
-                            is_view,
-                        )
-                        result.append(catalog_entry.to_dict())
+                catalog_entry = self.discover_catalog_entry(
+                    engine,
+                    inspected,
+                    schema_name,
+                    table_name,
+                    is_view,
+                )
+                result.append(catalog_entry.to_dict())
         return result
+
+    def _get_schema_patterns(self) -> tuple[list[str], list[str]]:
+        includes = list(self.config.get("include_schemas") or [])
+        # Connection parameter 'CURRENTSCHEMA=mySchema;' doesn't work
+        # https://www.ibm.com/support/pages/525-error-nullidsysstat-package-when-trying-set-current-schema-against-db2-zos-database
+        if self.config.get("schema"):
+            includes.append(self.config["schema"])
+        return includes, list(self.config.get("exclude_schemas") or [])
+
+    def _get_table_patterns(self) -> tuple[list[str], list[str]]:
+        excludes = list(self.config.get("exclude_tables") or [])
+        if self.config.get("ignore_supplied_tables", True):
+            excludes.extend(SUPPLIED_USER_TABLES_PATTERNS)
+        return list(self.config.get("include_tables") or []), excludes
+
+    def _get_object_criteria(self) -> list[sa.ColumnElement[bool]]:
+        criteria = [
+            *_glob_criteria(SYSCAT_TABLES.c.tabschema, *self._get_schema_patterns()),
+            *_glob_criteria(SYSCAT_TABLES.c.tabname, *self._get_table_patterns()),
+        ]
+        if self.config.get("ignore_views"):
+            criteria.append(SYSCAT_TABLES.c.type == "T")
+        return criteria
+
+    def _is_selected_schema(self, schema_name: str) -> bool:
+        return _glob_match(schema_name, *self._get_schema_patterns())
+
+    def _is_selected_object(self, table_name: str, is_view: bool) -> bool:
+        if is_view and self.config.get("ignore_views"):
+            return False
+        return _glob_match(table_name, *self._get_table_patterns())
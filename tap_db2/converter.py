@@ -0,0 +1,147 @@
+"""Conversion of DB2 result rows into Singer records."""
+
+from __future__ import annotations
+
+import datetime
+import functools
+import typing as t
+from decimal import Decimal
+
+import sqlalchemy as sa
+from singer_sdk.helpers._typing import _conform_primitive_property
+
+if t.TYPE_CHECKING:
+    ColumnConverter = t.Callable[[t.Any], t.Any]
+
+
+def _datetime_to_json(value: datetime.datetime) -> str:
+    # Naive timestamps are UTC, matching the conformance of the Singer SDK
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.isoformat("T")
+
+
+def _date_to_json(value: datetime.date) -> str:
+    return value.isoformat()
+
+
+def _date_to_datetime_json(value: datetime.date) -> str:
+    return f"{value.isoformat()}T00:00:00+00:00"
+
+
+def _to_decimal(value: t.Any) -> t.Any:
+    # Some driver versions return DECIMAL values as text
+    return Decimal(value) if isinstance(value, str) else value
+
+
+def _rstrip_blanks(value: str) -> str:
+    return value.rstrip(" ")
+
+
+def get_column_converter(  # noqa: PLR0911
+    sql_type: sa.types.TypeEngine,
+    property_schema: dict,
+    *,
+    trim_char: bool = False,
+) -> ColumnConverter | None:
+    """Return the conversion applied to the non-null values of a column.
+
+    Args:
+        sql_type: The SQL type of the column.
+        property_schema: The JSON schema of the column.
+        trim_char: Strip the trailing blanks of fixed-length character columns.
+
+    Returns:
+        The conversion, or `None` if the values are already JSON compatible.
+    """
+    if isinstance(sql_type, sa.DateTime):
+        return _datetime_to_json
+    if isinstance(sql_type, sa.Date):
+        if property_schema.get("format") == "date-time":
+            return _date_to_datetime_json
+        return _date_to_json
+    if isinstance(sql_type, sa.Time):
+        return str
+    if isinstance(sql_type, (sa.Integer, sa.Float, sa.Boolean)):
+        return None
+    if isinstance(sql_type, sa.Numeric):
+        return _to_decimal if sql_type.asdecimal else None
+    # ROWID values are returned as bytes despite being declared as strings
+    if isinstance(sql_type, sa.String) and sql_type.__visit_name__ != "ROWID":
+        if trim_char and isinstance(sql_type, sa.CHAR):
+            return _rstrip_blanks
+        return None
+    # Anything else is conformed value by value, like the Singer SDK does
+    return functools.partial(
+        _conform_primitive_property, property_schema=property_schema
+    )
+
+
+class RecordConverter:
+    """Converts the result rows of a query into JSON compatible records.
+
+    The conversion of each column is chosen once from its SQL type and JSON schema,
+    so rows are converted by column index without inspecting the type of every
+    value. Columns whose values are already JSON compatible are copied as they are.
+    The records are equal to the records conformed by the Singer SDK, except that
+    DATE values of `date-time` properties are emitted as midnight UTC and that
+    blank padding may be trimmed.
+    """
+
+    def __init__(
+        self,
+        columns: t.Sequence[sa.ColumnElement],
+        schema: dict,
+        *,
+        trim_char: bool = False,
+        exclude: t.Collection[str] = (),
+    ) -> None:
+        """Initialize the converter.
+
+        Args:
+            columns: The columns of the query, in the order of the result rows.
+            schema: The JSON schema of the stream.
+            trim_char: Strip the trailing blanks of fixed-length character columns.
+            exclude: Names of columns that are read but not part of the records.
+        """
+        self.column_names = [str(column.name) for column in columns]
+        # Only look up the values by index if some columns are excluded
+        self._record_columns = (
+            [
+                (index, name)
+                for index, name in enumerate(self.column_names)
+                if name not in exclude
+            ]
+            if exclude
+            else None
+        )
+        self._converters: list[tuple[int, str, ColumnConverter]] = []
+        for index, column in enumerate(columns):
+            if column.name in exclude:
+                continue
+            converter = get_column_converter(
+                column.type,
+                schema["properties"].get(column.name, {}),
+                trim_char=trim_char,
+            )
+            if converter is not None:
+                self._converters.append((index, str(column.name), converter))
+
+    def __call__(self, row: t.Sequence[t.Any]) -> dict[str, t.Any]:
+        """Convert a result row.
+
+        Args:
+            row: The values of the row, in the order of the columns.
+
+        Returns:
+            The record.
+        """
+        if self._record_columns is None:
+            record = dict(zip(self.column_names, row))
+        else:
+            record = {name: row[index] for index, name in self._record_columns}
+        for index, name, converter in self._converters:
+            value = row[index]
+            if value is not None:
+                record[name] = converter(value)
+        return record
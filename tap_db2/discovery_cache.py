@@ -0,0 +1,98 @@
+"""Persistent cache of discovered catalog entries."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import typing as t
+from pathlib import Path
+
+CACHE_FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+class DiscoveryCache:
+    """On-disk store of catalog entries, keyed by table and fingerprint.
+
+    An entry is only returned while the fingerprint recorded alongside it matches
+    the current fingerprint of the table. Entries that are not looked up or stored
+    during a discovery run are dropped when the cache is saved, so dropped tables
+    do not accumulate.
+    """
+
+    def __init__(self, path: str | Path, source: str) -> None:
+        """Initialize the cache.
+
+        Args:
+            path: The path of the cache file.
+            source: Identifies the database the entries were discovered from. A
+                cache written for a different source is discarded.
+        """
+        self.path = Path(path)
+        self.source = source
+        self._cached: dict[str, dict] = {}
+        self._current: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> None:
+        """Read the cache file, ignoring missing, corrupt or outdated files."""
+        try:
+            content = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable discovery cache '%s'.", self.path)
+            return
+        if (
+            content.get("version") != CACHE_FORMAT_VERSION
+            or content.get("source") != self.source
+        ):
+            logger.info("Ignoring outdated discovery cache '%s'.", self.path)
+            return
+        self._cached = content.get("entries", {})
+
+    def get(self, key: str, fingerprint: str) -> dict | None:
+        """Return the cached catalog entry of a table if it is still current.
+
+        Args:
+            key: The fully qualified table name.
+            fingerprint: The current fingerprint of the table.
+
+        Returns:
+            The catalog entry, or `None` if it is missing or stale.
+        """
+        cached = self._cached.get(key)
+        if cached is None or cached["fingerprint"] != fingerprint:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._current[key] = cached
+        return t.cast(dict, cached["catalog_entry"])
+
+    def put(self, key: str, fingerprint: str, catalog_entry: dict) -> None:
+        """Store the catalog entry of a table.
+
+        Args:
+            key: The fully qualified table name.
+            fingerprint: The current fingerprint of the table.
+            catalog_entry: The discovered catalog entry.
+        """
+        self._current[key] = {
+            "fingerprint": fingerprint,
+            "catalog_entry": catalog_entry,
+        }
+
+    def save(self) -> None:
+        """Atomically write the entries of the current discovery run."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        content = {
+            "version": CACHE_FORMAT_VERSION,
+            "source": self.source,
+            "entries": self._current,
+        }
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps(content), encoding="utf-8")
+        os.replace(tmp_path, self.path)
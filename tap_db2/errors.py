@@ -0,0 +1,65 @@
+"""Classification of DB2 errors by their SQLCODE."""
+
+from __future__ import annotations
+
+import re
+
+# The messages of the DB2 drivers contain e.g. `SQL0905N` and `SQLCODE=-905`
+_SQLCODE_PATTERN = re.compile(r"SQLCODE=(-?\d+)")
+_MESSAGE_ID_PATTERN = re.compile(r"\bSQL(\d{4,5})N\b")
+
+# SQL0905N resource limit exceeded, e.g. by the resource limit facility (RLF),
+# SQL0952N processing cancelled by an interrupt, e.g. a query timeout, and
+# SQL0911N and SQL0913N deadlocks and lock timeouts
+RESOURCE_LIMIT_SQLCODES = frozenset({-905, -952, -911, -913})
+
+# SQL30081N and SQL30080N communication errors, e.g. dropped connections and DRDA
+# timeouts, SQL30108N connections re-established by automatic client reroute, and
+# SQL1224N agents terminated by the database manager
+CONNECTION_SQLCODES = frozenset({-30081, -30080, -30108, -1224})
+
+
+def get_sqlcode(error: BaseException) -> int | None:
+    """Return the SQLCODE of a DB2 error.
+
+    Args:
+        error: The error, e.g. a `DBAPIError` wrapping an error of the driver.
+
+    Returns:
+        The SQLCODE, or `None` if the error has none.
+    """
+    message = str(error)
+    match = _SQLCODE_PATTERN.search(message)
+    if match:
+        return int(match.group(1))
+    match = _MESSAGE_ID_PATTERN.search(message)
+    if match:
+        return -int(match.group(1))
+    return None
+
+
+def is_resource_limit_error(error: BaseException) -> bool:
+    """Return whether a query failed because it used too many resources or time.
+
+    Args:
+        error: The error.
+
+    Returns:
+        `True` if a smaller query may succeed.
+    """
+    return get_sqlcode(error) in RESOURCE_LIMIT_SQLCODES
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Return whether a query failed because its connection was lost.
+
+    Args:
+        error: The error.
+
+    Returns:
+        `True` if the query may succeed on a new connection.
+    """
+    return (
+        bool(getattr(error, "connection_invalidated", False))
+        or get_sqlcode(error) in CONNECTION_SQLCODES
+    )
@@ -0,0 +1,343 @@
+"""Handling of large object (LOB) columns in the SELECT projection."""
+
+from __future__ import annotations
+
+import enum
+import tempfile
+import time
+import typing as t
+
+import ibm_db_sa  # type: ignore
+import sqlalchemy as sa
+from sqlalchemy.ext.compiler import compiles
+
+if t.TYPE_CHECKING:
+    from tap_db2.partitioning import PageEnd
+    from tap_db2.telemetry import Telemetry
+
+# The maximum length of VARCHAR values, which are returned inline instead of
+# through LOB locators
+VARCHAR_MAX_LENGTH = 32672
+
+# The hash algorithm argument of the DB2 HASH function for SHA-256
+_SHA256 = 2
+
+# The maximum size of a character in bytes, in UTF-8 as well as UTF-16
+_MAX_CHARACTER_BYTES = 4
+
+
+class LOBPolicy(str, enum.Enum):
+    """How the values of LOB columns are read."""
+
+    FULL = "full"
+    SKIP = "skip"
+    TRUNCATE = "truncate"
+    HASH = "hash"
+    CHUNKED = "chunked"
+
+
+class xmlserialize(sa.sql.functions.GenericFunction):  # noqa: N801
+    """Serializes an XML value to a CLOB."""
+
+    type = sa.CLOB()
+    inherit_cache = True
+
+
+@compiles(xmlserialize)
+def _compile_xmlserialize(
+    element: xmlserialize, compiler: sa.sql.compiler.SQLCompiler, **kw: t.Any
+) -> str:
+    return (
+        f"XMLSERIALIZE(CONTENT {compiler.process(element.clauses, **kw)} AS CLOB(2G))"
+    )
+
+
+@compiles(xmlserialize, "sqlite")
+def _compile_xmlserialize_sqlite(
+    element: xmlserialize, compiler: sa.sql.compiler.SQLCompiler, **kw: t.Any
+) -> str:
+    return compiler.process(element.clauses, **kw)
+
+
+class substr_characters(sa.sql.functions.GenericFunction):  # noqa: N801
+    """Selects a substring of a character string, counted in characters.
+
+    DB2 counts the positions of CLOB values in bytes and of DBCLOB values in
+    double bytes, so a plain SUBSTR can split a multibyte character.
+    """
+
+    string_unit = "CODEUNITS32"
+    inherit_cache = True
+
+
+class substr_octets(sa.sql.functions.GenericFunction):  # noqa: N801
+    """Selects a substring of a binary string, counted in bytes.
+
+    Unlike SUBSTRING, SUBSTR pads BLOB values shorter than the requested length
+    with X'00' and fails past the length attribute of the column.
+    """
+
+    string_unit = "OCTETS"
+    inherit_cache = True
+
+
+@compiles(substr_characters)
+@compiles(substr_octets)
+def _compile_substring(
+    element: substr_characters | substr_octets,
+    compiler: sa.sql.compiler.SQLCompiler,
+    **kw: t.Any,
+) -> str:
+    return (
+        f"SUBSTRING({compiler.process(element.clauses, **kw)}, {element.string_unit})"
+    )
+
+
+@compiles(substr_characters, "sqlite")
+@compiles(substr_octets, "sqlite")
+def _compile_substring_sqlite(
+    element: substr_characters | substr_octets,
+    compiler: sa.sql.compiler.SQLCompiler,
+    **kw: t.Any,
+) -> str:
+    return f"substr({compiler.process(element.clauses, **kw)})"
+
+
+class length_characters(sa.sql.functions.GenericFunction):  # noqa: N801
+    """Returns the length of a character string in characters."""
+
+    type = sa.Integer()
+    inherit_cache = True
+
+
+@compiles(length_characters)
+def _compile_length_characters(
+    element: length_characters, compiler: sa.sql.compiler.SQLCompiler, **kw: t.Any
+) -> str:
+    return f"LENGTH({compiler.process(element.clauses, **kw)}, CODEUNITS32)"
+
+
+@compiles(length_characters, "sqlite")
+def _compile_length_characters_sqlite(
+    element: length_characters, compiler: sa.sql.compiler.SQLCompiler, **kw: t.Any
+) -> str:
+    return f"length({compiler.process(element.clauses, **kw)})"
+
+
+def is_lob(sql_type: sa.types.TypeEngine) -> bool:
+    """Return whether a type is a LOB or LONG type.
+
+    Args:
+        sql_type: The SQL type of a column.
+
+    Returns:
+        `True` for CLOB, DBCLOB, BLOB, XML and LONG VARGRAPHIC columns.
+    """
+    return isinstance(sql_type, (sa.Text, sa.LargeBinary))
+
+
+def _is_graphic(sql_type: sa.types.TypeEngine) -> bool:
+    return isinstance(sql_type, (ibm_db_sa.base.DBCLOB, sa.UnicodeText))
+
+
+def _is_binary(sql_type: sa.types.TypeEngine) -> bool:
+    return isinstance(sql_type, sa.LargeBinary)
+
+
+def _get_characters(size: int) -> int:
+    # The number of characters that fit in `size` bytes whatever their encoding
+    return max(size // _MAX_CHARACTER_BYTES, 1)
+
+
+def _is_inline(sql_type: sa.types.TypeEngine, characters: int) -> bool:
+    # DB2 dialects only render casts to character types
+    return (
+        characters * _MAX_CHARACTER_BYTES <= VARCHAR_MAX_LENGTH
+        and isinstance(sql_type, sa.Text)
+        and not _is_graphic(sql_type)
+    )
+
+
+def _get_value(column: sa.ColumnElement) -> sa.ColumnElement:
+    if isinstance(column.type, ibm_db_sa.base.XML):
+        return xmlserialize(column)
+    return column
+
+
+def _get_substr(
+    column: sa.ColumnElement, start: t.Any, characters: int
+) -> sa.ColumnElement:
+    # Character values are cut on character boundaries and short ones are cast to
+    # VARCHAR, which DB2 returns in the row
+    substr: sa.ColumnElement = substr_characters(
+        _get_value(column), start, characters, type_=column.type
+    )
+    if _is_inline(column.type, characters):
+        return sa.cast(substr, sa.VARCHAR(characters * _MAX_CHARACTER_BYTES))
+    return substr
+
+
+def get_lob_projection(
+    column: sa.ColumnElement, policy: LOBPolicy, max_bytes: int
+) -> sa.ColumnElement | None:
+    """Return the expression selecting the value of a LOB column.
+
+    Args:
+        column: The LOB column.
+        policy: The LOB policy of the stream.
+        max_bytes: The size in bytes values are truncated to. Character values
+            are truncated to the number of characters that always fit in
+            `max_bytes`, a quarter of it.
+
+    Returns:
+        The expression labeled with the column name, or `None` if the column is
+        skipped.
+    """
+    if policy == LOBPolicy.SKIP:
+        return None
+    if policy == LOBPolicy.FULL:
+        return column
+
+    value = _get_value(column)
+    expression: sa.ColumnElement
+    if policy == LOBPolicy.HASH:
+        expression = sa.func.hex(sa.func.hash(value, _SHA256), type_=sa.String())
+    elif policy == LOBPolicy.CHUNKED:
+        # The values are read in chunks after the row, see `LOBChunkReader`
+        if _is_binary(column.type):
+            expression = sa.func.length(value, type_=sa.Integer())
+        else:
+            expression = length_characters(value)
+    elif _is_binary(column.type):
+        expression = substr_octets(value, 1, max_bytes, type_=column.type)
+    else:
+        expression = _get_substr(column, 1, _get_characters(max_bytes))
+    return expression.label(str(column.name))
+
+
+class LOBChunkReader:
+    """Reads the values of chunked LOB columns after the rows they belong to.
+
+    The rows select the length of every chunked value instead of the value, see
+    `get_lob_projection`. Every value is then read with one query per chunk, so
+    the rows are fetched without LOB values and at most one value is held in
+    memory at a time. Character values are measured and cut in characters, so
+    chunks never split a multibyte character. The chunks are written to a
+    temporary file as they arrive, which spills to disk beyond one chunk, so the
+    chunks are never held in memory next to the completed value.
+    """
+
+    def __init__(
+        self,
+        column_names: t.Sequence[str],
+        lob_columns: t.Sequence[sa.ColumnElement],
+        key_columns: t.Sequence[sa.ColumnElement],
+        chunk_size: int,
+    ) -> None:
+        """Initialize the reader.
+
+        Args:
+            column_names: The names of the columns, in the order of the rows.
+            lob_columns: The chunked LOB columns.
+            key_columns: Columns that uniquely identify a row.
+            chunk_size: The size of a chunk in bytes. Chunks of character values
+                hold the number of characters that always fit in `chunk_size`.
+        """
+        self.chunk_size = chunk_size
+        self._key_indexes = [column_names.index(str(key.name)) for key in key_columns]
+        self._chunk_queries = [
+            (
+                column_names.index(str(column.name)),
+                self._get_chunk_query(column, key_columns),
+                _is_binary(column.type),
+            )
+            for column in lob_columns
+        ]
+
+    def _get_chunk_length(self, binary: bool) -> int:
+        return self.chunk_size if binary else _get_characters(self.chunk_size)
+
+    def _get_chunk_query(
+        self, column: sa.ColumnElement, key_columns: t.Sequence[sa.ColumnElement]
+    ) -> sa.Select:
+        offset = sa.bindparam("lob_offset", type_=sa.Integer)
+        chunk: sa.ColumnElement
+        if _is_binary(column.type):
+            chunk = substr_octets(
+                _get_value(column), offset, self.chunk_size, type_=column.type
+            )
+        else:
+            chunk = _get_substr(column, offset, self._get_chunk_length(False))
+        return sa.select(chunk).where(
+            *(
+                key_column == sa.bindparam(f"lob_key_{index}")
+                for index, key_column in enumerate(key_columns)
+            )
+        )
+
+    def read(
+        self,
+        rows: t.Iterable[sa.Row | PageEnd],
+        conn: sa.engine.Connection,
+        telemetry: Telemetry,
+    ) -> t.Generator[t.Sequence[t.Any] | PageEnd, None, None]:
+        """Replace the lengths of the chunked LOB columns by their values.
+
+        Args:
+            rows: The rows, with the length of every chunked value.
+            conn: The connection to read the chunks on.
+            telemetry: The telemetry the time spent reading chunks is added to.
+
+        Yields:
+            The rows with the chunked values, other items as they are.
+        """
+        for row in rows:
+            if not isinstance(row, sa.Row):
+                yield row
+                continue
+            values = list(row)
+            keys = {
+                f"lob_key_{number}": row[index]
+                for number, index in enumerate(self._key_indexes)
+            }
+            for index, chunk_query, binary in self._chunk_queries:
+                length = values[index]
+                if length is None:
+                    continue
+                started = time.perf_counter()
+                values[index] = self._read_value(
+                    conn, chunk_query, keys, length, binary
+                )
+                telemetry.fetch_duration += time.perf_counter() - started
+            yield values
+
+    def _read_value(
+        self,
+        conn: sa.engine.Connection,
+        chunk_query: sa.Select,
+        keys: dict[str, t.Any],
+        length: int,
+        binary: bool,
+    ) -> t.Any:
+        with (
+            tempfile.SpooledTemporaryFile(max_size=self.chunk_size, mode="w+b")
+            if binary
+            else tempfile.SpooledTemporaryFile(
+                max_size=self.chunk_size,
+                mode="w+",
+                encoding="utf-8",
+                errors="surrogatepass",
+                newline="",
+            )
+        ) as value_file:
+            for offset in range(1, length + 1, self._get_chunk_length(binary)):
+                chunk = conn.execute(
+                    chunk_query, {**keys, "lob_offset": offset}
+                ).scalar_one_or_none()
+                if chunk is None:
+                    # The row was deleted or the value set to NULL after the row
+                    # was read
+                    return None
+                value_file.write(chunk)
+            value_file.seek(0)
+            return value_file.read()
@@ -0,0 +1,301 @@
+"""Splitting of partition keys into key ranges."""
+
+from __future__ import annotations
+
+import datetime
+import typing as t
+from decimal import Decimal
+
+import sqlalchemy as sa
+
+KEY_RANGE_START = "key_range_start"
+KEY_RANGE_END = "key_range_end"
+KEY_RANGE_COMPLETE = "key_range_complete"
+
+# Bookmark of an interrupted partitioned sync
+PARTITION_KEY = "partition_key"
+PARTITION_KEY_VALUE = "partition_key_value"
+
+# Primary key values of the last record of an incremental sync, which break ties
+# between records with the same replication key value
+REPLICATION_KEY_TIEBREAK = "replication_key_tiebreak"
+
+
+# The bounds of page sizes in adaptive mode
+PARTITION_SIZE_MIN = 1
+PARTITION_SIZE_MAX = 1_000_000
+
+# The initial page size in adaptive mode, unless a partition size is configured
+ADAPTIVE_PARTITION_SIZE = 1000
+
+# The largest factor the page size changes by from one page to the next
+_MAX_SIZE_FACTOR = 2.0
+
+
+class PageEnd(t.NamedTuple):
+    """Follows the rows of a complete page of keyset pagination."""
+
+    key_values: list[t.Any]
+    """The key values of the last row of the page, as returned by the driver."""
+
+
+# Parsers of key values stored as strings, by SQL type
+_BOOKMARK_PARSERS: list[tuple[type | tuple[type, ...], t.Callable[[str], t.Any]]] = [
+    (sa.DateTime, datetime.datetime.fromisoformat),
+    (sa.Date, datetime.date.fromisoformat),
+    (sa.Time, datetime.time.fromisoformat),
+    (sa.Numeric, Decimal),
+    ((sa.LargeBinary, sa.BINARY, sa.VARBINARY), bytes.fromhex),
+]
+
+
+def get_keyset_criterion(
+    columns: t.Sequence[sa.ColumnElement], values: t.Sequence[t.Any]
+) -> sa.ColumnElement[bool]:
+    """Return the predicate selecting the rows sorted after the given key.
+
+    Composite keys are compared column by column, e.g. `a > x OR (a = x AND b > y)`,
+    which unlike row-value comparisons is supported by all DB2 platforms. The
+    predicate is prefixed with `a >= x`, so DB2 can start an index scan on the
+    leading key column.
+
+    Args:
+        columns: The key columns, in sort order.
+        values: The key values of the last row read.
+
+    Returns:
+        The predicate.
+    """
+    criterion = columns[-1] > values[-1]
+    for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+        criterion = sa.or_(column > value, sa.and_(column == value, criterion))
+    if len(columns) > 1:
+        criterion = sa.and_(columns[0] >= values[0], criterion)
+    return criterion
+
+
+class PageSizer:
+    """Chooses the number of rows per page of keyset pagination.
+
+    Without a target duration, pages keep their size. With a target duration, the
+    next page is sized by the ratio of the target to the time spent fetching the
+    last full page, changing by at most a factor of 2 from page to page. After a
+    page failed, the size is halved and never grows beyond that again.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        target_duration: float | None = None,
+        min_size: int = PARTITION_SIZE_MIN,
+        max_size: int = PARTITION_SIZE_MAX,
+    ) -> None:
+        """Initialize the sizer.
+
+        Args:
+            size: The size of the first page.
+            target_duration: The time in seconds fetching a page should take.
+            min_size: The smallest size.
+            max_size: The largest size, ignored without a target duration.
+        """
+        self.size = size
+        self.target_duration = target_duration
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def add_page(self, row_count: int, duration: float) -> None:
+        """Size the next page after a page was fetched.
+
+        Args:
+            row_count: The number of rows of the page.
+            duration: The time in seconds spent fetching the page.
+        """
+        if self.target_duration is None or row_count < self.size:
+            return
+        factor = self.target_duration / duration if duration > 0 else _MAX_SIZE_FACTOR
+        factor = min(max(factor, 1 / _MAX_SIZE_FACTOR), _MAX_SIZE_FACTOR)
+        self.size = min(
+            max(int(self.size * factor), self.min_size),
+            max(self.max_size, self.min_size),
+        )
+
+    def back_off(self) -> bool:
+        """Halve the page size after a page failed.
+
+        Returns:
+            `False` if the page size is at its minimum already.
+        """
+        if self.size <= self.min_size:
+            return False
+        self.size = max(self.size // 2, self.min_size)
+        self.max_size = self.size
+        return True
+
+
+def to_bookmark_value(value: t.Any) -> t.Any:
+    """Return a key value in a form that can be stored in the JSON state.
+
+    Args:
+        value: The key value as returned by the driver.
+
+    Returns:
+        The JSON compatible value.
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def from_bookmark_value(sql_type: sa.types.TypeEngine, value: t.Any) -> t.Any:
+    """Return a key value stored in the state in the form the driver expects.
+
+    Args:
+        sql_type: The SQL type of the key column.
+        value: The value stored by `to_bookmark_value`.
+
+    Returns:
+        The key value.
+    """
+    if isinstance(value, str):
+        for type_, parse in _BOOKMARK_PARSERS:
+            if isinstance(sql_type, type_):
+                return parse(value)
+    return value
+
+
+def format_replication_key_value(sql_type: sa.types.TypeEngine, value: t.Any) -> t.Any:
+    """Return a replication key bookmark in the form DB2 compares to the column.
+
+    Timestamps are kept to the microsecond, the precision of the bookmarked record
+    values, so incremental syncs only read the rows of the bookmarked instant again.
+
+    Args:
+        sql_type: The SQL type of the replication key column.
+        value: The bookmark, e.g. `2024-01-01T08:00:00.123456+00:00`.
+
+    Returns:
+        The value to compare the column to.
+    """
+    if not isinstance(value, str):
+        return value
+    if isinstance(sql_type, sa.DateTime):
+        return datetime.datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(sql_type, sa.Date):
+        # DATE values are emitted as midnight timestamps
+        return datetime.datetime.fromisoformat(value).strftime("%Y-%m-%d")
+    return value
+
+
+def get_min_max_boundaries(
+    min_value: t.Any, max_value: t.Any, range_count: int
+) -> list[int | float]:
+    """Return the boundaries splitting a numeric key into ranges of equal width.
+
+    Args:
+        min_value: The smallest value of the key.
+        max_value: The largest value of the key.
+        range_count: The number of ranges.
+
+    Returns:
+        The ascending boundaries between the ranges, at most `range_count - 1`.
+    """
+    if min_value is None or max_value is None or range_count < 2:  # noqa: PLR2004
+        return []
+    boundaries: list[int | float]
+    if isinstance(min_value, int) and isinstance(max_value, int):
+        width = max_value - min_value
+        boundaries = [
+            min_value + width * idx // range_count for idx in range(1, range_count)
+        ]
+    else:
+        low, high = float(min_value), float(max_value)
+        boundaries = [
+            low + (high - low) * idx / range_count for idx in range(1, range_count)
+        ]
+    return sorted({value for value in boundaries if min_value < value <= max_value})
+
+
+def get_quantile_boundaries(
+    quantiles: list[tuple[str, int]],
+    range_count: int,
+    parse: t.Callable[[str], t.Any],
+) -> list[t.Any]:
+    """Return the boundaries splitting a key into ranges of similar row counts.
+
+    Args:
+        quantiles: The quantile values and the number of rows less than or equal
+            to them, as returned by `syscat.get_quantiles`.
+        range_count: The number of ranges.
+        parse: Converts a quantile value into a value of the key.
+
+    Returns:
+        The ascending boundaries between the ranges, at most `range_count - 1`.
+    """
+    if not quantiles or range_count < 2:  # noqa: PLR2004
+        return []
+    row_count = quantiles[-1][1]
+    boundaries = []
+    for idx in range(1, range_count):
+        target = row_count * idx / range_count
+        value = next(value for value, valcount in quantiles if valcount >= target)
+        boundaries.append(parse(value))
+    return sorted(set(boundaries))
+
+
+def parse_numeric_literal(value: str) -> int | float:
+    """Parse a numeric value of the DB2 catalog.
+
+    Args:
+        value: The value, e.g. a COLVALUE of SYSCAT.COLDIST.
+
+    Returns:
+        The value as integer if it has no fractional part, else as float.
+    """
+    number = Decimal(value.strip().strip("'"))
+    return int(number) if number == number.to_integral_value() else float(number)
+
+
+def get_key_ranges(boundaries: list[t.Any]) -> list[dict]:
+    """Return the key ranges delimited by the given boundaries.
+
+    The first and last ranges are unbounded, so rows added outside the range of
+    values known at planning time are still read.
+
+    Args:
+        boundaries: The ascending boundaries between the ranges.
+
+    Returns:
+        The key ranges as stream partition contexts.
+    """
+    return [
+        {KEY_RANGE_START: start, KEY_RANGE_END: end}
+        for start, end in zip([None, *boundaries], [*boundaries, None])
+    ]
+
+
+def get_key_range_criteria(
+    column: sa.ColumnElement, key_range: t.Mapping[str, t.Any]
+) -> list[sa.ColumnElement[bool]]:
+    """Return the predicates selecting the rows of a key range.
+
+    Ranges include their start and exclude their end, so adjacent ranges never
+    overlap. Rows without a key belong to the first range.
+
+    Args:
+        column: The partition key column.
+        key_range: The key range.
+
+    Returns:
+        The predicates.
+    """
+    start, end = key_range[KEY_RANGE_START], key_range[KEY_RANGE_END]
+    if start is None:
+        return [] if end is None else [sa.or_(column < end, column.is_(None))]
+    criteria = [column >= start]
+    if end is not None:
+        criteria.append(column < end)
+    return criteria
@@ -0,0 +1,96 @@
+"""Fetching of result rows ahead of their processing in a background thread."""
+
+from __future__ import annotations
+
+import contextlib
+import queue
+import threading
+import typing as t
+
+T = t.TypeVar("T")
+
+# Rows per block handed over to the consumer, unless a fetch size is configured
+PREFETCH_BLOCK_SIZE = 1000
+
+# Seconds after which a blocked producer checks whether the consumer stopped
+_POLL_INTERVAL = 0.1
+
+
+class _Done:
+    """Marks the end of the items."""
+
+
+class _Failed(t.NamedTuple):
+    """Carries an error of the producer to the consumer."""
+
+    error: Exception
+
+
+def prefetch(
+    items: t.Generator[T, None, None],
+    block_size: int,
+    max_blocks: int,
+    *,
+    name: str | None = None,
+) -> t.Generator[T, None, None]:
+    """Consume a generator in a background thread, ahead of the caller.
+
+    The items are passed on in blocks through a queue of at most `max_blocks`
+    blocks. Once the queue is full, the background thread waits for the caller,
+    so besides the queue only the block being consumed and the block being fetched
+    are held in memory. Errors of the background thread are raised to the caller
+    after the items preceding them. If the caller stops early, the background
+    thread stops after its current item and the generator is closed.
+
+    Args:
+        items: The generator to consume, e.g. the rows of a query.
+        block_size: The number of items per block.
+        max_blocks: The maximum number of blocks in the queue.
+        name: The name of the background thread.
+
+    Yields:
+        The items, in order.
+    """
+    blocks: queue.Queue[list[T] | _Done | _Failed] = queue.Queue(maxsize=max_blocks)
+    stopped = threading.Event()
+
+    def put(block: list[T] | _Done | _Failed) -> None:
+        while not stopped.is_set():
+            try:
+                blocks.put(block, timeout=_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            return
+
+    def produce() -> None:
+        block: list[T] = []
+        with contextlib.closing(items):
+            try:
+                for item in items:
+                    block.append(item)
+                    if len(block) == block_size:
+                        put(block)
+                        block = []
+                        if stopped.is_set():
+                            return
+            except Exception as ex:
+                # Pass on the items preceding the error
+                put(block)
+                put(_Failed(ex))
+            else:
+                put(block)
+                put(_Done())
+
+    producer = threading.Thread(target=produce, name=name, daemon=True)
+    producer.start()
+    try:
+        while True:
+            block = blocks.get()
+            if isinstance(block, _Done):
+                return
+            if isinstance(block, _Failed):
+                raise block.error
+            yield from block
+    finally:
+        stopped.set()
+        producer.join()
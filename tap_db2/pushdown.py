@@ -0,0 +1,319 @@
+"""Translation of stream maps into the WHERE clause and projection of queries."""
+
+from __future__ import annotations
+
+import ast
+import operator
+import typing as t
+
+import sqlalchemy as sa
+from singer_sdk.mapper import (
+    MAPPER_ELSE_OPTION,
+    MAPPER_FILTER_OPTION,
+    MAPPER_KEY_PROPERTIES_OPTION,
+    NULL_STRING,
+)
+
+from tap_db2.lob import is_lob
+
+# Names stream map expressions resolve to something else than a record property
+_RESERVED_NAMES = {"_", "record", "config", "__stream_name__", "self", "fake", "Faker"}
+
+# Aliases of the whole record in stream map expressions
+_RECORD_NAMES = {"_", "record"}
+
+# Integers beyond this magnitude lose precision when DB2 compares them as DOUBLE
+_MAX_EXACT_FLOAT_INTEGER = 2**53
+
+_MAX_BIGINT = 2**63 - 1
+
+_COMPARISONS: dict[type[ast.cmpop], t.Callable[[t.Any, t.Any], t.Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+# The comparisons with the operands swapped, for literals left of the column
+_SWAPPED_COMPARISONS: dict[type[ast.cmpop], type[ast.cmpop]] = {
+    ast.Eq: ast.Eq,
+    ast.NotEq: ast.NotEq,
+    ast.Lt: ast.Gt,
+    ast.LtE: ast.GtE,
+    ast.Gt: ast.Lt,
+    ast.GtE: ast.LtE,
+}
+
+
+class _UntranslatableError(Exception):
+    """Raised for parts of an expression that have no SQL equivalent."""
+
+
+def _is_dropped(definition: t.Any) -> bool:
+    return definition is None or definition == NULL_STRING
+
+
+def _get_record_key(node: ast.AST) -> str | None:
+    # `record["name"]` and `_["name"]`
+    if (
+        isinstance(node, ast.Subscript)
+        and isinstance(node.value, ast.Name)
+        and node.value.id in _RECORD_NAMES
+        and isinstance(node.slice, ast.Constant)
+        and isinstance(node.slice.value, str)
+    ):
+        return node.slice.value
+    return None
+
+
+def get_referenced_names(
+    expression: str, property_name: str | None = None
+) -> set[str] | None:
+    """Return the record properties a stream map expression reads.
+
+    Args:
+        expression: The expression.
+        property_name: The property the expression maps, which `self` refers to.
+
+    Returns:
+        The property names, or `None` if the expression reads the whole record.
+    """
+    tree = ast.parse(expression)
+    names: set[str] = set()
+    # Record aliases with a key, and the names of called functions
+    skipped: set[int] = set()
+    for node in ast.walk(tree):
+        key = _get_record_key(node)
+        if key is not None:
+            names.add(key)
+            skipped.add(id(t.cast("ast.Subscript", node).value))
+        elif isinstance(node, ast.Call):
+            skipped.add(id(node.func))
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Name) or id(node) in skipped:
+            continue
+        if node.id in _RECORD_NAMES:
+            return None
+        if node.id == "self" and property_name is not None:
+            names.add(property_name)
+        elif node.id not in _RESERVED_NAMES:
+            names.add(node.id)
+    return names
+
+
+def get_mapped_column_names(
+    map_transform: dict,
+    column_names: t.Sequence[str],
+    required_names: t.Collection[str] = (),
+) -> list[str]:
+    """Return the columns a stream map reads.
+
+    Columns the stream map drops, or leaves out by mapping `__else__` to null, are
+    not read unless an expression of the map reads them.
+
+    Args:
+        map_transform: The definition of the stream map.
+        column_names: The selected columns.
+        required_names: Columns to read in any case, e.g. the replication key.
+
+    Returns:
+        The columns to read, in the order of `column_names`.
+    """
+    include_by_default = not (
+        MAPPER_ELSE_OPTION in map_transform
+        and _is_dropped(map_transform[MAPPER_ELSE_OPTION])
+    )
+    names = set(required_names)
+    names.update(map_transform.get(MAPPER_KEY_PROPERTIES_OPTION) or ())
+    dropped = set()
+    for key, definition in map_transform.items():
+        if key in {MAPPER_ELSE_OPTION, MAPPER_KEY_PROPERTIES_OPTION}:
+            continue
+        if _is_dropped(definition):
+            dropped.add(key)
+            continue
+        referenced_names = get_referenced_names(
+            definition, None if key == MAPPER_FILTER_OPTION else key
+        )
+        if referenced_names is None:
+            return list(column_names)
+        names.update(referenced_names)
+    return [
+        name
+        for name in column_names
+        if name in names or (include_by_default and name not in dropped)
+    ]
+
+
+def _get_column(node: ast.AST, columns: sa.ColumnCollection) -> sa.ColumnElement:
+    if isinstance(node, ast.Name) and node.id not in _RESERVED_NAMES:
+        name = node.id
+    else:
+        key = _get_record_key(node)
+        if key is None:
+            raise _UntranslatableError
+        name = key
+    if name not in columns:
+        raise _UntranslatableError
+    return columns[name]
+
+
+def _get_literal(node: ast.AST) -> t.Any:
+    if (
+        isinstance(node, ast.UnaryOp)
+        and isinstance(node.op, ast.USub)
+        and isinstance(node.operand, ast.Constant)
+        and type(node.operand.value) in {int, float}
+    ):
+        return -node.operand.value
+    if isinstance(node, ast.Constant) and type(node.value) in {
+        int,
+        float,
+        str,
+        type(None),
+    }:
+        return node.value
+    raise _UntranslatableError
+
+
+def _check_comparable(column: sa.ColumnElement, value: t.Any, *, ordered: bool) -> None:
+    # Values the `RecordConverter` returns must compare in Python like in DB2
+    sql_type = column.type
+    if isinstance(value, str):
+        # Collations and blank-padded comparisons only agree with Python on equality,
+        # and only in the direction that DB2 returns more rows than Python keeps
+        if (
+            ordered
+            or not isinstance(sql_type, sa.String)
+            or is_lob(sql_type)
+            or sql_type.__visit_name__ == "ROWID"
+        ):
+            raise _UntranslatableError
+    elif isinstance(value, float):
+        if not isinstance(sql_type, sa.Float):
+            raise _UntranslatableError
+    elif isinstance(sql_type, sa.Float):
+        if abs(value) > _MAX_EXACT_FLOAT_INTEGER:
+            raise _UntranslatableError
+    elif isinstance(sql_type, sa.Integer) or (
+        isinstance(sql_type, sa.Numeric) and sql_type.asdecimal
+    ):
+        if abs(value) > _MAX_BIGINT:
+            raise _UntranslatableError
+    else:
+        raise _UntranslatableError
+
+
+def _translate_comparison(
+    column: sa.ColumnElement, op: ast.cmpop, value: t.Any
+) -> sa.ColumnElement[bool]:
+    if value is None:
+        if isinstance(op, (ast.Eq, ast.Is)):
+            return column.is_(None)
+        if isinstance(op, (ast.NotEq, ast.IsNot)):
+            return column.is_not(None)
+        raise _UntranslatableError
+    if type(op) not in _COMPARISONS:
+        raise _UntranslatableError
+    _check_comparable(column, value, ordered=not isinstance(op, (ast.Eq, ast.NotEq)))
+    if isinstance(op, ast.NotEq):
+        if isinstance(value, str):
+            raise _UntranslatableError
+        # NULL differs from every value in Python
+        return sa.or_(column != value, column.is_(None))
+    return _COMPARISONS[type(op)](column, value)
+
+
+def _translate_membership(
+    column: sa.ColumnElement, op: ast.cmpop, node: ast.AST
+) -> sa.ColumnElement[bool]:
+    if not isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        raise _UntranslatableError
+    values = [_get_literal(element) for element in node.elts]
+    non_null_values = [value for value in values if value is not None]
+    for value in non_null_values:
+        _check_comparable(column, value, ordered=False)
+    if isinstance(op, ast.In):
+        criterion = column.in_(non_null_values)
+        if None in values:
+            return sa.or_(criterion, column.is_(None))
+        return criterion
+    if any(isinstance(value, str) for value in values) or None in values:
+        raise _UntranslatableError
+    return sa.or_(column.not_in(non_null_values), column.is_(None))
+
+
+def _translate_pair(
+    left: ast.AST, op: ast.cmpop, right: ast.AST, columns: sa.ColumnCollection
+) -> sa.ColumnElement[bool]:
+    if isinstance(op, (ast.In, ast.NotIn)):
+        return _translate_membership(_get_column(left, columns), op, right)
+    try:
+        column = _get_column(left, columns)
+        value_node = right
+    except _UntranslatableError:
+        column = _get_column(right, columns)
+        value_node = left
+        if type(op) in _SWAPPED_COMPARISONS:
+            op = _SWAPPED_COMPARISONS[type(op)]()
+    return _translate_comparison(column, op, _get_literal(value_node))
+
+
+def _translate(node: ast.AST, columns: sa.ColumnCollection) -> sa.ColumnElement[bool]:
+    # The criterion must hold for every row the expression keeps. It may hold for
+    # other rows too, since the stream map still filters the records.
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        # Leaving out a conjunct only lets more rows pass
+        criteria = [
+            criterion
+            for criterion in (_try_translate(value, columns) for value in node.values)
+            if criterion is not None
+        ]
+        if not criteria:
+            raise _UntranslatableError
+        return sa.and_(*criteria)
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.Or):
+        return sa.or_(*(_translate(value, columns) for value in node.values))
+    if isinstance(node, ast.Compare):
+        if len(node.ops) == 1:
+            return _translate_pair(node.left, node.ops[0], node.comparators[0], columns)
+        # `a < b < c` is `a < b and b < c`
+        operands = [node.left, *node.comparators]
+        pairs: list[ast.expr] = [
+            ast.Compare(left=left, ops=[op], comparators=[right])
+            for left, op, right in zip(operands, node.ops, operands[1:])
+        ]
+        return _translate(ast.BoolOp(op=ast.And(), values=pairs), columns)
+    raise _UntranslatableError
+
+
+def _try_translate(
+    node: ast.AST, columns: sa.ColumnCollection
+) -> sa.ColumnElement[bool] | None:
+    try:
+        return _translate(node, columns)
+    except _UntranslatableError:
+        return None
+
+
+def get_filter_criterion(
+    expression: str, columns: sa.ColumnCollection
+) -> sa.ColumnElement[bool] | None:
+    """Translate the filter expression of a stream map into a WHERE criterion.
+
+    Comparisons of a column with a literal, `in` and `is None` tests, and their
+    combinations with `and` and `or` are translated, as long as DB2 compares the
+    values like Python compares the converted values. Other parts of a conjunction
+    are left out, so the criterion may select more rows than the expression keeps,
+    but never fewer.
+
+    Args:
+        expression: The filter expression.
+        columns: The columns of the queried table.
+
+    Returns:
+        The criterion, or `None` if no part of the expression can be translated.
+    """
+    return _try_translate(ast.parse(expression, mode="eval").body, columns)
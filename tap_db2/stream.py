@@ -2,18 +2,84 @@
 
 from __future__ import annotations
 
+import contextlib
+import copy
+import fnmatch
+import functools
+import math
+import time
 import typing as t
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
 
 import ibm_db_sa  # type: ignore
 import sqlalchemy as sa
 from singer_sdk import SQLStream
-from singer_sdk.helpers._state import STARTING_MARKER
+from singer_sdk.helpers._batch import BatchConfig
+from singer_sdk.helpers._typing import TypeConformanceLevel
+from singer_sdk.mapper import (
+    MAPPER_FILTER_OPTION,
+    MAPPER_SOURCE_OPTION,
+    CustomStreamMap,
+)
 
+from tap_db2.batch import DB2Batcher
 from tap_db2.connector import DB2Connector
+from tap_db2.converter import RecordConverter
+from tap_db2.errors import get_sqlcode, is_connection_error, is_resource_limit_error
+from tap_db2.lob import (
+    VARCHAR_MAX_LENGTH,
+    LOBChunkReader,
+    LOBPolicy,
+    get_lob_projection,
+    is_lob,
+)
+from tap_db2.partitioning import (
+    ADAPTIVE_PARTITION_SIZE,
+    KEY_RANGE_COMPLETE,
+    KEY_RANGE_START,
+    PARTITION_KEY,
+    PARTITION_KEY_VALUE,
+    PARTITION_SIZE_MAX,
+    PARTITION_SIZE_MIN,
+    REPLICATION_KEY_TIEBREAK,
+    PageEnd,
+    PageSizer,
+    format_replication_key_value,
+    from_bookmark_value,
+    get_key_range_criteria,
+    get_key_ranges,
+    get_keyset_criterion,
+    get_min_max_boundaries,
+    get_quantile_boundaries,
+    parse_numeric_literal,
+    to_bookmark_value,
+)
+from tap_db2.prefetch import PREFETCH_BLOCK_SIZE, prefetch
+from tap_db2.pushdown import get_filter_criterion, get_mapped_column_names
+from tap_db2.syscat import get_quantiles, get_table_statistics, has_syscat_statistics
+from tap_db2.telemetry import (
+    PROGRESS_BLOCK_ROWS,
+    PROGRESS_INTERVAL_SECONDS,
+    Progress,
+    Telemetry,
+    TelemetryMetric,
+    get_point,
+)
 
 if t.TYPE_CHECKING:
-    from singer_sdk.helpers.types import Context
+    import threading
+    from datetime import datetime
+
+    from singer_sdk.helpers._batch import BaseBatchFileEncoding
+    from singer_sdk.helpers.types import Context, Record
+
+    from tap_db2.syscat import TableStatistics
+    from tap_db2.tap import TapDB2
+
+# The delay before the first reconnect, doubled for every further attempt
+RECONNECT_BACKOFF_SECONDS = 1.0
+_MAX_RECONNECT_BACKOFF_SECONDS = 60.0
 
 
 class DB2Stream(SQLStream):
@@ -21,25 +87,71 @@ class DB2Stream(SQLStream):
 
     connector_class = DB2Connector
 
-    def get_starting_replication_key_value(
-        self,
-        context: Context | None,
-    ) -> t.Any | None:
-        """Get starting replication key.
+    # Records are made JSON compatible by the `RecordConverter`
+    TYPE_CONFORMANCE_LEVEL = TypeConformanceLevel.NONE
+
+    def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+        """Initialize the stream.
+
+        Args:
+            *args: Positional arguments for the SQLStream initializer.
+            **kwargs: Keyword arguments for the SQLStream initializer.
+        """
+        super().__init__(*args, **kwargs)
+        # Timings and counts of all queries, updated while holding the message lock
+        self.telemetry = Telemetry()
+        # The tie-break key values of the last emitted row as returned by the driver,
+        # by the id of the context state
+        self._tiebreak_values: dict[int, list[t.Any]] = {}
+
+    @property
+    def _message_lock(self) -> threading.RLock:
+        # The state of all streams is shared and may be written to in parallel
+        return t.cast("TapDB2", self._tap).message_lock
+
+    def get_context_state(self, context: Context | None) -> dict:
+        """Return a writable state dict for the given context.
 
         Args:
             context: Stream partition or context dictionary.
 
         Returns:
-            Starting replication value.
+            The partition state if applicable, else the stream state.
         """
-        state = self.get_context_state(context)
+        with self._message_lock:
+            return super().get_context_state(context)
 
-        if not state or not (timestamp_str := state.get(STARTING_MARKER)):
-            return None
-        # Format timestamp to precision supported by DB2 queries
-        timestamp = datetime.fromisoformat(str(timestamp_str))
-        return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    def _write_starting_replication_value(self, context: Context | None) -> None:
+        with self._message_lock:
+            super()._write_starting_replication_value(context)
+
+    def _write_replication_key_signpost(
+        self, context: Context | None, value: datetime | str | int | float
+    ) -> None:
+        with self._message_lock:
+            super()._write_replication_key_signpost(context, value)
+
+    def _increment_stream_state(
+        self, latest_record: Record, *, context: Context | None = None
+    ) -> None:
+        with self._message_lock:
+            super()._increment_stream_state(latest_record, context=context)
+            state = self.get_context_state(context)
+            tiebreak_values = self._tiebreak_values.get(id(state))
+            if tiebreak_values is not None and self.replication_method == "INCREMENTAL":
+                # The record is the last one with the bookmarked replication key value.
+                # Its converted values don't parse back into DATE and TIMESTAMP keys.
+                state[REPLICATION_KEY_TIEBREAK] = [
+                    to_bookmark_value(value) for value in tiebreak_values
+                ]
+
+    def _finalize_state(self, state: dict | None = None) -> None:
+        with self._message_lock:
+            super()._finalize_state(state)
+
+    def _write_state_message(self) -> None:
+        with self._message_lock:
+            super()._write_state_message()
 
     # Get records from stream
     def get_records(self, context: Context | None) -> t.Iterable[dict[str, t.Any]]:
@@ -47,7 +159,9 @@ class DB2Stream(SQLStream):
 
         If the stream has a replication_key value defined, records will be sorted by the
         incremental key. If the stream also has an available starting bookmark, the
-        records will be filtered for values greater than or equal to the bookmark value.
+        records will be filtered for values greater than or equal to the bookmark value,
+        or for keys greater than the compound bookmark of the replication key and the
+        primary key.
 
         Args:
             context: If partition context is provided, will read specifically from this
@@ -60,110 +174,903 @@ class DB2Stream(SQLStream):
             NotImplementedError: If partition is passed in context and the stream does
                 not support partitioning.
         """
-        if context:
+        if context and KEY_RANGE_START not in context:
             msg = f"Stream '{self.name}' does not support partitioning."
             raise NotImplementedError(msg)
+        if context and self.get_context_state(context).get(KEY_RANGE_COMPLETE):
+            self.logger.info("Skipping key range %s synced by a previous run.", context)
+            return
 
-        partition_key, partition_size = self._get_partition_config()
-
-        selected_column_names = self.get_selected_schema()["properties"].keys()
+        partition_keys, partition_size = self._get_partition_config()
+        selected_column_names = list(self.get_selected_schema()["properties"].keys())
+        map_transform = self._get_map_transform()
+        if map_transform is not None:
+            # Columns the stream map drops are not read, unlike the keys the state
+            # and the queries depend on
+            required_names = [*(self.primary_keys or []), self.replication_key]
+            selected_column_names = get_mapped_column_names(
+                map_transform,
+                selected_column_names,
+                [name for name in required_names if name],
+            )
+        # Partition keys are read even if they are not selected
+        unselected_keys = [
+            key for key in partition_keys or [] if key not in selected_column_names
+        ]
         table = self.connector.get_table(
             full_table_name=self.fully_qualified_name,
-            column_names=selected_column_names,
+            column_names=[*selected_column_names, *unselected_keys],
         )
-        query = table.select()
+        query = self._get_query(table, context)
+        lob_chunk_reader = self._get_lob_chunk_reader(table, query)
+        convert_row = RecordConverter(
+            [
+                # Chunked LOB values are converted by the type of their column
+                table.columns[column.name]
+                if lob_chunk_reader and is_lob(table.columns[column.name].type)
+                else column
+                for column in query.selected_columns
+            ],
+            self.schema,
+            trim_char=self._get_query_options().get("trim_char", False),
+            exclude=unselected_keys,
+        )
+
+        telemetry = Telemetry()
+
+        def read_rows(
+            conn: sa.engine.Connection, query: sa.Select
+        ) -> t.Generator[t.Sequence[t.Any] | PageEnd, None, None]:
+            rows: t.Generator[t.Sequence[t.Any] | PageEnd, None, None]
+            if partition_keys is None or partition_size is None:
+                rows = telemetry.execute(conn, query)
+            else:
+                rows = self._get_partitioned_rows(
+                    query, conn, convert_row, context, telemetry
+                )
+            if lob_chunk_reader:
+                rows = lob_chunk_reader.read(rows, conn, telemetry)
+            return rows
+
+        try:
+            rows = self._get_rows(query, read_rows, convert_row.column_names, telemetry)
+            prefetch_blocks = self._get_query_options().get("prefetch_blocks")
+            if prefetch_blocks:
+                # Fetch the next blocks while the current block is emitted
+                rows = prefetch(
+                    rows,
+                    self._get_query_options().get("fetch_size") or PREFETCH_BLOCK_SIZE,
+                    prefetch_blocks,
+                    name=f"{self.name}-fetch",
+                )
+            # Stop fetching before the connection is closed
+            with contextlib.closing(rows):
+                yield from self._get_records_from_rows(
+                    rows, convert_row, context, telemetry
+                )
+        finally:
+            with self._message_lock:
+                self.telemetry.merge(telemetry)
+
+        if context:
+            with self._message_lock:
+                self.get_context_state(context)[KEY_RANGE_COMPLETE] = True
+
+    def _get_query(self, table: sa.Table, context: Context | None) -> sa.Select:
+        partition_keys, partition_size = self._get_partition_config()
+        query = sa.select(*self._get_projection(table)).order_by(
+            *(table.columns[key] for key in self._get_sort_keys())
+        )
+
         if self.replication_key:
-            replication_key_col = table.columns[self.replication_key]
-            query = (
-                query.order_by(replication_key_col)
-                if partition_key is None
-                else query.order_by(table.columns[partition_key])
-            )
             start_val = self.get_starting_replication_key_value(context)
-            if start_val:
-                query = query.where(replication_key_col >= start_val)
+            if start_val is not None:
+                query = query.where(
+                    self._get_replication_key_criterion(table, context, start_val)
+                )
 
         if self.ABORT_AT_RECORD_COUNT is not None:
             query = query.limit(self.ABORT_AT_RECORD_COUNT + 1)
 
-        query = self._apply_filter_config(query)
+        query = self._apply_filter_config(query, table)
+        query = self._apply_read_clauses(query)
+        if context:
+            assert partition_keys is not None, "Missing partition key"
+            query = query.where(
+                *get_key_range_criteria(table.columns[partition_keys[0]], context)
+            )
+        return query
+
+    @property
+    def partitions(self) -> list[dict] | None:
+        """Return the key ranges the stream is split into.
+
+        Returns:
+            The key ranges, or `None` if the stream is read as a whole.
+        """
+        return self._key_ranges or None
+
+    @functools.cached_property
+    def _key_ranges(self) -> list[dict]:
+        partition_config = self._get_stream_config("query_partition") or {}
+        partition_keys, _ = self._get_partition_config()
+        if partition_keys is None or partition_config.get("key_ranges", 1) < 2:  # noqa: PLR2004
+            return []
+        # Ranges split the leading key column
+        partition_key = partition_keys[0]
+
+        with self._message_lock:
+            stream_state = self.stream_state
+            previous_partitions = [
+                partition
+                for partition in stream_state.get("partitions", [])
+                if KEY_RANGE_START in partition.get("context", {})
+            ]
+        unfinished_count = sum(
+            not partition.get(KEY_RANGE_COMPLETE) for partition in previous_partitions
+        )
+        if unfinished_count:
+            self.logger.info(
+                "Resuming %d unfinished of %d key ranges.",
+                unfinished_count,
+                len(previous_partitions),
+            )
+            return [partition["context"] for partition in previous_partitions]
+        if previous_partitions and self._is_key_range_bookmark(previous_partitions):
+            # Incremental syncs read every range from its own bookmark and tie-break
+            self.logger.info(
+                "Continuing %d key ranges from their bookmarks.",
+                len(previous_partitions),
+            )
+            with self._message_lock:
+                for partition in previous_partitions:
+                    partition.pop(KEY_RANGE_COMPLETE, None)
+            return [partition["context"] for partition in previous_partitions]
+
+        range_count = self._get_key_range_count(partition_key)
+        if range_count < 2:  # noqa: PLR2004
+            return []
+        boundaries = self._get_key_range_boundaries(
+            partition_key,
+            range_count,
+            partition_config.get("key_range_source", "min_max"),
+        )
+        key_ranges = get_key_ranges(boundaries)
+        self.logger.info(
+            "Split '%s' into %d key ranges.", partition_key, len(key_ranges)
+        )
+        bookmark = self._get_key_range_bookmark(stream_state)
+        with self._message_lock:
+            stream_state["partitions"] = [
+                {"context": key_range, **bookmark} for key_range in key_ranges
+            ]
+        return key_ranges
+
+    def _get_key_range_count(self, partition_key: str) -> int:
+        partition_config = self._get_stream_config("query_partition") or {}
+        range_count = partition_config.get("key_ranges", 1)
+        statistics = self.table_statistics
+        if statistics is None:
+            return range_count
+
+        rows_per_key_range = partition_config.get("rows_per_key_range")
+        if rows_per_key_range:
+            # `key_ranges` is the maximum, small tables are split into fewer ranges
+            range_count = min(
+                range_count, math.ceil(statistics.row_count / rows_per_key_range)
+            )
+        # A range holds at least one distinct value of the leading key column
+        first_key_cardinality = statistics.first_key_cardinalities.get(
+            self.connector._dialect.denormalize_name(partition_key)
+        )
+        if first_key_cardinality is not None:
+            range_count = min(range_count, first_key_cardinality)
+        self.logger.info(
+            "Planning %d key ranges for '%s' with about %d rows.",
+            range_count,
+            self.name,
+            statistics.row_count,
+        )
+        return range_count
+
+    def _get_key_range_boundaries(
+        self, partition_key: str, range_count: int, key_range_source: str
+    ) -> list[t.Any]:
+        table = self.connector.get_table(
+            full_table_name=self.fully_qualified_name,
+            column_names=[partition_key],
+        )
+        column = table.columns[partition_key]
+        if not isinstance(column.type, (sa.Integer, sa.Numeric)):
+            self.logger.warning(
+                "Key ranges require a numeric partition key, reading '%s' as a whole.",
+                self.name,
+            )
+            return []
 
         with self.connector._connect() as conn:
-            if partition_key is None:
-                for record in conn.execute(query):
-                    transformed_record = self.post_process(dict(record._mapping))
-                    if transformed_record is None:
-                        # Record filtered out during post_process()
-                        continue
-                    yield transformed_record
+            if key_range_source == "statistics":
+                denormalize = conn.dialect.denormalize_name
+                quantiles = get_quantiles(
+                    conn,
+                    denormalize(str(table.schema)),
+                    denormalize(table.name),
+                    denormalize(column.name),
+                )
+                if quantiles:
+                    return get_quantile_boundaries(
+                        quantiles, range_count, parse_numeric_literal
+                    )
+                self.logger.info(
+                    "No distribution statistics for '%s', using MIN and MAX.",
+                    partition_key,
+                )
+            min_max_query = self._apply_filter_config(
+                sa.select(sa.func.min(column), sa.func.max(column)), table
+            )
+            min_value, max_value = conn.execute(min_max_query).one()
+        return get_min_max_boundaries(min_value, max_value, range_count)
 
-            else:
-                yield from self._get_partitioned_records(query, table, conn)
+    def _is_key_range_bookmark(self, partitions: list[dict]) -> bool:
+        # Ranges of a full table sync or of another replication key are planned anew
+        replication_keys = {
+            partition["replication_key"]
+            for partition in partitions
+            if "replication_key" in partition
+        }
+        return bool(self.replication_key) and replication_keys == {self.replication_key}
+
+    def _get_key_range_bookmark(self, stream_state: dict) -> dict:
+        # New key ranges start at the bookmark of a sync without key ranges
+        if (
+            not self.replication_key
+            or stream_state.get("replication_key") != self.replication_key
+            or stream_state.get("replication_key_value") is None
+        ):
+            return {}
+        return {
+            "replication_key": self.replication_key,
+            "replication_key_value": stream_state["replication_key_value"],
+        }
+
+    def _sync_records(
+        self,
+        context: Context | None = None,
+        *,
+        write_messages: bool = True,
+    ) -> t.Generator[dict, t.Any, t.Any]:
+        key_ranges = self.partitions if context is None else None
+        if not key_ranges:
+            yield from super()._sync_records(context, write_messages=write_messages)
+            return
+
+        # Create the progress before the key ranges share it
+        self._progress
+        # Read all key ranges concurrently, each with its own connection
+        with ThreadPoolExecutor(
+            max_workers=len(key_ranges), thread_name_prefix=self.name
+        ) as executor:
+            futures = [
+                executor.submit(self._sync_key_range, key_range, write_messages)
+                for key_range in key_ranges
+            ]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        self._finalize_state(self.stream_state)
+        if write_messages:
+            self._write_state_message()
+
+    def get_batch_config(self, config: t.Mapping) -> BatchConfig | None:
+        """Return the batch config for this stream.
+
+        Args:
+            config: Tap configuration dictionary.
+
+        Returns:
+            Batch config for this stream.
+        """
+        batch_config = copy.deepcopy(dict(config.get("batch_config") or {}))
+        if not batch_config:
+            return None
+        # The file size limit is applied by the `DB2Batcher`
+        batch_config.pop("max_file_size", None)
+        return BatchConfig.from_dict(batch_config)
+
+    def get_batches(
+        self,
+        batch_config: BatchConfig,
+        context: Context | None = None,
+    ) -> t.Iterable[tuple[BaseBatchFileEncoding, list[str]]]:
+        """Write the records to batch files while they are read.
+
+        Args:
+            batch_config: Batch config for this stream.
+            context: Stream partition or context dictionary.
 
-    def _get_partition_config(self) -> tuple[str | None, int | None]:
-        partitioning_configs = self.config.get("query_partition", {})
-        partition_config = partitioning_configs.get(
-            self.tap_stream_id
-        ) or partitioning_configs.get("*")
+        Yields:
+            A tuple of (encoding, manifest) for each batch file.
+        """
+        columns: list[sa.Column] = []
+        if batch_config.encoding.format == "parquet":
+            columns = list(
+                self.connector.get_table(
+                    full_table_name=self.fully_qualified_name,
+                    column_names=self.get_selected_schema()["properties"].keys(),
+                ).columns
+            )
+        batcher = DB2Batcher(
+            tap_name=self.tap_name,
+            stream_name=self.name,
+            batch_config=batch_config,
+            max_file_size=self.config["batch_config"].get("max_file_size"),
+            columns=columns,
+        )
+        # Key ranges are read one after another, the records of the key ranges read
+        # in parallel by `_sync_records` can't be batched
+        records = super()._sync_records(context, write_messages=False)
+        for manifest in batcher.get_batches(records):
+            yield batch_config.encoding, manifest
+
+    def _sync_key_range(self, key_range: dict, write_messages: bool) -> None:
+        for _ in super()._sync_records(key_range, write_messages=write_messages):
+            pass
+
+    def _get_stream_config(self, config_name: str) -> dict | None:
+        stream_configs = self.config.get(config_name, {})
+        return stream_configs.get(self.tap_stream_id) or stream_configs.get("*")
+
+    def _get_query_options(self) -> dict:
+        return self._get_stream_config("query_options") or {}
+
+    def _get_tiebreak_keys(self) -> list[str]:
+        partition_keys, partition_size = self._get_partition_config()
+        if (
+            not self._get_query_options().get("compound_bookmark")
+            or not self.replication_key
+            # Paginated queries are sorted by the partition key
+            or (partition_keys is not None and partition_size is not None)
+        ):
+            return []
+        if not self.primary_keys:
+            msg = f"Stream '{self.name}' requires a primary key for compound bookmarks."
+            raise ValueError(msg)
+        return [key for key in self.primary_keys if key != self.replication_key]
+
+    def _get_sort_keys(self) -> list[str]:
+        partition_keys, partition_size = self._get_partition_config()
+        if partition_keys is not None and partition_size is not None:
+            # Keyset pagination requires the rows sorted by all key columns
+            return partition_keys
+        sort_keys = [self.replication_key] if self.replication_key else []
+        if self._get_query_options().get("reconnect_attempts") and self.primary_keys:
+            # Rows sorted by a unique key can be read again after the last emitted row
+            sort_keys.extend(key for key in self.primary_keys if key not in sort_keys)
+        else:
+            sort_keys.extend(self._get_tiebreak_keys())
+        return sort_keys
+
+    def _get_resume_keys(self) -> list[str] | None:
+        partition_keys, partition_size = self._get_partition_config()
+        sort_keys = self._get_sort_keys()
+        if (partition_keys is not None and partition_size is not None) or (
+            self.primary_keys and set(self.primary_keys) <= set(sort_keys)
+        ):
+            return sort_keys
+        return None
+
+    def _get_replication_key_criterion(
+        self, table: sa.Table, context: Context | None, start_value: t.Any
+    ) -> sa.ColumnElement[bool]:
+        assert self.replication_key is not None, "Missing replication key"
+        column = table.columns[self.replication_key]
+        bound = format_replication_key_value(column.type, start_value)
+
+        state = self.get_context_state(context)
+        tiebreak_keys = self._get_tiebreak_keys()
+        tiebreak_values = state.get(REPLICATION_KEY_TIEBREAK)
+        # The tie-break values belong to the bookmark, not to a configured start
+        if (
+            not tiebreak_keys
+            or tiebreak_values is None
+            or len(tiebreak_values) != len(tiebreak_keys)
+            or state.get("replication_key_value") != start_value
+        ):
+            return column >= bound
+
+        tiebreak_columns = [table.columns[key] for key in tiebreak_keys]
+        return get_keyset_criterion(
+            [column, *tiebreak_columns],
+            [
+                bound,
+                *(
+                    from_bookmark_value(tiebreak_column.type, value)
+                    for tiebreak_column, value in zip(tiebreak_columns, tiebreak_values)
+                ),
+            ],
+        )
+
+    def _get_lob_policy(self) -> LOBPolicy:
+        return LOBPolicy(self._get_query_options().get("lob_policy", LOBPolicy.FULL))
+
+    def _get_projection(self, table: sa.Table) -> list[sa.ColumnElement]:
+        lob_policy = self._get_lob_policy()
+        lob_max_bytes = self._get_query_options().get(
+            "lob_max_bytes", VARCHAR_MAX_LENGTH
+        )
+        projection = []
+        for column in table.columns:
+            expression = (
+                get_lob_projection(column, lob_policy, lob_max_bytes)
+                if is_lob(column.type)
+                else column
+            )
+            if expression is not None:
+                projection.append(expression)
+        return projection
+
+    def _get_lob_chunk_reader(
+        self, table: sa.Table, query: sa.Select
+    ) -> LOBChunkReader | None:
+        lob_columns = [column for column in table.columns if is_lob(column.type)]
+        if self._get_lob_policy() != LOBPolicy.CHUNKED or not lob_columns:
+            return None
+
+        partition_keys, _ = self._get_partition_config()
+        key_names = partition_keys or self.primary_keys
+        if not key_names:
+            msg = (
+                f"Stream '{self.name}' requires a primary key or a partition key to "
+                "read LOB values in chunks."
+            )
+            raise ValueError(msg)
+        return LOBChunkReader(
+            [str(column.name) for column in query.selected_columns],
+            lob_columns,
+            [table.columns[key] for key in key_names],
+            self._get_query_options().get("lob_chunk_size", VARCHAR_MAX_LENGTH),
+        )
+
+    def _get_partition_config(self) -> tuple[list[str] | None, int | None]:
+        return self._partition_config
 
-        if partition_config:
-            partition_key = partition_config.get("partition_key")
-            partition_size = partition_config.get("partition_size")
+    @functools.cached_property
+    def _partition_config(self) -> tuple[list[str] | None, int | None]:
+        partition_config = self._get_stream_config("query_partition") or {}
+        min_table_rows = partition_config.get("min_table_rows")
+        if min_table_rows:
+            statistics = self.table_statistics
+            if statistics is not None and statistics.row_count < min_table_rows:
+                self.logger.info(
+                    "Stream '%s' has about %d rows, reading it with a single query.",
+                    self.name,
+                    statistics.row_count,
+                )
+                return None, None
+
+        partition_key = partition_config.get("partition_key")
+        partition_size = partition_config.get("partition_size")
+        if partition_size is None and partition_config.get("partition_pages"):
+            partition_size = self._get_partition_size_for_pages(
+                partition_config["partition_pages"]
+            )
+        if partition_size is None and partition_config.get("target_page_seconds"):
+            partition_size = ADAPTIVE_PARTITION_SIZE
+
+        partition_keys: list[str] | None
+        if isinstance(partition_key, str):
+            partition_keys = [partition_key]
+        elif partition_key:
+            partition_keys = list(partition_key)
+        elif partition_size or partition_config.get("key_ranges", 1) > 1:
+            partition_keys = self._get_default_partition_keys()
         else:
-            partition_key, partition_size = None, None
+            partition_keys = None
+        return partition_keys, partition_size
 
-        return partition_key, partition_size
+    def _get_partition_size_for_pages(self, page_count: float) -> int:
+        statistics = self.table_statistics
+        rows_per_page = statistics.get_rows_per_page() if statistics else None
+        if rows_per_page is None:
+            return ADAPTIVE_PARTITION_SIZE
+        partition_size = round(rows_per_page * page_count)
+        return min(max(partition_size, PARTITION_SIZE_MIN), PARTITION_SIZE_MAX)
 
-    def _apply_filter_config(self, query: sa.sql.select) -> sa.sql.select:
+    @functools.cached_property
+    def table_statistics(self) -> TableStatistics | None:
+        """Return the statistics of the table collected by RUNSTATS.
+
+        Returns:
+            The statistics from the SYSCAT catalog views, or `None` if they were
+            never collected or the catalog views are not available.
+        """
+        _, schema_name, table_name = self.connector.parse_full_table_name(
+            self.fully_qualified_name
+        )
+        try:
+            with self.connector._connect() as conn:
+                if not has_syscat_statistics(conn.dialect):
+                    return None
+                denormalize = conn.dialect.denormalize_name
+                statistics = get_table_statistics(
+                    conn, denormalize(str(schema_name)), denormalize(table_name)
+                )
+        except sa.exc.DBAPIError:
+            self.logger.info("Table statistics of '%s' are not available.", self.name)
+            return None
+        if statistics is None:
+            self.logger.info(
+                "Table statistics of '%s' were never collected.", self.name
+            )
+        return statistics
+
+    def _get_default_partition_keys(self) -> list[str] | None:
+        if self.primary_keys:
+            return list(self.primary_keys)
+
+        # The key properties only list the primary key, fall back to a unique index
+        _, schema_name, table_name = self.connector.parse_full_table_name(
+            self.fully_qualified_name
+        )
+        inspector = sa.inspect(self.connector._engine)
+        for index in inspector.get_indexes(table_name, schema_name):
+            if index.get("unique") and None not in index["column_names"]:
+                return [str(column_name) for column_name in index["column_names"]]
+
+        self.logger.warning(
+            "Stream '%s' has no primary key or unique index to partition by, "
+            "reading it with a single query.",
+            self.name,
+        )
+        return None
+
+    def _apply_filter_config(self, query: sa.Select, table: sa.Table) -> sa.Select:
         filter_configs = self.config.get("filter", {})
         if self.tap_stream_id in filter_configs:
             query = query.where(sa.text(filter_configs[self.tap_stream_id]["where"]))
         elif "*" in filter_configs:
             query = query.where(sa.text(filter_configs["*"]["where"]))
+
+        map_transform = self._get_map_transform()
+        if map_transform is not None and MAPPER_FILTER_OPTION in map_transform:
+            # The stream map still filters the records the criterion selects
+            criterion = get_filter_criterion(
+                map_transform[MAPPER_FILTER_OPTION], table.columns
+            )
+            if criterion is not None:
+                query = query.where(criterion)
         return query
 
-    def _get_partitioned_records(
-        self, query: sa.sql.select, table: sa.Table, conn: sa.engine.Connection
+    def _get_map_transform(self) -> dict | None:
+        # BATCH files are written without applying stream maps, and a stream mapped
+        # to several streams needs the rows and columns of all of its maps
+        if self.get_batch_config(self.config) is not None:
+            return None
+        if len(self.stream_maps) != 1 or not isinstance(
+            self.stream_maps[0], CustomStreamMap
+        ):
+            return None
+        # The last matching map replaces the default map, like in `PluginMapper`
+        map_transform = None
+        for stream_map_key, stream_def in (
+            self.config.get("stream_maps") or {}
+        ).items():
+            if (
+                isinstance(stream_def, dict)
+                and MAPPER_SOURCE_OPTION not in stream_def
+                and (
+                    stream_map_key == self.name
+                    or fnmatch.fnmatch(self.name, stream_map_key)
+                )
+            ):
+                map_transform = stream_def
+        return map_transform
+
+    def _transform_row(
+        self, row: t.Sequence[t.Any], convert_row: RecordConverter, telemetry: Telemetry
+    ) -> dict[str, t.Any] | None:
+        started = time.perf_counter()
+        transformed_record = self.post_process(convert_row(row))
+        telemetry.transform_duration += time.perf_counter() - started
+        return transformed_record
+
+    def _apply_read_clauses(self, query: sa.Select) -> sa.Select:
+        query_options = self._get_query_options()
+        clauses = []
+        if query_options.get("read_only"):
+            clauses.append("FOR READ ONLY")
+        if query_options.get("optimize_for_rows"):
+            clauses.append(
+                f"OPTIMIZE FOR {int(query_options['optimize_for_rows'])} ROWS"
+            )
+        if query_options.get("isolation_level"):
+            clauses.append(f"WITH {query_options['isolation_level']}")
+        if not clauses:
+            return query
+        # The clauses follow ORDER BY and FETCH FIRST in the order DB2 expects them
+        return query.suffix_with(" ".join(clauses), dialect="ibm_db_sa")
+
+    def _get_records_from_rows(
+        self,
+        rows: t.Iterable[t.Sequence[t.Any] | PageEnd],
+        convert_row: RecordConverter,
+        context: Context | None,
+        telemetry: Telemetry,
     ) -> t.Iterable[dict[str, t.Any]]:
-        partition_key, partition_size = self._get_partition_config()
-        lower_limit = None
+        partition_keys, _ = self._get_partition_config()
+        state = self.get_context_state(context)
+        tiebreak_indexes = [
+            convert_row.column_names.index(key) for key in self._get_tiebreak_keys()
+        ]
+        # Rows are added to the progress shared by the key ranges in blocks
+        progress_rows = 0
+        for row in rows:
+            if isinstance(row, PageEnd):
+                # All rows of the page are emitted, continue after the page on resume
+                with self._message_lock:
+                    state[PARTITION_KEY] = partition_keys
+                    state[PARTITION_KEY_VALUE] = [
+                        to_bookmark_value(value) for value in row.key_values
+                    ]
+                continue
+            progress_rows += 1
+            if progress_rows == PROGRESS_BLOCK_ROWS:
+                self._add_progress(progress_rows)
+                progress_rows = 0
+            transformed_record = self._transform_row(row, convert_row, telemetry)
+            if transformed_record is None:
+                # Record filtered out during post_process()
+                continue
+            if tiebreak_indexes:
+                # Bookmarked with the record by `_increment_stream_state`
+                self._tiebreak_values[id(state)] = [
+                    row[index] for index in tiebreak_indexes
+                ]
+            yield transformed_record
+
+        self._add_progress(progress_rows)
+        with self._message_lock:
+            state.pop(PARTITION_KEY, None)
+            state.pop(PARTITION_KEY_VALUE, None)
+
+    @functools.cached_property
+    def _progress(self) -> Progress | None:
+        telemetry_config = self.config.get("telemetry") or {}
+        interval = telemetry_config.get("progress_interval", PROGRESS_INTERVAL_SECONDS)
+        if not interval:
+            return None
+        with self._message_lock:
+            states = [self.stream_state, *self.stream_state.get("partitions", [])]
+            is_incremental = any(
+                state.get("replication_key_value") is not None for state in states
+            )
+        if self.replication_key and is_incremental:
+            # Incremental syncs read an unknown part of the table
+            return None
+        # The catalog is read without holding the lock the writers of all streams
+        # share, and only once per stream
+        statistics = self.table_statistics
+        if statistics is None:
+            return None
+        return Progress(statistics.row_count, interval)
 
-        termination_query = sa.select(sa.func.count(table.columns[partition_key]))
-        if query.whereclause is not None:
-            termination_query = termination_query.where(query.whereclause)
-        termination_query_result = conn.execute(termination_query).first()
-        assert termination_query_result is not None, "Invalid termination query"
-        termination_limit = int(str(termination_query_result[0]))
-        fetched_count = 0
+    def _add_progress(self, row_count: int) -> None:
+        progress = self._progress
+        if progress is None or not row_count:
+            return
+        with self._message_lock:
+            log_progress = progress.add_rows(row_count)
+        if log_progress:
+            self._log_progress(progress)
 
-        while fetched_count < termination_limit:
-            limited_query = query.limit(partition_size)
+    def _log_progress(self, progress: Progress) -> None:
+        remaining_seconds = progress.get_remaining_seconds() or 0
+        self.logger.info(
+            "Synced %d of about %d rows of '%s' (%.0f%%), about %s left.",
+            progress.row_count,
+            progress.total_rows,
+            self.name,
+            progress.get_fraction() * 100,
+            timedelta(seconds=round(remaining_seconds)),
+        )
+
+    def _get_rows(
+        self,
+        query: sa.Select,
+        read_rows: t.Callable[
+            [sa.engine.Connection, sa.Select],
+            t.Generator[t.Sequence[t.Any] | PageEnd, None, None],
+        ],
+        column_names: t.Sequence[str],
+        telemetry: Telemetry,
+    ) -> t.Generator[t.Sequence[t.Any] | PageEnd, None, None]:
+        query_options = self._get_query_options()
+        max_attempts = query_options.get("reconnect_attempts", 0)
+        backoff = query_options.get("reconnect_backoff", RECONNECT_BACKOFF_SECONDS)
+        resume_keys = self._get_resume_keys()
+        key_columns = [query.selected_columns[key] for key in resume_keys or []]
+        key_indexes = [column_names.index(key) for key in resume_keys or []]
+
+        # The query is sorted by the resume keys, so after a lost connection it is
+        # issued again for the rows after the last emitted row
+        attempt = 0
+        last_key: list[t.Any] | None = None
+        while True:
+            resumed_query = query
+            if last_key is not None:
+                resumed_query = query.where(get_keyset_criterion(key_columns, last_key))
+            try:
+                with self.connector._connect() as conn:
+                    fetch_size = query_options.get("fetch_size")
+                    if fetch_size:
+                        # Fetch rows in blocks of `fetch_size`, which also sets the
+                        # rowset size of ibm_db statements, see `DB2Connector`
+                        conn.execution_options(yield_per=fetch_size)
+                    rows = read_rows(conn, resumed_query)
+                    with contextlib.closing(rows):
+                        for row in rows:
+                            yield row
+                            if key_indexes and not isinstance(row, PageEnd):
+                                last_key = [row[index] for index in key_indexes]
+                                attempt = 0
+                return
+            except sa.exc.DBAPIError as ex:
+                if (
+                    not is_connection_error(ex)
+                    or attempt >= max_attempts
+                    or resume_keys is None
+                    or (last_key is not None and None in last_key)
+                ):
+                    raise
+                attempt += 1
+                delay = min(
+                    backoff * 2 ** (attempt - 1), _MAX_RECONNECT_BACKOFF_SECONDS
+                )
+                telemetry.retry_count += 1
+                self.logger.warning(
+                    "Lost the connection of stream '%s' with SQLCODE %s, "
+                    "reconnecting in %.1f seconds (attempt %d of %d).",
+                    self.name,
+                    get_sqlcode(ex),
+                    delay,
+                    attempt,
+                    max_attempts,
+                )
+                time.sleep(delay)
+
+    def _get_partitioned_rows(
+        self,
+        query: sa.Select,
+        conn: sa.engine.Connection,
+        convert_row: RecordConverter,
+        context: Context | None,
+        telemetry: Telemetry,
+    ) -> t.Generator[sa.Row | PageEnd, None, None]:
+        partition_keys, partition_size = self._get_partition_config()
+        assert partition_keys is not None, "Missing partition key"
+        assert partition_size is not None, "Missing partition size"
+        key_columns = [query.selected_columns[key] for key in partition_keys]
+        key_indexes = [convert_row.column_names.index(key) for key in partition_keys]
+
+        with self._message_lock:
+            state = self.get_context_state(context)
+            bookmark = (
+                state.get(PARTITION_KEY_VALUE)
+                if state.get(PARTITION_KEY) == partition_keys
+                else None
+            )
+        lower_limit = None
+        if bookmark is not None:
+            lower_limit = [
+                from_bookmark_value(column.type, value)
+                for column, value in zip(key_columns, bookmark)
+            ]
+            self.logger.info(
+                "Resuming interrupted sync after %s %s.", partition_keys, lower_limit
+            )
+
+        partition_config = self._get_stream_config("query_partition") or {}
+        page_sizer = PageSizer(
+            partition_size,
+            partition_config.get("target_page_seconds"),
+            partition_config.get("min_partition_size", PARTITION_SIZE_MIN),
+            partition_config.get("max_partition_size", PARTITION_SIZE_MAX),
+        )
+        # Keyset pagination: every page starts after the last key of the previous
+        # page, and a short page is the last one
+        while True:
+            page_size = page_sizer.size
+            page_query = query.limit(page_size)
             if lower_limit is not None:
-                limited_query = limited_query.where(
-                    table.columns[partition_key] > lower_limit
+                if None in lower_limit:
+                    msg = (
+                        f"Partition key {partition_keys} of stream '{self.name}' "
+                        "contains NULL values and can't be paginated."
+                    )
+                    raise ValueError(msg)
+                page_query = page_query.where(
+                    get_keyset_criterion(key_columns, lower_limit)
+                )
+            row_count = 0
+            row = None
+            fetch_duration = telemetry.fetch_duration
+            try:
+                for row in telemetry.execute(conn, page_query):
+                    row_count += 1
+                    yield row
+            except sa.exc.DBAPIError as ex:
+                if not is_resource_limit_error(ex) or not page_sizer.back_off():
+                    raise
+                conn.rollback()
+                telemetry.retry_count += 1
+                self.logger.warning(
+                    "Page of %d rows of stream '%s' failed with SQLCODE %s, "
+                    "retrying with pages of %d rows.",
+                    page_size,
+                    self.name,
+                    get_sqlcode(ex),
+                    page_sizer.size,
                 )
-            for record in conn.execute(limited_query):
-                transformed_record = self.post_process(dict(record._mapping))
+                if row is not None:
+                    # Continue after the rows emitted before the error
+                    lower_limit = [row[index] for index in key_indexes]
+                continue
 
-                if transformed_record is None:
-                    # Record filtered out during post_process()
-                    continue
-                lower_limit = transformed_record[partition_key]
-                fetched_count += 1
-                yield transformed_record
+            page_duration = telemetry.fetch_duration - fetch_duration
+            telemetry.add_page(page_duration)
+            page_sizer.add_page(row_count, page_duration)
+            self._log_metric(
+                get_point(
+                    "timer",
+                    TelemetryMetric.PAGE_DURATION,
+                    page_duration,
+                    {"stream": self.name, "context": context},
+                )
+            )
+            if row_count < page_size:
+                return
+            # Keep the values as returned by the driver to bind them to the query
+            assert row is not None, "Missing last row of page"
+            lower_limit = [row[index] for index in key_indexes]
+            yield PageEnd(lower_limit)
+
+    def _write_record_message(self, record: Record) -> None:
+        tap = t.cast("TapDB2", self._tap)
+        started = time.perf_counter()
+        with self._message_lock:
+            for record_message in self._generate_record_messages(record):
+                self.telemetry.byte_count += tap.write_record_message(record_message)
+            self._is_state_flushed = False
+            self.telemetry.emit_duration += time.perf_counter() - started
+
+    def log_sync_costs(self) -> None:
+        """Log the sync costs and the telemetry of the stream as metrics."""
+        super().log_sync_costs()
+        for point in self.telemetry.get_points({"stream": self.name}):
+            self._log_metric(point)
 
     @property
     def is_sorted(self) -> bool:
         """Expect stream to be sorted.
 
         When `True`, incremental streams will attempt to resume if unexpectedly
-        interrupted.
+        interrupted. Paginated streams are sorted by the partition key and resume
+        from the partition key bookmark instead, unless it is the replication key.
 
         Returns:
             `True` if stream is sorted. Defaults to `False`.
         """
-        partition_key, _ = self._get_partition_config()
-        return self.replication_method == "INCREMENTAL" and partition_key is None
+        partition_keys, partition_size = self._get_partition_config()
+        return self.replication_method == "INCREMENTAL" and (
+            partition_keys is None
+            or partition_size is None
+            or partition_keys[0] == self.replication_key
+        )
 
 
 class ROWID(sa.sql.sqltypes.String):
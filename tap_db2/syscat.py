@@ -0,0 +1,439 @@
+"""Bulk access to the DB2 SYSCAT catalog views."""
+
+from __future__ import annotations
+
+import re
+import typing as t
+from collections import defaultdict
+
+import sqlalchemy as sa
+from ibm_db_sa.reflection import AS400Reflector, OS390Reflector  # type: ignore
+
+if t.TYPE_CHECKING:
+    from ibm_db_sa.reflection import BaseReflector  # type: ignore
+
+COLUMN_NAMES_PATTERN = re.compile(r"(\w+)")
+
+syscat_metadata = sa.MetaData()
+
+SYSCAT_TABLES = sa.Table(
+    "TABLES",
+    syscat_metadata,
+    sa.Column("TABSCHEMA", sa.Unicode, key="tabschema"),
+    sa.Column("TABNAME", sa.Unicode, key="tabname"),
+    sa.Column("TYPE", sa.Unicode, key="type"),
+    sa.Column("ALTER_TIME", sa.DateTime, key="alter_time"),
+    sa.Column("COLCOUNT", sa.Integer, key="colcount"),
+    sa.Column("CARD", sa.BigInteger, key="card"),
+    sa.Column("NPAGES", sa.BigInteger, key="npages"),
+    schema="SYSCAT",
+)
+
+SYSCAT_COLUMNS = sa.Table(
+    "COLUMNS",
+    syscat_metadata,
+    sa.Column("TABSCHEMA", sa.Unicode, key="tabschema"),
+    sa.Column("TABNAME", sa.Unicode, key="tabname"),
+    sa.Column("COLNAME", sa.Unicode, key="colname"),
+    sa.Column("COLNO", sa.Integer, key="colno"),
+    sa.Column("TYPENAME", sa.Unicode, key="typename"),
+    sa.Column("LENGTH", sa.Integer, key="length"),
+    sa.Column("SCALE", sa.Integer, key="scale"),
+    sa.Column("DEFAULT", sa.Unicode, key="defaultval"),
+    sa.Column("NULLS", sa.Unicode, key="nullable"),
+    sa.Column("IDENTITY", sa.Unicode, key="identity"),
+    sa.Column("GENERATED", sa.Unicode, key="generated"),
+    sa.Column("ROWCHANGETIMESTAMP", sa.Unicode, key="rowchangetimestamp"),
+    sa.Column("REMARKS", sa.Unicode, key="remarks"),
+    schema="SYSCAT",
+)
+
+SYSCAT_INDEXES = sa.Table(
+    "INDEXES",
+    syscat_metadata,
+    sa.Column("TABSCHEMA", sa.Unicode, key="tabschema"),
+    sa.Column("TABNAME", sa.Unicode, key="tabname"),
+    sa.Column("INDNAME", sa.Unicode, key="indname"),
+    sa.Column("COLNAMES", sa.Unicode, key="colnames"),
+    sa.Column("UNIQUERULE", sa.Unicode, key="uniquerule"),
+    sa.Column("SYSTEM_REQUIRED", sa.SmallInteger, key="system_required"),
+    sa.Column("FIRSTKEYCARD", sa.BigInteger, key="firstkeycard"),
+    schema="SYSCAT",
+)
+
+SYSCAT_COLDIST = sa.Table(
+    "COLDIST",
+    syscat_metadata,
+    sa.Column("TABSCHEMA", sa.Unicode, key="tabschema"),
+    sa.Column("TABNAME", sa.Unicode, key="tabname"),
+    sa.Column("COLNAME", sa.Unicode, key="colname"),
+    sa.Column("TYPE", sa.Unicode, key="type"),
+    sa.Column("SEQNO", sa.SmallInteger, key="seqno"),
+    sa.Column("COLVALUE", sa.Unicode, key="colvalue"),
+    sa.Column("VALCOUNT", sa.BigInteger, key="valcount"),
+    schema="SYSCAT",
+)
+
+
+class SyscatObject(t.NamedTuple):
+    """A table or view listed in SYSCAT.TABLES."""
+
+    schema_name: str
+    table_name: str
+    is_view: bool
+    fingerprint: str
+
+
+def get_objects(
+    conn: sa.engine.Connection,
+    reflector: BaseReflector,
+    criteria: t.Sequence[sa.ColumnElement[bool]] = (),
+) -> list[SyscatObject]:
+    """Return the tables and views of all non-system schemas.
+
+    The fingerprint combines ALTER_TIME and COLCOUNT and changes whenever the
+    definition of the object changes.
+
+    Args:
+        conn: An open connection to the DB2 database.
+        reflector: The ibm_db_sa reflector used to normalize names.
+        criteria: Additional predicates on SYSCAT.TABLES selecting the objects.
+
+    Returns:
+        The objects ordered by schema, with the tables of a schema before its views.
+    """
+    systbl = SYSCAT_TABLES
+    query = (
+        sa.select(
+            systbl.c.tabschema,
+            systbl.c.tabname,
+            systbl.c.type,
+            systbl.c.alter_time,
+            systbl.c.colcount,
+        )
+        .where(sa.not_(systbl.c.tabschema.like("SYS%")))
+        .where(systbl.c.type.in_(["T", "V"]))
+        .where(*criteria)
+        .order_by(systbl.c.tabschema, systbl.c.type, systbl.c.tabname)
+    )
+    normalize = reflector.normalize_name
+    return [
+        SyscatObject(
+            schema_name=normalize(tabschema),
+            table_name=normalize(tabname),
+            is_view=tabtype == "V",
+            fingerprint=f"{alter_time}/{colcount}",
+        )
+        for tabschema, tabname, tabtype, alter_time, colcount in conn.execute(query)
+    ]
+
+
+class TableStatistics(t.NamedTuple):
+    """The statistics of a table collected by RUNSTATS."""
+
+    row_count: int
+    page_count: int
+    # The distinct values of the leading column of indexes, by column name
+    first_key_cardinalities: dict[str, int]
+
+    def get_rows_per_page(self) -> float | None:
+        """Return the average number of rows stored in a data page.
+
+        Returns:
+            The rows per page, or `None` if the table has no pages.
+        """
+        if self.page_count <= 0:
+            return None
+        return self.row_count / self.page_count
+
+
+def has_syscat_statistics(dialect: sa.engine.Dialect) -> bool:
+    """Return whether the statistics of tables can be read from the SYSCAT views.
+
+    DB2 for z/OS and IBM i keep their statistics in other catalog tables, so the
+    SYSCAT queries would only fail.
+
+    Args:
+        dialect: The dialect of a connection that was opened before.
+
+    Returns:
+        `False` for DB2 for z/OS and IBM i, `True` otherwise.
+    """
+    reflector = getattr(dialect, "_reflector", None)
+    return not isinstance(reflector, (AS400Reflector, OS390Reflector))
+
+
+def get_table_statistics(
+    conn: sa.engine.Connection, schema_name: str, table_name: str
+) -> TableStatistics | None:
+    """Return the statistics of a table from SYSCAT.TABLES and SYSCAT.INDEXES.
+
+    Reading the catalog costs nothing on the server compared to counting rows.
+
+    Args:
+        conn: An open connection to the DB2 database.
+        schema_name: The denormalized schema name.
+        table_name: The denormalized table name.
+
+    Returns:
+        The statistics, or `None` if they were never collected, e.g. for views.
+    """
+    systbl = SYSCAT_TABLES
+    row = conn.execute(
+        sa.select(systbl.c.card, systbl.c.npages)
+        .where(systbl.c.tabschema == schema_name)
+        .where(systbl.c.tabname == table_name)
+    ).one_or_none()
+    # Statistics that were never collected are -1
+    if (
+        row is None
+        or row.card is None
+        or row.npages is None
+        or row.card < 0
+        or row.npages < 0
+    ):
+        return None
+
+    sysidx = SYSCAT_INDEXES
+    first_key_cardinalities: dict[str, int] = {}
+    for colnames, firstkeycard in conn.execute(
+        sa.select(sysidx.c.colnames, sysidx.c.firstkeycard)
+        .where(sysidx.c.tabschema == schema_name)
+        .where(sysidx.c.tabname == table_name)
+        .where(sysidx.c.firstkeycard >= 0)
+    ):
+        column_names = COLUMN_NAMES_PATTERN.findall(colnames)
+        if column_names:
+            first_key_cardinalities[column_names[0]] = int(firstkeycard)
+    return TableStatistics(int(row.card), int(row.npages), first_key_cardinalities)
+
+
+def get_quantiles(
+    conn: sa.engine.Connection,
+    schema_name: str,
+    table_name: str,
+    column_name: str,
+) -> list[tuple[str, int]]:
+    """Return the quantiles of a column collected by RUNSTATS.
+
+    Args:
+        conn: An open connection to the DB2 database.
+        schema_name: The denormalized schema name.
+        table_name: The denormalized table name.
+        column_name: The denormalized column name.
+
+    Returns:
+        The quantile values as literals and the number of rows less than or equal
+        to them, in ascending order. Empty if no distribution statistics exist.
+    """
+    coldist = SYSCAT_COLDIST
+    query = (
+        sa.select(coldist.c.colvalue, coldist.c.valcount)
+        .where(coldist.c.tabschema == schema_name)
+        .where(coldist.c.tabname == table_name)
+        .where(coldist.c.colname == column_name)
+        .where(coldist.c.type == "Q")
+        .where(coldist.c.colvalue.is_not(None))
+        .order_by(coldist.c.seqno)
+    )
+    return [(colvalue, int(valcount)) for colvalue, valcount in conn.execute(query)]
+
+
+class SyscatInspector:
+    """Catalog metadata of a single DB2 schema, read from SYSCAT in bulk.
+
+    A handful of set-based queries replace the per-table round-trips of the
+    SQLAlchemy Inspector. The results are shaped exactly like the output of the
+    ibm_db_sa reflector, so `SQLConnector.discover_catalog_entry` can consume this
+    object in place of an Inspector.
+    """
+
+    def __init__(self, reflector: BaseReflector) -> None:
+        """Initialize an empty inspector.
+
+        Args:
+            reflector: The ibm_db_sa reflector used to normalize names and map types.
+        """
+        self._reflector = reflector
+        self._columns: dict[str, list[dict]] = defaultdict(list)
+        self._pk_columns: dict[str, list[str]] = defaultdict(list)
+        self._pk_names: dict[str, str] = {}
+        self._indexes: dict[str, list[dict]] = defaultdict(list)
+        self._row_change_timestamp_columns: dict[str, str] = {}
+
+    def load(
+        self,
+        conn: sa.engine.Connection,
+        schema_name: str,
+        table_names: list[str] | None = None,
+        criteria: t.Sequence[sa.ColumnElement[bool]] = (),
+    ) -> None:
+        """Read the columns and indexes of a schema.
+
+        Args:
+            conn: An open connection to the DB2 database.
+            schema_name: The normalized schema name.
+            table_names: Normalized names to restrict the queries to.
+            criteria: Predicates on SYSCAT.TABLES to restrict the queries to. Only
+                used if no table names are given.
+        """
+        normalize = self._reflector.normalize_name
+        current_schema = self._reflector.denormalize_name(schema_name)
+        tabnames: list[str] | sa.Select | None = None
+        if table_names is not None:
+            tabnames = [self._reflector.denormalize_name(name) for name in table_names]
+        elif criteria:
+            tabnames = (
+                sa.select(SYSCAT_TABLES.c.tabname)
+                .where(SYSCAT_TABLES.c.tabschema == current_schema)
+                .where(*criteria)
+            )
+
+        syscols = SYSCAT_COLUMNS
+        columns_query = (
+            sa.select(
+                syscols.c.tabname,
+                syscols.c.colname,
+                syscols.c.typename,
+                syscols.c.defaultval,
+                syscols.c.nullable,
+                syscols.c.length,
+                syscols.c.scale,
+                syscols.c.identity,
+                syscols.c.generated,
+                syscols.c.remarks,
+                syscols.c.rowchangetimestamp,
+            )
+            .where(syscols.c.tabschema == current_schema)
+            .order_by(syscols.c.tabname, syscols.c.colno)
+        )
+        if tabnames is not None:
+            columns_query = columns_query.where(syscols.c.tabname.in_(tabnames))
+        for row in conn.execute(columns_query):
+            table_name = normalize(row[0])
+            column = self._column_def(*row[1:-1])
+            self._columns[table_name].append(column)
+            if row[-1] == "Y":
+                self._row_change_timestamp_columns[table_name] = column["name"]
+
+        sysidx = SYSCAT_INDEXES
+        indexes_query = (
+            sa.select(
+                sysidx.c.tabname,
+                sysidx.c.indname,
+                sysidx.c.colnames,
+                sysidx.c.uniquerule,
+                sysidx.c.system_required,
+            )
+            .where(sysidx.c.tabschema == current_schema)
+            .order_by(sysidx.c.tabname, sysidx.c.indname)
+        )
+        if tabnames is not None:
+            indexes_query = indexes_query.where(sysidx.c.tabname.in_(tabnames))
+        for tabname, indname, colnames, uniquerule, system_required in conn.execute(
+            indexes_query
+        ):
+            table_name = normalize(tabname)
+            column_names = COLUMN_NAMES_PATTERN.findall(colnames)
+            if uniquerule == "P":
+                self._pk_columns[table_name].extend(
+                    normalize(col) for col in column_names
+                )
+                self._pk_names.setdefault(table_name, normalize(indname))
+                continue
+            if uniquerule == "U" and system_required != 0:
+                continue
+            if "sqlnotapplicable" in colnames.lower():
+                continue
+            self._indexes[table_name].append(
+                {
+                    "name": normalize(indname),
+                    "column_names": [normalize(col) for col in column_names],
+                    "unique": uniquerule == "U",
+                }
+            )
+
+    def _column_def(  # noqa: PLR0913
+        self,
+        colname: str,
+        typename: str,
+        defaultval: str | None,
+        nullable: str,
+        length: int,
+        scale: int,
+        identity: str,
+        generated: str,
+        remarks: str | None,
+    ) -> dict:
+        # Mirrors `DB2Reflector.get_columns` of ibm_db_sa
+        ischema_names = self._reflector.ischema_names
+        coltype: t.Any = typename.upper()
+        if coltype in {"DECIMAL", "NUMERIC"}:
+            coltype = ischema_names[coltype](int(length), int(scale))
+        elif coltype in {"CHARACTER", "CHAR", "VARCHAR", "GRAPHIC", "VARGRAPHIC"}:
+            coltype = ischema_names[coltype](int(length))
+        elif coltype in ischema_names:
+            coltype = ischema_names[coltype]
+        else:
+            sa.util.warn(f"Did not recognize type '{coltype}' of column '{colname}'")
+            coltype = sa.types.NULLTYPE
+        return {
+            "name": self._reflector.normalize_name(colname),
+            "type": coltype,
+            "nullable": nullable == "Y",
+            "default": defaultval or None,
+            "autoincrement": identity == "Y" and generated != " ",
+            "comment": remarks or None,
+        }
+
+    def get_columns(self, table_name: str, schema: str | None = None) -> list[dict]:
+        """Return the column definitions of a table.
+
+        Args:
+            table_name: The normalized table name.
+            schema: The schema name, ignored since one schema is loaded at a time.
+
+        Returns:
+            The columns ordered by their position in the table.
+        """
+        return self._columns[table_name]
+
+    def get_pk_constraint(self, table_name: str, schema: str | None = None) -> dict:
+        """Return the primary key constraint of a table.
+
+        Args:
+            table_name: The normalized table name.
+            schema: The schema name, ignored since one schema is loaded at a time.
+
+        Returns:
+            The constrained columns and the constraint name.
+        """
+        return {
+            "constrained_columns": self._pk_columns[table_name],
+            "name": self._pk_names.get(table_name),
+        }
+
+    def get_row_change_timestamp_column(self, table_name: str) -> str | None:
+        """Return the ROW CHANGE TIMESTAMP column of a table.
+
+        DB2 updates the column of a row whenever the row is inserted or updated.
+
+        Args:
+            table_name: The normalized table name.
+
+        Returns:
+            The normalized column name, or `None` if the table has no such column.
+        """
+        return self._row_change_timestamp_columns.get(table_name)
+
+    def get_indexes(self, table_name: str, schema: str | None = None) -> list[dict]:
+        """Return the non-primary indexes of a table.
+
+        Args:
+            table_name: The normalized table name.
+            schema: The schema name, ignored since one schema is loaded at a time.
+
+        Returns:
+            The index definitions.
+        """
+        return self._indexes[table_name]
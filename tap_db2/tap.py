@@ -2,8 +2,14 @@
 
 from __future__ import annotations
 
+import sys
+import threading
+import typing as t
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from singer_sdk import SQLTap
 from singer_sdk import typing as th
+from singer_sdk._singerlib import SingerMessageType, StateMessage
 from singer_sdk.helpers._classproperty import classproperty
 from singer_sdk.helpers.capabilities import (
     CapabilitiesEnum,
@@ -12,6 +18,18 @@ from singer_sdk.helpers.capabilities import (
 )
 
 from tap_db2.stream import DB2Stream
+from tap_db2.telemetry import write_summary
+from tap_db2.writer import DEFAULT_BUFFER_SIZE, BufferedWriter, RecordEncoder
+
+if t.TYPE_CHECKING:
+    from singer_sdk import Stream
+    from singer_sdk._singerlib import Message, RecordMessage
+
+
+def _get_page_count(stream: Stream) -> int:
+    # Streams without table statistics are started last, in catalog order
+    statistics = stream.table_statistics if isinstance(stream, DB2Stream) else None
+    return statistics.page_count if statistics else -1
 
 
 class TapDB2(SQLTap):
@@ -40,6 +58,30 @@ class TapDB2(SQLTap):
             "database", th.StringType, required=True, description="The DB2 database."
         ),
         th.Property("schema", th.StringType, description="The DB2 schema."),
+        th.Property(
+            "include_schemas",
+            th.ArrayType(th.StringType),
+            required=False,
+            description="Only discover schemas matching one of these glob patterns. Supports the wildcards '*' and '?'.",  # noqa: E501
+        ),
+        th.Property(
+            "exclude_schemas",
+            th.ArrayType(th.StringType),
+            required=False,
+            description="Skip schemas matching one of these glob patterns. Supports the wildcards '*' and '?'.",  # noqa: E501
+        ),
+        th.Property(
+            "include_tables",
+            th.ArrayType(th.StringType),
+            required=False,
+            description="Only discover tables and views matching one of these glob patterns. Supports the wildcards '*' and '?'.",  # noqa: E501
+        ),
+        th.Property(
+            "exclude_tables",
+            th.ArrayType(th.StringType),
+            required=False,
+            description="Skip tables and views matching one of these glob patterns. Supports the wildcards '*' and '?'.",  # noqa: E501
+        ),
         th.Property(
             "user", th.StringType, required=True, description="The DB2 username."
         ),
@@ -99,6 +141,13 @@ class TapDB2(SQLTap):
             required=False,
             description="Additional execution options to be passed to SQLAlchemy. This is an objects containing key-value pairs.",  # noqa: E501
         ),
+        th.Property(
+            "max_parallel_streams",
+            th.IntegerType(minimum=1),
+            default=1,
+            required=False,
+            description="The maximum number of streams synced in parallel. Each stream uses its own connection.",  # noqa: E501
+        ),
         th.Property(
             "query_partition",
             th.ObjectType(
@@ -106,14 +155,66 @@ class TapDB2(SQLTap):
                     {
                         "type": ["object", "null"],
                         "properties": {
-                            "partition_key": {"type": ["string"]},
+                            "partition_key": {
+                                "type": ["string", "array"],
+                                "items": {"type": "string"},
+                            },
                             "partition_size": {"type": ["integer"]},
+                            "target_page_seconds": {
+                                "type": ["number"],
+                                "exclusiveMinimum": 0,
+                            },
+                            "min_partition_size": {"type": ["integer"], "minimum": 1},
+                            "max_partition_size": {"type": ["integer"], "minimum": 1},
+                            "key_ranges": {"type": ["integer"], "minimum": 1},
+                            "key_range_source": {
+                                "type": ["string"],
+                                "enum": ["min_max", "statistics"],
+                            },
+                            "rows_per_key_range": {"type": ["integer"], "minimum": 1},
+                            "partition_pages": {
+                                "type": ["number"],
+                                "exclusiveMinimum": 0,
+                            },
+                            "min_table_rows": {"type": ["integer"], "minimum": 1},
                         },
                     }
                 )
             ),
             required=False,
-            description="Partition query into smaller subsets. Useful when working with DB2 that has set strict resource limits per query. Only works for streams with numeric primary keys.",  # noqa: E501
+            description="Partition query into smaller subsets. Useful when working with DB2 that has set strict resource limits per query. 'partition_key' is a column or a list of columns that uniquely identify a row and defaults to the primary key or a unique index. 'target_page_seconds' adapts the partition size to the time fetching a page takes, within 'min_partition_size' and 'max_partition_size'. Pages that exceed a resource limit or time out are retried with half the size. 'key_ranges' splits the leading numeric partition key column into the given number of ranges that are read in parallel, with boundaries from MIN and MAX or from the distribution statistics in SYSCAT.COLDIST ('key_range_source'). The table statistics in SYSCAT.TABLES and SYSCAT.INDEXES plan the rest: 'rows_per_key_range' splits tables into fewer key ranges than 'key_ranges' by their row count, 'partition_pages' sets the partition size to the rows stored in the given number of data pages, and tables with fewer than 'min_table_rows' rows are read with a single query.",  # noqa: E501
+        ),
+        th.Property(
+            "query_options",
+            th.ObjectType(
+                additional_properties=th.CustomType(
+                    {
+                        "type": ["object", "null"],
+                        "properties": {
+                            "fetch_size": {"type": ["integer"], "minimum": 1},
+                            "trim_char": {"type": ["boolean"]},
+                            "isolation_level": {
+                                "type": ["string"],
+                                "enum": ["UR", "CS", "RS", "RR"],
+                            },
+                            "read_only": {"type": ["boolean"]},
+                            "optimize_for_rows": {"type": ["integer"], "minimum": 1},
+                            "prefetch_blocks": {"type": ["integer"], "minimum": 1},
+                            "compound_bookmark": {"type": ["boolean"]},
+                            "lob_policy": {
+                                "type": ["string"],
+                                "enum": ["full", "skip", "truncate", "hash", "chunked"],
+                            },
+                            "lob_max_bytes": {"type": ["integer"], "minimum": 1},
+                            "lob_chunk_size": {"type": ["integer"], "minimum": 1},
+                            "reconnect_attempts": {"type": ["integer"], "minimum": 0},
+                            "reconnect_backoff": {"type": ["number"], "minimum": 0},
+                        },
+                    }
+                )
+            ),
+            required=False,
+            description="Tune the queries issued per stream. 'fetch_size' fetches the given number of rows per request to DB2 by setting the rowset size of the statements, keeping at most one block in memory. 'trim_char' strips the trailing blanks of fixed-length CHAR and GRAPHIC columns. 'isolation_level' ('UR', 'CS', 'RS' or 'RR'), 'read_only' and 'optimize_for_rows' append the WITH, FOR READ ONLY and OPTIMIZE FOR n ROWS clauses to the SELECT statements. 'prefetch_blocks' fetches rows in a background thread while records are written, buffering up to the given number of blocks of 'fetch_size' rows (1000 by default). 'compound_bookmark' bookmarks incremental streams by the replication key and the primary key and only reads rows after both. 'lob_policy' selects how CLOB, DBCLOB, BLOB and XML columns are read: 'full' (default), 'skip', 'truncate' to 'lob_max_bytes' bytes, 'hash' as hex-encoded SHA-256, or 'chunked' in separate queries of 'lob_chunk_size' bytes per value (32672 by default). 'reconnect_attempts' retries a query after a lost connection on a new connection, starting after the last emitted row, with delays doubling from 'reconnect_backoff' seconds (1 by default).",  # noqa: E501
         ),
         th.Property(
             "filter",
@@ -144,6 +245,130 @@ class TapDB2(SQLTap):
             required=False,
             description="Ignore views.",
         ),
+        th.Property(
+            "incremental_row_change_timestamp",
+            th.BooleanType(),
+            default=False,
+            required=False,
+            description="Default the streams of tables with a ROW CHANGE TIMESTAMP column to INCREMENTAL replication on that column. Requires the SYSCAT catalog views of DB2 for Linux, UNIX and Windows.",  # noqa: E501
+        ),
+        th.Property(
+            "discovery_cache",
+            th.ObjectType(
+                th.Property(
+                    "path",
+                    th.StringType(),
+                    required=True,
+                    description="The path of the discovery cache file.",
+                ),
+                th.Property(
+                    "refresh",
+                    th.BooleanType(),
+                    default=False,
+                    required=False,
+                    description="Ignore the cached entries and rediscover all tables.",
+                ),
+            ),
+            required=False,
+            description="Cache discovered catalog entries on disk. Only tables whose ALTER_TIME or column count changed since the last run are reflected again. Requires the SYSCAT catalog views of DB2 for Linux, UNIX and Windows.",  # noqa: E501
+        ),
+        th.Property(
+            "telemetry",
+            th.ObjectType(
+                th.Property(
+                    "summary_path",
+                    th.StringType(),
+                    required=False,
+                    description="Write the telemetry of all streams to this file at the end of the run.",  # noqa: E501
+                ),
+                th.Property(
+                    "summary_format",
+                    th.StringType(allowed_values=["json", "prometheus"]),
+                    default="json",
+                    required=False,
+                    description="The format of the summary file, 'json' or 'prometheus' for the textfile collector of the Prometheus node exporter.",  # noqa: E501
+                ),
+                th.Property(
+                    "progress_interval",
+                    th.NumberType(),
+                    default=60,
+                    required=False,
+                    description="Seconds between the progress and ETA log lines of full syncs, estimated from the row count in the table statistics. 0 disables them.",  # noqa: E501
+                ),
+            ),
+            required=False,
+            description="Every stream logs the time to first row, the time spent fetching, transforming and writing records, and the rows and bytes read as METRIC log lines. Optionally, a summary of all streams is written to a JSON file or a Prometheus textfile.",  # noqa: E501
+        ),
+        th.Property(
+            "batch_config",
+            th.ObjectType(
+                th.Property(
+                    "encoding",
+                    th.ObjectType(
+                        th.Property(
+                            "format",
+                            th.StringType(allowed_values=["jsonl", "parquet"]),
+                            required=True,
+                            description="The format of the batch files. Parquet requires the 'pyarrow' package.",  # noqa: E501
+                        ),
+                        th.Property(
+                            "compression",
+                            th.StringType(allowed_values=["gzip", "none"]),
+                            required=False,
+                            description="The compression of the batch files.",
+                        ),
+                    ),
+                    required=True,
+                ),
+                th.Property(
+                    "storage",
+                    th.ObjectType(
+                        th.Property(
+                            "root",
+                            th.StringType(),
+                            required=True,
+                            description="The root URL of the batch files, e.g. 'file:///data/batches'.",
+                        ),
+                        th.Property(
+                            "prefix",
+                            th.StringType(),
+                            required=False,
+                            description="The prefix of the batch file names.",
+                        ),
+                    ),
+                    required=True,
+                ),
+                th.Property(
+                    "batch_size",
+                    th.IntegerType(minimum=1),
+                    default=10000,
+                    required=False,
+                    description="The maximum number of records per batch file.",
+                ),
+                th.Property(
+                    "max_file_size",
+                    th.IntegerType(minimum=1),
+                    required=False,
+                    description="The size in bytes after which a batch file is completed.",  # noqa: E501
+                ),
+            ),
+            required=False,
+            description="Write the records to batch files and emit BATCH messages instead of RECORD messages. Records are written to the files while they are read.",  # noqa: E501
+        ),
+        th.Property(
+            "fast_writer",
+            th.ObjectType(
+                th.Property(
+                    "buffer_size",
+                    th.IntegerType(minimum=1),
+                    default=DEFAULT_BUFFER_SIZE,
+                    required=False,
+                    description="The number of characters written to stdout at once.",
+                ),
+            ),
+            required=False,
+            description="Serialize RECORD messages with an encoder compiled per stream and write all messages to stdout in large blocks. The output is identical to the default output. Setting this to an empty object enables the fast writer with the default buffer size. The buffer is flushed after every STATE message.",  # noqa: E501
+        ),
         th.Property(
             "stream_maps",
             th.ObjectType(
@@ -178,6 +403,141 @@ class TapDB2(SQLTap):
         ),
     ).to_dict()
 
+    def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+        """Initialize the tap.
+
+        Args:
+            *args: Positional arguments for the SQLTap initializer.
+            **kwargs: Keyword arguments for the SQLTap initializer.
+        """
+        # Guards the Singer output and the shared state when streams run in parallel
+        self.message_lock = threading.RLock()
+        self.buffered_writer: BufferedWriter | None = None
+        self._record_encoders: dict[str, RecordEncoder] = {}
+        super().__init__(*args, **kwargs)
+        fast_writer_config = self.config.get("fast_writer")
+        if fast_writer_config is not None:
+            self.buffered_writer = BufferedWriter(
+                fast_writer_config.get("buffer_size", DEFAULT_BUFFER_SIZE)
+            )
+
+    def write_message(self, message: Message) -> None:
+        """Write a message to stdout, one message at a time.
+
+        Args:
+            message: The message to write.
+        """
+        with self.message_lock:
+            if self.buffered_writer is None:
+                super().write_message(message)
+                return
+            self.buffered_writer.write(self.format_message(message) + "\n")
+            # Targets only checkpoint the records preceding a STATE message
+            if message.type == SingerMessageType.STATE:
+                self.buffered_writer.flush()
+
+    def write_record_message(self, message: RecordMessage) -> int:
+        """Write a RECORD message to stdout, one message at a time.
+
+        Args:
+            message: The message to write.
+
+        Returns:
+            The size of the serialized message in bytes.
+        """
+        if self.buffered_writer is not None:
+            with self.message_lock:
+                encoder = self._record_encoders.get(message.stream)
+                if encoder is None:
+                    encoder = RecordEncoder(message.stream)
+                    self._record_encoders[message.stream] = encoder
+                line = encoder.encode(message) + "\n"
+                self.buffered_writer.write(line)
+            return len(line)
+
+        # Serialized messages are ASCII, their length equals their size in bytes
+        line = self.format_message(message) + "\n"
+        with self.message_lock:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        return len(line)
+
+    # The SDK marks `sync_all` final and has no hook to sync streams concurrently.
+    # `_sync_all_parallel` repeats the steps of `Tap.sync_all` of the pinned
+    # singer-sdk version, which `test_parallel_sync_mirrors_sdk_sync_all` checks,
+    # so review it whenever the SDK is upgraded.
+    def sync_all(self) -> None:  # type: ignore[misc]
+        """Sync all streams, up to `max_parallel_streams` at a time."""
+        max_parallel_streams = self.config.get("max_parallel_streams", 1)
+        try:
+            if max_parallel_streams <= 1:
+                super().sync_all()
+            else:
+                self._sync_all_parallel(max_parallel_streams)
+        finally:
+            if self.buffered_writer is not None:
+                with self.message_lock:
+                    self.buffered_writer.flush()
+            self._write_telemetry_summary()
+
+    def _sync_all_parallel(self, max_parallel_streams: int) -> None:
+        self._reset_state_progress_markers()
+        self._set_compatible_replication_methods()
+        self.write_message(StateMessage(value=self.state))
+
+        streams = []
+        for stream in self.streams.values():
+            if not stream.selected and not stream.has_selected_descendents:
+                self.logger.info("Skipping deselected stream '%s'.", stream.name)
+            elif not stream.parent_stream_type:
+                # Create the state entry before the stream workers share the state
+                stream.get_context_state(None)
+                streams.append(stream)
+
+        # Start the largest tables first, so they don't end up running alone
+        streams.sort(key=_get_page_count, reverse=True)
+
+        self.logger.info(
+            "Syncing %d streams with up to %d streams in parallel.",
+            len(streams),
+            max_parallel_streams,
+        )
+        # Create the shared engine and its connection pool up front
+        self.tap_connector._engine
+        with ThreadPoolExecutor(
+            max_workers=max_parallel_streams, thread_name_prefix=self.name
+        ) as executor:
+            futures = [executor.submit(self._sync_stream, stream) for stream in streams]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        for stream in self.streams.values():
+            stream.log_sync_costs()
+
+    def _write_telemetry_summary(self) -> None:
+        telemetry_config = self.config.get("telemetry") or {}
+        if not telemetry_config.get("summary_path"):
+            return
+        write_summary(
+            telemetry_config["summary_path"],
+            telemetry_config.get("summary_format", "json"),
+            {
+                stream.name: stream.telemetry
+                for stream in self.streams.values()
+                if isinstance(stream, DB2Stream) and stream.selected
+            },
+        )
+
+    @staticmethod
+    def _sync_stream(stream: Stream) -> None:
+        stream.sync()
+        stream.finalize_state_progress_markers()
+
     @classproperty
     def capabilities(self) -> list[CapabilitiesEnum]:
         """Get capabilities.
@@ -187,6 +547,7 @@ class TapDB2(SQLTap):
         """
         return [
             PluginCapabilities.ABOUT,
+            PluginCapabilities.BATCH,
             PluginCapabilities.STREAM_MAPS,
             TapCapabilities.CATALOG,
             TapCapabilities.STATE,
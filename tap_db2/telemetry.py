@@ -0,0 +1,289 @@
+"""Timings and counts of the extraction phases of a stream."""
+
+from __future__ import annotations
+
+import dataclasses
+import enum
+import json
+import time
+import typing as t
+from pathlib import Path
+
+from singer_sdk import metrics
+
+if t.TYPE_CHECKING:
+    import sqlalchemy as sa
+
+
+class TelemetryMetric(str, enum.Enum):
+    """Metrics of the extraction phases, logged like the Singer SDK metrics."""
+
+    TIME_TO_FIRST_ROW = "time_to_first_row"
+    FETCH_DURATION = "fetch_duration"
+    TRANSFORM_DURATION = "transform_duration"
+    EMIT_DURATION = "emit_duration"
+    PAGE_DURATION = "page_duration"
+    ROW_COUNT = "row_count"
+    BYTE_COUNT = "byte_count"
+    PAGE_COUNT = "page_count"
+    RETRY_COUNT = "retry_count"
+
+
+# Names and descriptions of the metrics in the Prometheus textfile
+PROMETHEUS_METRICS = {
+    "time_to_first_row": (
+        "tap_db2_time_to_first_row_seconds",
+        "Time from executing the first query until the first row was fetched.",
+    ),
+    "fetch_duration": (
+        "tap_db2_fetch_duration_seconds",
+        "Time spent executing queries and fetching rows.",
+    ),
+    "transform_duration": (
+        "tap_db2_transform_duration_seconds",
+        "Time spent converting rows into records, including post_process.",
+    ),
+    "emit_duration": (
+        "tap_db2_emit_duration_seconds",
+        "Time spent writing RECORD messages.",
+    ),
+    "page_duration_max": (
+        "tap_db2_page_duration_max_seconds",
+        "Longest time spent fetching a single page.",
+    ),
+    "row_count": ("tap_db2_rows_total", "Rows fetched from DB2."),
+    "byte_count": ("tap_db2_record_bytes_total", "Size of the RECORD messages."),
+    "page_count": ("tap_db2_pages_total", "Pages fetched with keyset pagination."),
+    "retry_count": (
+        "tap_db2_retries_total",
+        "Queries retried after they exceeded a resource limit or lost the connection.",
+    ),
+}
+
+# How often the progress of a stream is logged by default
+PROGRESS_INTERVAL_SECONDS = 60.0
+
+# Rows counted by a reader before they are added to the shared progress
+PROGRESS_BLOCK_ROWS = 1000
+
+
+@dataclasses.dataclass
+class Telemetry:
+    """Timings in seconds and counts of the queries of a stream."""
+
+    time_to_first_row: float | None = None
+    fetch_duration: float = 0.0
+    transform_duration: float = 0.0
+    emit_duration: float = 0.0
+    page_duration_max: float = 0.0
+    row_count: int = 0
+    byte_count: int = 0
+    page_count: int = 0
+    retry_count: int = 0
+
+    def execute(
+        self, conn: sa.engine.Connection, query: sa.Executable
+    ) -> t.Generator[sa.Row, None, None]:
+        """Execute a query and yield its rows, timing the execution and every fetch.
+
+        Args:
+            conn: The connection to execute the query on.
+            query: The query.
+
+        Yields:
+            The result rows.
+        """
+        started = time.perf_counter()
+        rows = iter(conn.execute(query))
+        self.fetch_duration += time.perf_counter() - started
+        while True:
+            fetch_started = time.perf_counter()
+            row = next(rows, None)
+            fetched = time.perf_counter()
+            self.fetch_duration += fetched - fetch_started
+            if row is None:
+                return
+            if self.time_to_first_row is None:
+                self.time_to_first_row = fetched - started
+            self.row_count += 1
+            yield row
+
+    def add_page(self, duration: float) -> None:
+        """Count a page of keyset pagination.
+
+        Args:
+            duration: The time spent fetching the page.
+        """
+        self.page_count += 1
+        self.page_duration_max = max(self.page_duration_max, duration)
+
+    def merge(self, other: Telemetry) -> None:
+        """Add the timings and counts of another query.
+
+        Args:
+            other: The telemetry of the other query.
+        """
+        if self.time_to_first_row is None:
+            self.time_to_first_row = other.time_to_first_row
+        elif other.time_to_first_row is not None:
+            self.time_to_first_row = min(
+                self.time_to_first_row, other.time_to_first_row
+            )
+        self.fetch_duration += other.fetch_duration
+        self.transform_duration += other.transform_duration
+        self.emit_duration += other.emit_duration
+        self.page_duration_max = max(self.page_duration_max, other.page_duration_max)
+        self.row_count += other.row_count
+        self.byte_count += other.byte_count
+        self.page_count += other.page_count
+        self.retry_count += other.retry_count
+
+    def get_points(self, tags: dict[str, t.Any]) -> list[metrics.Point]:
+        """Return the metric points of the timings and counts.
+
+        Args:
+            tags: The tags of the points, e.g. the stream name.
+
+        Returns:
+            One point per metric.
+        """
+        timers = {
+            TelemetryMetric.TIME_TO_FIRST_ROW: self.time_to_first_row,
+            TelemetryMetric.FETCH_DURATION: self.fetch_duration,
+            TelemetryMetric.TRANSFORM_DURATION: self.transform_duration,
+            TelemetryMetric.EMIT_DURATION: self.emit_duration,
+        }
+        counters = {
+            TelemetryMetric.ROW_COUNT: self.row_count,
+            TelemetryMetric.BYTE_COUNT: self.byte_count,
+            TelemetryMetric.PAGE_COUNT: self.page_count,
+            TelemetryMetric.RETRY_COUNT: self.retry_count,
+        }
+        return [
+            *(
+                get_point("timer", metric, value, tags)
+                for metric, value in timers.items()
+                if value is not None
+            ),
+            *(
+                get_point("counter", metric, value, tags)
+                for metric, value in counters.items()
+            ),
+        ]
+
+
+class Progress:
+    """Estimates the progress of a sync from the row count of the table statistics."""
+
+    def __init__(self, total_rows: int, interval: float) -> None:
+        """Initialize the progress.
+
+        Args:
+            total_rows: The estimated number of rows to sync.
+            interval: The seconds between progress log lines.
+        """
+        self.total_rows = total_rows
+        self.interval = interval
+        self.row_count = 0
+        self._started = time.perf_counter()
+        self._logged = self._started
+
+    def add_rows(self, row_count: int) -> bool:
+        """Count synced rows.
+
+        Args:
+            row_count: The number of rows.
+
+        Returns:
+            `True` if the progress is due to be logged.
+        """
+        self.row_count += row_count
+        now = time.perf_counter()
+        if now - self._logged < self.interval:
+            return False
+        self._logged = now
+        return True
+
+    def get_fraction(self) -> float:
+        """Return the estimated fraction of rows synced, at most 1."""
+        if self.total_rows <= 0:
+            return 1.0
+        return min(self.row_count / self.total_rows, 1.0)
+
+    def get_remaining_seconds(self) -> float | None:
+        """Return the estimated time until all rows are synced.
+
+        Returns:
+            The seconds at the rate so far, or `None` before the first row.
+        """
+        if not self.row_count:
+            return None
+        elapsed = time.perf_counter() - self._started
+        remaining_rows = max(self.total_rows - self.row_count, 0)
+        return elapsed * remaining_rows / self.row_count
+
+
+def get_point(
+    metric_type: str, metric: TelemetryMetric, value: t.Any, tags: dict[str, t.Any]
+) -> metrics.Point:
+    """Return a metric point of a telemetry metric.
+
+    Args:
+        metric_type: The type of the point, `timer` or `counter`.
+        metric: The metric.
+        value: The measured value.
+        tags: The tags of the point.
+
+    Returns:
+        The point.
+    """
+    # Points only serialize the value of the metric enum, so the SDK metrics can
+    # be extended
+    return metrics.Point(metric_type, t.cast("metrics.Metric", metric), value, tags)
+
+
+def write_summary(
+    path: str | Path, summary_format: str, telemetries: dict[str, Telemetry]
+) -> None:
+    """Write the telemetry of all streams to a JSON file or a Prometheus textfile.
+
+    The file is replaced atomically, so collectors never read a partial file.
+
+    Args:
+        path: The path of the summary file.
+        summary_format: `json` or `prometheus`.
+        telemetries: The telemetry by stream name.
+    """
+    if summary_format == "prometheus":
+        content = _to_prometheus(telemetries)
+    else:
+        content = json.dumps(
+            {
+                "streams": {
+                    stream_name: dataclasses.asdict(telemetry)
+                    for stream_name, telemetry in telemetries.items()
+                }
+            },
+            indent=2,
+        )
+
+    summary_path = Path(path)
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = summary_path.with_name(f".{summary_path.name}.tmp")
+    tmp_path.write_text(content + "\n", encoding="utf-8")
+    tmp_path.replace(summary_path)
+
+
+def _to_prometheus(telemetries: dict[str, Telemetry]) -> str:
+    lines = []
+    for field_name, (name, description) in PROMETHEUS_METRICS.items():
+        lines.extend([f"# HELP {name} {description}", f"# TYPE {name} gauge"])
+        for stream_name, telemetry in telemetries.items():
+            value = getattr(telemetry, field_name)
+            if value is not None:
+                lines.append(f'{name}{{stream="{_escape_label(stream_name)}"}} {value}')
+    return "\n".join(lines)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,137 @@
+"""Fast serialization and buffered output of Singer messages."""
+
+from __future__ import annotations
+
+import datetime
+import math
+import sys
+import typing as t
+from decimal import Decimal
+
+import simplejson  # type: ignore
+from simplejson.encoder import encode_basestring_ascii  # type: ignore
+from singer_sdk._singerlib.json import _default_encoding
+
+if t.TYPE_CHECKING:
+    from singer_sdk._singerlib import RecordMessage
+
+# The size in characters of the blocks written to stdout
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# Serializes values like `serialize_json` of the Singer SDK, including its errors
+_fallback_encoder = simplejson.JSONEncoder(
+    use_decimal=True, default=_default_encoding, separators=(",", ":")
+)
+
+
+def _encode_float(value: float) -> str:
+    if math.isfinite(value):
+        return float.__repr__(value)
+    return _fallback_encoder.encode(value)
+
+
+def _encode_decimal(value: Decimal) -> str:
+    if value.is_finite():
+        return str(value)
+    return _fallback_encoder.encode(value)
+
+
+def _encode_datetime(value: datetime.datetime) -> str:
+    return encode_basestring_ascii(value.isoformat("T"))
+
+
+# Serializations of the JSON compatible values the `RecordConverter` returns, by
+# exact type so that subclasses like `bool` and enums are not mistaken for others
+_VALUE_ENCODERS: dict[type, t.Callable[[t.Any], str]] = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda _: "null",
+    float: _encode_float,
+    Decimal: _encode_decimal,
+    datetime.datetime: _encode_datetime,
+}
+
+
+class RecordEncoder:
+    """Serializes the RECORD messages of a stream.
+
+    The output is identical to the messages serialized by the Singer SDK. The
+    message template and the serialized property names are built once per stream,
+    and values are serialized by their type without building an intermediate
+    message dictionary or a JSON encoder per message.
+    """
+
+    def __init__(self, stream_alias: str) -> None:
+        """Initialize the encoder.
+
+        Args:
+            stream_alias: The name of the stream in the messages.
+        """
+        self._prefix = (
+            '{"type":"RECORD","stream":'
+            + encode_basestring_ascii(stream_alias)
+            + ',"record":{'
+        )
+        self._keys: dict[str, str] = {}
+
+    def encode(self, message: RecordMessage) -> str:
+        """Serialize a RECORD message.
+
+        Args:
+            message: The message.
+
+        Returns:
+            The serialized message.
+        """
+        keys = self._keys
+        properties = []
+        for name, value in message.record.items():
+            key = keys.get(name)
+            if key is None:
+                key = keys[name] = encode_basestring_ascii(name) + ":"
+            encode = _VALUE_ENCODERS.get(type(value), _fallback_encoder.encode)
+            properties.append(key + encode(value))
+
+        line = self._prefix + ",".join(properties) + "}"
+        if message.version is not None:
+            line += ',"version":' + _fallback_encoder.encode(message.version)
+        if message.time_extracted is not None:
+            line += ',"time_extracted":' + _encode_datetime(message.time_extracted)
+        return line + "}"
+
+
+class BufferedWriter:
+    """Writes serialized messages to stdout in large blocks.
+
+    Not thread-safe, writes must be serialized by the caller.
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        """Initialize the writer.
+
+        Args:
+            buffer_size: The size in characters after which the buffer is flushed.
+        """
+        self.buffer_size = buffer_size
+        self._lines: list[str] = []
+        self._size = 0
+
+    def write(self, line: str) -> None:
+        """Write a line, flushing the buffer once it is full.
+
+        Args:
+            line: The line, including the line break.
+        """
+        self._lines.append(line)
+        self._size += len(line)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered lines to stdout."""
+        if self._lines:
+            sys.stdout.write("".join(self._lines))
+            self._lines.clear()
+            self._size = 0
+        sys.stdout.flush()
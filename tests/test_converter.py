@@ -0,0 +1,110 @@
+"""Tests the conversion of result rows into records."""
+
+import datetime
+import decimal
+import logging
+
+import ibm_db_sa  # type: ignore
+import sqlalchemy as sa
+from singer_sdk.helpers._typing import TypeConformanceLevel, conform_record_data_types
+
+from tap_db2.connector import DB2Connector
+from tap_db2.converter import RecordConverter
+
+COLUMNS = [
+    sa.Column("ID", sa.BigInteger),
+    sa.Column("NAME", sa.VARCHAR(20)),
+    sa.Column("CODE", sa.CHAR(8)),
+    sa.Column("PRICE", sa.DECIMAL(12, 2)),
+    sa.Column("RATE", sa.Float),
+    sa.Column("ENABLED", sa.Boolean),
+    sa.Column("CREATED_AT", sa.TIMESTAMP),
+    sa.Column("DUE_DATE", sa.DATE),
+    sa.Column("START_TIME", sa.TIME),
+    sa.Column("PAYLOAD", sa.BLOB),
+    sa.Column("NOTES", ibm_db_sa.base.DBCLOB),
+]
+
+ROWS = [
+    (
+        1,
+        "first",
+        "AB      ",
+        decimal.Decimal("1234.50"),
+        0.25,
+        True,
+        datetime.datetime(2024, 2, 29, 13, 45, 1, 123456),
+        datetime.date(2024, 3, 1),
+        datetime.time(8, 30),
+        b"\x00\x01\xff",
+        "long text",
+    ),
+    (2, None, None, None, None, None, None, None, None, None, None),
+]
+
+
+def get_schema():
+    """Return the JSON schema the connector derives from the columns."""
+    connector = DB2Connector({}, sqlalchemy_url="sqlite://")
+    return {
+        "type": "object",
+        "properties": {
+            column.name: connector.to_jsonschema_type(column.type) for column in COLUMNS
+        },
+    }
+
+
+def test_records_match_sdk_conformance():
+    """Converted records equal the records conformed by the Singer SDK."""
+    schema = get_schema()
+    convert_row = RecordConverter(COLUMNS, schema)
+
+    for row in ROWS:
+        expected = conform_record_data_types(
+            stream_name="test",
+            record=dict(zip([column.name for column in COLUMNS], row)),
+            schema=schema,
+            level=TypeConformanceLevel.RECURSIVE,
+            logger=logging.getLogger(__name__),
+        )
+        expected["DUE_DATE"] = expected["DUE_DATE"] and "2024-03-01T00:00:00+00:00"
+        assert convert_row(row) == expected
+
+
+def test_date_format():
+    """DATE values follow the format of the JSON schema."""
+    columns = [sa.Column("DUE_DATE", sa.DATE)]
+    row = (datetime.date(2024, 3, 1),)
+
+    date_schema = {"properties": {"DUE_DATE": {"type": "string", "format": "date"}}}
+    datetime_schema = {
+        "properties": {"DUE_DATE": {"type": "string", "format": "date-time"}}
+    }
+
+    assert RecordConverter(columns, date_schema)(row) == {"DUE_DATE": "2024-03-01"}
+    assert RecordConverter(columns, datetime_schema)(row) == {
+        "DUE_DATE": "2024-03-01T00:00:00+00:00"
+    }
+
+
+def test_trim_char():
+    """Blank padding of fixed-length columns is only trimmed on request."""
+    schema = get_schema()
+    row = ROWS[0]
+
+    assert RecordConverter(COLUMNS, schema)(row)["CODE"] == "AB      "
+    trimmed = RecordConverter(COLUMNS, schema, trim_char=True)(row)
+    assert trimmed["CODE"] == "AB"
+    assert trimmed["NAME"] == "first"
+
+
+def test_exclude_columns():
+    """Excluded columns are read but not part of the records."""
+    schema = get_schema()
+    convert_row = RecordConverter(COLUMNS, schema, exclude=["ID", "CREATED_AT"])
+
+    record = convert_row(ROWS[0])
+    assert "ID" not in record
+    assert "CREATED_AT" not in record
+    assert record["DUE_DATE"] == "2024-03-01T00:00:00+00:00"
+    assert convert_row.column_names[0] == "ID"
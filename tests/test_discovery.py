@@ -0,0 +1,326 @@
+"""Tests catalog discovery against a local fake of the DB2 SYSCAT views."""
+
+import json
+
+import pytest
+import sqlalchemy as sa
+from ibm_db_sa.base import DB2Dialect
+from ibm_db_sa.reflection import DB2Reflector
+
+from tap_db2.connector import DB2Connector
+from tap_db2.tap import TapDB2
+
+SYSCAT_DDL = [
+    "CREATE TABLE SYSCAT.SCHEMATA (SCHEMANAME VARCHAR)",
+    """
+    CREATE TABLE SYSCAT.TABLES (
+        TABSCHEMA VARCHAR, TABNAME VARCHAR, TYPE CHAR(1), ALTER_TIME TIMESTAMP,
+        COLCOUNT INTEGER
+    )
+    """,
+    "CREATE TABLE SYSCAT.VIEWS (VIEWSCHEMA VARCHAR, VIEWNAME VARCHAR, TEXT VARCHAR)",
+    """
+    CREATE TABLE SYSCAT.COLUMNS (
+        TABSCHEMA VARCHAR, TABNAME VARCHAR, COLNAME VARCHAR, COLNO INTEGER,
+        TYPENAME VARCHAR, LENGTH INTEGER, SCALE INTEGER, "DEFAULT" VARCHAR,
+        NULLS CHAR(1), KEYSEQ INTEGER, PARTKEYSEQ INTEGER, IDENTITY CHAR(1),
+        GENERATED CHAR(1), ROWCHANGETIMESTAMP CHAR(1) DEFAULT 'N', REMARKS VARCHAR
+    )
+    """,
+    """
+    CREATE TABLE SYSCAT.INDEXES (
+        TABSCHEMA VARCHAR, TABNAME VARCHAR, INDNAME VARCHAR, COLNAMES VARCHAR,
+        UNIQUERULE CHAR(1), SYSTEM_REQUIRED SMALLINT
+    )
+    """,
+]
+
+SCHEMAS = ["APP", "SALES", "SYSTOOLS"]
+
+OBJECTS = [
+    ("APP", "CUSTOMERS", "T"),
+    ("APP", "ORDER_LINES", "T"),
+    ("APP", "AUDIT_LOG", "T"),
+    ("APP", "DSN_STATEMNT_TABLE", "T"),
+    ("APP", "ACTIVE_CUSTOMERS", "V"),
+    ("SALES", "Invoices", "T"),
+    ("SYSTOOLS", "HMON_ATM_INFO", "T"),
+]
+
+COLUMNS = [
+    ("APP", "CUSTOMERS", "ID", 0, "INTEGER", 4, 0, "N", "Y", "D"),
+    ("APP", "CUSTOMERS", "NAME", 1, "VARCHAR", 30, 0, "Y", "N", " "),
+    ("APP", "CUSTOMERS", "BALANCE", 2, "DECIMAL", 12, 2, "Y", "N", " "),
+    ("APP", "CUSTOMERS", "UPDATED_AT", 3, "TIMESTAMP", 10, 6, "N", "N", " "),
+    ("APP", "ORDER_LINES", "ORDER_ID", 0, "BIGINT", 8, 0, "N", "N", " "),
+    ("APP", "ORDER_LINES", "LINE_NO", 1, "SMALLINT", 2, 0, "N", "N", " "),
+    ("APP", "ORDER_LINES", "SKU", 2, "CHARACTER", 12, 0, "N", "N", " "),
+    ("APP", "ORDER_LINES", "SHIPPED_ON", 3, "DATE", 4, 0, "Y", "N", " "),
+    ("APP", "AUDIT_LOG", "EVENT_ID", 0, "VARCHAR", 36, 0, "N", "N", " "),
+    ("APP", "AUDIT_LOG", "PAYLOAD", 1, "CLOB", 1048576, 0, "Y", "N", " "),
+    ("APP", "AUDIT_LOG", "LOGGED_AT", 2, "TIMESTAMP", 10, 6, "N", "N", " "),
+    ("APP", "DSN_STATEMNT_TABLE", "QUERYNO", 0, "INTEGER", 4, 0, "N", "N", " "),
+    ("APP", "ACTIVE_CUSTOMERS", "ID", 0, "INTEGER", 4, 0, "N", "N", " "),
+    ("APP", "ACTIVE_CUSTOMERS", "NAME", 1, "VARCHAR", 30, 0, "Y", "N", " "),
+    ("SALES", "Invoices", "INVOICE_NO", 0, "INTEGER", 4, 0, "N", "N", " "),
+    ("SALES", "Invoices", "Amount", 1, "DOUBLE", 8, 0, "Y", "N", " "),
+    ("SYSTOOLS", "HMON_ATM_INFO", "SCHEMA", 0, "VARCHAR", 128, 0, "N", "N", " "),
+]
+
+INDEXES = [
+    ("APP", "CUSTOMERS", "PK_CUSTOMERS", "+ID", "P", 0),
+    ("APP", "CUSTOMERS", "IX_CUSTOMERS_NAME", "+NAME", "D", 0),
+    ("APP", "ORDER_LINES", "PK_ORDER_LINES", "+ORDER_ID+LINE_NO", "P", 0),
+    ("APP", "AUDIT_LOG", "UX_AUDIT_LOG", "+EVENT_ID", "U", 0),
+    ("SALES", "Invoices", "PK_INVOICES", "+INVOICE_NO", "P", 0),
+]
+
+
+class ReflectionInspector:
+    """Per-table Inspector stand-in that runs the ibm_db_sa DB2 reflection queries."""
+
+    def __init__(self, conn: sa.engine.Connection, reflector: DB2Reflector) -> None:
+        self.conn = conn
+        self.reflector = reflector
+
+    def get_schema_names(self):
+        return self.reflector.get_schema_names(self.conn)
+
+    def get_table_names(self, schema=None):
+        return self.reflector.get_table_names(self.conn, schema=schema)
+
+    def get_view_names(self, schema=None):
+        return self.reflector.get_view_names(self.conn, schema=schema)
+
+    def get_columns(self, table_name, schema=None):
+        return self.reflector.get_columns(self.conn, table_name, schema=schema)
+
+    def get_pk_constraint(self, table_name, schema=None):
+        return self.reflector.get_pk_constraint(self.conn, table_name, schema=schema)
+
+    def get_indexes(self, table_name, schema=None):
+        return self.reflector.get_indexes(self.conn, table_name, schema=schema)
+
+
+@pytest.fixture
+def syscat_engine():
+    """Return a SQLite engine with a populated fake SYSCAT schema."""
+    engine = sa.create_engine("sqlite://", poolclass=sa.pool.StaticPool)
+
+    @sa.event.listens_for(engine, "connect")
+    def attach_syscat(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS SYSCAT")
+
+    with engine.begin() as conn:
+        for ddl in SYSCAT_DDL:
+            conn.exec_driver_sql(ddl)
+        for schema in SCHEMAS:
+            conn.exec_driver_sql("INSERT INTO SYSCAT.SCHEMATA VALUES (?)", (schema,))
+        for schema, name, tabtype in OBJECTS:
+            colcount = sum(1 for col in COLUMNS if col[:2] == (schema, name))
+            conn.exec_driver_sql(
+                "INSERT INTO SYSCAT.TABLES VALUES (?, ?, ?, ?, ?)",
+                (schema, name, tabtype, "2024-01-01 00:00:00.000000", colcount),
+            )
+            if tabtype == "V":
+                conn.exec_driver_sql(
+                    "INSERT INTO SYSCAT.VIEWS VALUES (?, ?, '')", (schema, name)
+                )
+        for column in COLUMNS:
+            conn.exec_driver_sql(
+                "INSERT INTO SYSCAT.COLUMNS (TABSCHEMA, TABNAME, COLNAME, COLNO, "
+                "TYPENAME, LENGTH, SCALE, NULLS, IDENTITY, GENERATED) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                column,
+            )
+        for index in INDEXES:
+            conn.exec_driver_sql(
+                "INSERT INTO SYSCAT.INDEXES VALUES (?, ?, ?, ?, ?, ?)", index
+            )
+    return engine
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {},
+        {"schema": "app"},
+        {"ignore_views": True},
+        {"ignore_supplied_tables": False},
+        {"include_schemas": ["A*", "sales"]},
+        {"exclude_schemas": ["APP"]},
+        {"include_tables": ["*ORDER*", "?ustomers"], "exclude_tables": ["ACTIVE_*"]},
+        {"schema": "app", "exclude_tables": ["audit_log"], "ignore_views": True},
+    ],
+)
+def test_bulk_discovery_matches_reflection(syscat_engine, config):
+    """The SYSCAT bulk path must produce the same catalog as per-table reflection."""
+    connector = DB2Connector(config=config)
+    reflector = DB2Reflector(DB2Dialect())
+    with syscat_engine.connect() as conn:
+        reflected = connector._discover_catalog_entries_reflected(
+            syscat_engine, ReflectionInspector(conn, reflector)
+        )
+        bulk = connector._discover_catalog_entries_bulk(syscat_engine, conn, reflector)
+
+    assert reflected
+    assert bulk == reflected
+
+
+def _record_syscat_column_queries(engine):
+    statements = []
+
+    @sa.event.listens_for(engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, *_):
+        if statement.startswith("SELECT") and '"SYSCAT"."COLUMNS"' in statement:
+            statements.append(statement)
+
+    return statements
+
+
+def test_discovery_cache_reflects_only_changed_tables(syscat_engine, tmp_path):
+    """Unchanged tables come from the cache, changed and dropped ones are updated."""
+    cache_path = tmp_path / "discovery_cache.json"
+    connector = DB2Connector(config={"discovery_cache": {"path": str(cache_path)}})
+    reflector = DB2Reflector(DB2Dialect())
+    column_queries = _record_syscat_column_queries(syscat_engine)
+
+    with syscat_engine.connect() as conn:
+        cold = connector._discover_catalog_entries_bulk(syscat_engine, conn, reflector)
+        assert len(json.loads(cache_path.read_text())["entries"]) == len(cold)
+        cold_query_count = len(column_queries)
+
+        warm = connector._discover_catalog_entries_bulk(syscat_engine, conn, reflector)
+        assert warm == cold
+        assert len(column_queries) == cold_query_count
+
+        conn.exec_driver_sql(
+            "INSERT INTO SYSCAT.COLUMNS (TABSCHEMA, TABNAME, COLNAME, COLNO, "
+            "TYPENAME, LENGTH, SCALE, NULLS, IDENTITY, GENERATED) "
+            "VALUES ('APP', 'CUSTOMERS', 'EMAIL', 4, 'VARCHAR', 254, 0, 'Y', 'N', ' ')"
+        )
+        conn.exec_driver_sql(
+            "UPDATE SYSCAT.TABLES SET ALTER_TIME = '2024-02-01 00:00:00.000000', "
+            "COLCOUNT = COLCOUNT + 1 WHERE TABNAME = 'CUSTOMERS'"
+        )
+        conn.exec_driver_sql("DELETE FROM SYSCAT.TABLES WHERE TABNAME = 'AUDIT_LOG'")
+        changed = connector._discover_catalog_entries_bulk(
+            syscat_engine, conn, reflector
+        )
+        assert len(column_queries) == cold_query_count + 1
+        assert "IN (?)" in column_queries[-1]
+
+        refreshed = DB2Connector(
+            config={"discovery_cache": {"path": str(cache_path), "refresh": True}}
+        )._discover_catalog_entries_bulk(syscat_engine, conn, reflector)
+        reflected = connector._discover_catalog_entries_reflected(
+            syscat_engine, ReflectionInspector(conn, reflector)
+        )
+
+    streams = {entry["tap_stream_id"]: entry for entry in changed}
+    assert "app-audit_log" not in streams
+    assert "email" in streams["app-customers"]["schema"]["properties"]
+    assert changed == refreshed
+    assert len(json.loads(cache_path.read_text())["entries"]) == len(changed)
+
+
+def test_discovery_filters_are_pushed_into_syscat_queries(syscat_engine):
+    """Excluded objects are neither listed nor reflected."""
+    connector = DB2Connector(
+        config={"include_schemas": ["APP"], "exclude_tables": ["AUDIT_*"]}
+    )
+    reflector = DB2Reflector(DB2Dialect())
+    statements = []
+
+    @sa.event.listens_for(syscat_engine, "after_cursor_execute")
+    def record_rows(conn, cursor, statement, parameters, *_):
+        statements.append((statement, parameters))
+
+    with syscat_engine.connect() as conn:
+        entries = connector._discover_catalog_entries_bulk(
+            syscat_engine, conn, reflector
+        )
+
+    assert [entry["tap_stream_id"] for entry in entries] == [
+        "app-customers",
+        "app-order_lines",
+        "app-active_customers",
+    ]
+    for statement, parameters in statements:
+        assert "LIKE" in statement
+        assert "AUDIT\\_%" in parameters
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_row_change_timestamp_is_replication_key(syscat_engine, tmp_path, incremental):
+    """ROW CHANGE TIMESTAMP columns are valid replication keys of their stream."""
+    connector = DB2Connector(
+        config={
+            "include_schemas": ["APP"],
+            "ignore_views": True,
+            "incremental_row_change_timestamp": incremental,
+            "discovery_cache": {"path": str(tmp_path / "discovery_cache.json")},
+        }
+    )
+    reflector = DB2Reflector(DB2Dialect())
+    with syscat_engine.connect() as conn:
+        conn.exec_driver_sql(
+            "UPDATE SYSCAT.COLUMNS SET ROWCHANGETIMESTAMP = 'Y', GENERATED = 'A' "
+            "WHERE TABNAME = 'CUSTOMERS' AND COLNAME = 'UPDATED_AT'"
+        )
+        cold = connector._discover_catalog_entries_bulk(syscat_engine, conn, reflector)
+        warm = connector._discover_catalog_entries_bulk(syscat_engine, conn, reflector)
+
+    assert warm == cold
+    streams = {entry["tap_stream_id"]: entry for entry in cold}
+    customers = streams["app-customers"]
+    metadata = {
+        tuple(item["breadcrumb"]): item["metadata"] for item in customers["metadata"]
+    }
+    assert metadata[()]["valid-replication-keys"] == ["updated_at"]
+    assert metadata[("properties", "updated_at")]["inclusion"] == "automatic"
+    if incremental:
+        assert customers["replication_method"] == "INCREMENTAL"
+        assert customers["replication_key"] == "updated_at"
+        assert metadata[()].get("forced-replication-method") != "INCREMENTAL"
+    else:
+        assert customers["replication_method"] != "INCREMENTAL"
+        assert "replication_key" not in customers
+
+    order_lines = streams["app-order_lines"]
+    assert order_lines["replication_method"] != "INCREMENTAL"
+    assert "valid-replication-keys" not in order_lines["metadata"][0]["metadata"]
+
+
+def test_row_change_timestamp_full_table_override(syscat_engine):
+    """Streams default to INCREMENTAL, but the catalog can choose FULL_TABLE."""
+    config = {
+        "host": "localhost",
+        "port": 50000,
+        "database": "testdb",
+        "user": "db2inst1",
+        "password": "password",
+        "include_schemas": ["APP"],
+        "incremental_row_change_timestamp": True,
+    }
+    connector = DB2Connector(config=config)
+    reflector = DB2Reflector(DB2Dialect())
+    with syscat_engine.connect() as conn:
+        conn.exec_driver_sql(
+            "UPDATE SYSCAT.COLUMNS SET ROWCHANGETIMESTAMP = 'Y', GENERATED = 'A' "
+            "WHERE TABNAME = 'CUSTOMERS' AND COLNAME = 'UPDATED_AT'"
+        )
+        entries = connector._discover_catalog_entries_bulk(
+            syscat_engine, conn, reflector
+        )
+    customers = next(
+        entry for entry in entries if entry["tap_stream_id"] == "app-customers"
+    )
+
+    tap = TapDB2(config=config, catalog={"streams": [customers]})
+    assert tap.streams["app-customers"].replication_method == "INCREMENTAL"
+
+    customers["replication_method"] = "FULL_TABLE"
+    del customers["replication_key"]
+    tap = TapDB2(config=config, catalog={"streams": [customers]})
+    assert tap.streams["app-customers"].replication_method == "FULL_TABLE"
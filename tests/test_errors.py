@@ -0,0 +1,44 @@
+"""Tests the classification of DB2 errors."""
+
+import pytest
+import sqlalchemy as sa
+
+from tap_db2.errors import get_sqlcode, is_connection_error, is_resource_limit_error
+
+
+@pytest.mark.parametrize(
+    ("message", "sqlcode", "resource_limit", "connection"),
+    [
+        (
+            "[IBM][CLI Driver][DB2/LINUXX8664] SQL0905N  Unsuccessful execution "
+            "caused by an unavoidable resource limit being exceeded.  "
+            "SQLSTATE=57014 SQLCODE=-905",
+            -905,
+            True,
+            False,
+        ),
+        ("SQL0952N  Processing was cancelled due to an interrupt.", -952, True, False),
+        (
+            "SQL30081N  A communication error has been detected.",
+            -30081,
+            False,
+            True,
+        ),
+        ('SQL0204N  "APP.ORDERS" is an undefined name.', -204, False, False),
+        ("no such table: orders", None, False, False),
+    ],
+)
+def test_get_sqlcode(message, sqlcode, resource_limit, connection):
+    """SQLCODEs are read from the messages of the DB2 drivers."""
+    error = sa.exc.OperationalError("SELECT 1", {}, Exception(message))
+    assert get_sqlcode(error) == sqlcode
+    assert is_resource_limit_error(error) == resource_limit
+    assert is_connection_error(error) == connection
+
+
+def test_invalidated_connection_is_connection_error():
+    """Errors the dialect detects as disconnects are connection errors."""
+    error = sa.exc.OperationalError(
+        "SELECT 1", {}, Exception("closed"), connection_invalidated=True
+    )
+    assert is_connection_error(error)
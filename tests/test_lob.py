@@ -0,0 +1,182 @@
+"""Tests the projection of LOB columns."""
+
+import ibm_db_sa  # type: ignore
+import pytest
+import sqlalchemy as sa
+from ibm_db_sa.ibm_db import DB2Dialect_ibm_db  # type: ignore
+
+from tap_db2.lob import LOBChunkReader, LOBPolicy, get_lob_projection, is_lob
+from tap_db2.telemetry import Telemetry
+
+TABLE = sa.Table(
+    "DOCUMENTS",
+    sa.MetaData(),
+    sa.Column("ID", sa.Integer, primary_key=True),
+    sa.Column("TITLE", sa.VARCHAR(100)),
+    sa.Column("BODY", sa.CLOB),
+    sa.Column("PAYLOAD", sa.BLOB),
+    sa.Column("CONTENT", ibm_db_sa.base.XML),
+    sa.Column("NOTES", ibm_db_sa.base.DBCLOB),
+)
+
+
+def compile_db2(element):
+    """Return the SQL of an expression as rendered for DB2."""
+    compiled = element.compile(
+        dialect=DB2Dialect_ibm_db(), compile_kwargs={"literal_binds": True}
+    )
+    return " ".join(str(compiled).split())
+
+
+def test_is_lob():
+    """LOB and XML columns are handled by the LOB policy, others are not."""
+    assert [column.name for column in TABLE.columns if is_lob(column.type)] == [
+        "BODY",
+        "PAYLOAD",
+        "CONTENT",
+        "NOTES",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("policy", "column_name", "max_bytes", "expected"),
+    [
+        ("full", "BODY", 100, '"DOCUMENTS"."BODY"'),
+        (
+            "truncate",
+            "BODY",
+            100,
+            'CAST(SUBSTRING("DOCUMENTS"."BODY", 1, 25, CODEUNITS32) AS VARCHAR(100)) '
+            'AS "BODY"',
+        ),
+        (
+            "truncate",
+            "BODY",
+            3,
+            'CAST(SUBSTRING("DOCUMENTS"."BODY", 1, 1, CODEUNITS32) AS VARCHAR(4)) '
+            'AS "BODY"',
+        ),
+        (
+            "truncate",
+            "PAYLOAD",
+            100,
+            'SUBSTRING("DOCUMENTS"."PAYLOAD", 1, 100, OCTETS) AS "PAYLOAD"',
+        ),
+        (
+            "truncate",
+            "BODY",
+            1_000_000,
+            'SUBSTRING("DOCUMENTS"."BODY", 1, 250000, CODEUNITS32) AS "BODY"',
+        ),
+        (
+            "truncate",
+            "NOTES",
+            100,
+            'SUBSTRING("DOCUMENTS"."NOTES", 1, 25, CODEUNITS32) AS "NOTES"',
+        ),
+        (
+            "truncate",
+            "CONTENT",
+            100,
+            'CAST(SUBSTRING(XMLSERIALIZE(CONTENT "DOCUMENTS"."CONTENT" AS CLOB(2G)), '
+            '1, 25, CODEUNITS32) AS VARCHAR(100)) AS "CONTENT"',
+        ),
+        (
+            "hash",
+            "PAYLOAD",
+            100,
+            'hex(hash("DOCUMENTS"."PAYLOAD", 2)) AS "PAYLOAD"',
+        ),
+        (
+            "chunked",
+            "BODY",
+            100,
+            'LENGTH("DOCUMENTS"."BODY", CODEUNITS32) AS "BODY"',
+        ),
+        (
+            "chunked",
+            "PAYLOAD",
+            100,
+            'length("DOCUMENTS"."PAYLOAD") AS "PAYLOAD"',
+        ),
+    ],
+)
+def test_lob_projection(policy, column_name, max_bytes, expected):
+    """LOB values are truncated, hashed or measured in the SELECT projection."""
+    projection = get_lob_projection(
+        TABLE.columns[column_name], LOBPolicy(policy), max_bytes
+    )
+    assert compile_db2(sa.select(projection)) == (f'SELECT {expected} FROM "DOCUMENTS"')
+
+
+def test_lob_projection_skip():
+    """Skipped LOB columns are not selected."""
+    assert get_lob_projection(TABLE.columns["BODY"], LOBPolicy.SKIP, 100) is None
+
+
+def test_lob_chunk_query():
+    """Chunks are selected by the row key and an offset."""
+    reader = LOBChunkReader(
+        ["ID", "BODY", "PAYLOAD"],
+        [TABLE.columns["BODY"], TABLE.columns["PAYLOAD"]],
+        [TABLE.columns["ID"]],
+        1000,
+    )
+    (body_query, payload_query) = reader._chunk_queries
+
+    assert body_query[0::2] == (1, False)
+    assert payload_query[0::2] == (2, True)
+    # Character chunks are cut on character boundaries
+    assert " ".join(
+        str(body_query[1].compile(dialect=DB2Dialect_ibm_db())).split()
+    ) == (
+        'SELECT CAST(SUBSTRING("DOCUMENTS"."BODY", ?, ?, CODEUNITS32) '
+        'AS VARCHAR(1000)) AS substr_characters_1 FROM "DOCUMENTS" '
+        'WHERE "DOCUMENTS"."ID" = ?'
+    )
+    assert " ".join(
+        str(payload_query[1].compile(dialect=DB2Dialect_ibm_db())).split()
+    ) == (
+        'SELECT SUBSTRING("DOCUMENTS"."PAYLOAD", ?, ?, OCTETS) AS substr_octets_1 '
+        'FROM "DOCUMENTS" WHERE "DOCUMENTS"."ID" = ?'
+    )
+
+
+def test_lob_chunk_read_deleted_row():
+    """Values of rows deleted before their chunks are read are null."""
+    engine = sa.create_engine("sqlite://")
+    documents = sa.Table(
+        "documents",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("body", sa.CLOB),
+        sa.Column("payload", sa.BLOB),
+    )
+    body = "line\r\nline\n" * 1000
+    payload = bytes(range(256)) * 100
+    with engine.connect() as conn:
+        documents.create(conn)
+        conn.execute(
+            documents.insert(),
+            [
+                {"id": 1, "body": body, "payload": payload},
+                {"id": 2, "body": "b", "payload": b"p"},
+            ],
+        )
+        lengths = sa.select(
+            documents.c.id,
+            sa.func.length(documents.c.body).label("body"),
+            sa.func.length(documents.c.payload).label("payload"),
+        ).order_by(documents.c.id)
+        rows = conn.execute(lengths).all()
+        conn.execute(documents.delete().where(documents.c.id == 2))
+
+        reader = LOBChunkReader(
+            ["id", "body", "payload"],
+            [documents.c.body, documents.c.payload],
+            [documents.c.id],
+            1000,
+        )
+        values = list(reader.read(rows, conn, Telemetry()))
+
+    assert values == [[1, body, payload], [2, None, None]]
@@ -0,0 +1,170 @@
+"""Tests splitting partition keys into key ranges."""
+
+import datetime
+import decimal
+import json
+
+import pytest
+import sqlalchemy as sa
+
+from tap_db2.partitioning import (
+    PageSizer,
+    format_replication_key_value,
+    from_bookmark_value,
+    get_key_range_criteria,
+    get_key_ranges,
+    get_keyset_criterion,
+    get_min_max_boundaries,
+    get_quantile_boundaries,
+    parse_numeric_literal,
+    to_bookmark_value,
+)
+
+
+@pytest.mark.parametrize(
+    ("min_value", "max_value", "range_count", "expected"),
+    [
+        (1, 100, 4, [25, 50, 75]),
+        (0, 2, 4, [1]),
+        (5, 5, 3, []),
+        (0.0, 1.0, 2, [0.5]),
+        (None, None, 4, []),
+    ],
+)
+def test_min_max_boundaries(min_value, max_value, range_count, expected):
+    """The key space between MIN and MAX is split into ranges of equal width."""
+    assert get_min_max_boundaries(min_value, max_value, range_count) == expected
+
+
+def test_quantile_boundaries():
+    """Quantiles split the key into ranges of similar row counts."""
+    quantiles = [("1", 1), ("10", 250), ("11", 500), ("900", 750), ("1000", 1000)]
+
+    assert get_quantile_boundaries(quantiles, 4, parse_numeric_literal) == [
+        10,
+        11,
+        900,
+    ]
+    assert get_quantile_boundaries(quantiles, 2, parse_numeric_literal) == [11]
+    assert get_quantile_boundaries([], 4, parse_numeric_literal) == []
+
+
+def test_parse_numeric_literal():
+    """Catalog values are parsed as integers where possible."""
+    assert parse_numeric_literal("42") == 42
+    assert parse_numeric_literal("'42.50'") == 42.5
+    assert parse_numeric_literal("+1.0E+003") == 1000
+
+
+def test_key_ranges_cover_all_rows():
+    """Adjacent key ranges neither overlap nor leave gaps."""
+    engine = sa.create_engine("sqlite://")
+    table = sa.Table("t", sa.MetaData(), sa.Column("id", sa.Integer))
+    table.create(engine)
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{"id": idx} for idx in [None, *range(20)]])
+        seen = []
+        for key_range in get_key_ranges([5, 10, 15]):
+            query = sa.select(table.c.id).where(
+                *get_key_range_criteria(table.c.id, key_range)
+            )
+            seen.extend(conn.scalars(query))
+
+    assert sorted(seen, key=lambda value: -1 if value is None else value) == [
+        None,
+        *range(20),
+    ]
+
+
+def test_keyset_criterion_composite_key():
+    """Rows sorted after a composite key are selected without gaps or overlaps."""
+    engine = sa.create_engine("sqlite://")
+    table = sa.Table(
+        "t", sa.MetaData(), sa.Column("a", sa.String(1)), sa.Column("b", sa.Integer)
+    )
+    table.create(engine)
+    keys = [(a, b) for a in "xyz" for b in range(3)]
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{"a": a, "b": b} for a, b in keys])
+        for idx, key in enumerate(keys):
+            query = (
+                sa.select(table.c.a, table.c.b)
+                .where(get_keyset_criterion([table.c.a, table.c.b], key))
+                .order_by(table.c.a, table.c.b)
+            )
+            assert [tuple(row) for row in conn.execute(query)] == keys[idx + 1 :]
+
+
+@pytest.mark.parametrize(
+    ("sql_type", "value"),
+    [
+        (sa.Integer(), 42),
+        (sa.String(10), "abc"),
+        (sa.DECIMAL(12, 2), decimal.Decimal("1234.50")),
+        (sa.TIMESTAMP(), datetime.datetime(2024, 2, 29, 13, 45, 1, 123456)),
+        (sa.DATE(), datetime.date(2024, 3, 1)),
+        (sa.TIME(), datetime.time(8, 30)),
+        (sa.VARBINARY(8), b"\x00\x01\xff"),
+    ],
+)
+def test_bookmark_value_round_trip(sql_type, value):
+    """Key values survive the round trip through the JSON state."""
+    bookmark = to_bookmark_value(value)
+    assert json.loads(json.dumps(bookmark)) == bookmark
+    assert from_bookmark_value(sql_type, bookmark) == value
+
+
+@pytest.mark.parametrize(
+    ("sql_type", "value", "expected"),
+    [
+        (
+            sa.TIMESTAMP(),
+            "2024-01-01T08:00:00.123456+00:00",
+            "2024-01-01 08:00:00.123456",
+        ),
+        (sa.TIMESTAMP(), "2024-01-01T08:00:00+00:00", "2024-01-01 08:00:00.000000"),
+        (sa.DATE(), "2024-01-31T00:00:00+00:00", "2024-01-31"),
+        (sa.Integer(), 42, 42),
+        (sa.String(10), "abc", "abc"),
+    ],
+)
+def test_format_replication_key_value(sql_type, value, expected):
+    """Timestamp bookmarks keep their fraction, date bookmarks drop the time."""
+    assert format_replication_key_value(sql_type, value) == expected
+
+
+def test_page_sizer_fixed():
+    """Without a target duration, pages keep their size until one fails."""
+    sizer = PageSizer(1000)
+    sizer.add_page(1000, 60.0)
+    assert sizer.size == 1000
+    assert sizer.back_off()
+    assert sizer.size == 500
+
+
+def test_page_sizer_adaptive():
+    """Pages are sized towards the target duration, by at most a factor of 2."""
+    sizer = PageSizer(1000, target_duration=2.0, min_size=100, max_size=5000)
+    sizer.add_page(1000, 1.0)
+    assert sizer.size == 2000
+    sizer.add_page(2000, 0.1)
+    assert sizer.size == 4000
+    sizer.add_page(4000, 0.0)
+    assert sizer.size == 5000
+    # Short pages are the last ones and don't say much about the duration
+    sizer.add_page(10, 0.0)
+    assert sizer.size == 5000
+    sizer.add_page(5000, 2.5)
+    assert sizer.size == 4000
+    sizer.add_page(4000, 600.0)
+    assert sizer.size == 2000
+
+    # Failed sizes are not tried again
+    assert sizer.back_off()
+    assert sizer.size == 1000
+    sizer.add_page(1000, 0.1)
+    assert sizer.size == 1000
+    for _ in range(4):
+        assert sizer.back_off()
+    assert sizer.size == 100
+    assert not sizer.back_off()
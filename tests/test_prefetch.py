@@ -0,0 +1,64 @@
+"""Tests fetching rows ahead in a background thread."""
+
+import threading
+import time
+
+import pytest
+
+from tap_db2.prefetch import prefetch
+
+
+def test_prefetch_order():
+    """Items are passed on in order, including a partial last block."""
+    items = (item for item in range(25))
+    assert list(prefetch(items, block_size=10, max_blocks=2)) == list(range(25))
+
+
+def test_prefetch_backpressure():
+    """The background thread stops fetching while the queue is full."""
+    produced = []
+
+    def items():
+        for item in range(1000):
+            produced.append(item)
+            yield item
+
+    rows = prefetch(items(), block_size=10, max_blocks=2)
+    assert next(rows) == 0
+    time.sleep(0.2)
+
+    # The block being consumed, two queued blocks and one waiting to be queued
+    assert len(produced) <= 40
+    assert list(rows) == list(range(1, 1000))
+
+
+def test_prefetch_error():
+    """Errors of the background thread are raised after the preceding items."""
+
+    def items():
+        yield from range(15)
+        msg = "connection lost"
+        raise RuntimeError(msg)
+
+    rows = prefetch(items(), block_size=10, max_blocks=2)
+    assert [next(rows) for _ in range(15)] == list(range(15))
+    with pytest.raises(RuntimeError, match="connection lost"):
+        next(rows)
+
+
+def test_prefetch_close():
+    """Closing the generator stops the background thread and closes the source."""
+    closed = threading.Event()
+
+    def items():
+        try:
+            yield from range(1000)
+        finally:
+            closed.set()
+
+    rows = prefetch(items(), block_size=10, max_blocks=1, name="test-fetch")
+    assert next(rows) == 0
+    rows.close()
+
+    assert closed.is_set()
+    assert "test-fetch" not in [thread.name for thread in threading.enumerate()]
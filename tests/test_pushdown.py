@@ -0,0 +1,125 @@
+"""Tests the translation of stream maps into queries."""
+
+import pytest
+import sqlalchemy as sa
+from ibm_db_sa.ibm_db import DB2Dialect_ibm_db  # type: ignore
+
+from tap_db2.pushdown import (
+    get_filter_criterion,
+    get_mapped_column_names,
+    get_referenced_names,
+)
+
+TABLE = sa.Table(
+    "ORDERS",
+    sa.MetaData(),
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("customer", sa.VARCHAR(20)),
+    sa.Column("amount", sa.Numeric(10, 2)),
+    sa.Column("rate", sa.Float),
+    sa.Column("updated_at", sa.DateTime),
+    sa.Column("notes", sa.CLOB),
+)
+
+COLUMN_NAMES = [str(column.name) for column in TABLE.columns]
+
+
+def compile_db2(element):
+    """Return the SQL of an expression as rendered for DB2."""
+    compiled = element.compile(
+        dialect=DB2Dialect_ibm_db(), compile_kwargs={"literal_binds": True}
+    )
+    return " ".join(str(compiled).split())
+
+
+@pytest.mark.parametrize(
+    ("expression", "sql"),
+    [
+        ("id > 10", '"ORDERS".id > 10'),
+        ("10 >= id", '"ORDERS".id <= 10'),
+        ("amount == -5", '"ORDERS".amount = -5'),
+        ("id != 3", '"ORDERS".id != 3 OR "ORDERS".id IS NULL'),
+        ("rate < 0.5", '"ORDERS".rate < 0.5'),
+        ("customer == 'ACME'", "\"ORDERS\".customer = 'ACME'"),
+        ("record['customer'] is None", '"ORDERS".customer IS NULL'),
+        ("_['customer'] != None", '"ORDERS".customer IS NOT NULL'),
+        ("id in (1, 2)", '"ORDERS".id IN (1, 2)'),
+        (
+            "customer in ['A', None]",
+            '"ORDERS".customer IN (\'A\') OR "ORDERS".customer IS NULL',
+        ),
+        ("id not in [1, 2]", '("ORDERS".id NOT IN (1, 2)) OR "ORDERS".id IS NULL'),
+        ("1 < id <= 5", '"ORDERS".id > 1 AND "ORDERS".id <= 5'),
+        (
+            "id > 1 and (customer == 'A' or amount < 2)",
+            '"ORDERS".id > 1 AND ("ORDERS".customer = \'A\' OR "ORDERS".amount < 2)',
+        ),
+        # Untranslatable conjuncts are left out
+        ("id > 1 and md5(customer) == 'x'", '"ORDERS".id > 1'),
+        ("updated_at > '2024-01-01' and id < 9", '"ORDERS".id < 9'),
+    ],
+)
+def test_filter_criterion(expression, sql):
+    """Comparisons of columns with literals are translated."""
+    criterion = get_filter_criterion(expression, TABLE.columns)
+    assert criterion is not None
+    assert compile_db2(criterion) == sql
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        # Collations and blank padding of DB2 disagree with Python
+        "customer > 'M'",
+        "customer != 'ACME'",
+        "customer not in ('A', 'B')",
+        # Dates, LOBs and mismatched types compare differently or not at all
+        "updated_at > '2024-01-01'",
+        "notes == 'x'",
+        "amount > 0.5",
+        "customer == 5",
+        "id == True",
+        # Negations and disjunctions with untranslatable parts
+        "not id > 5",
+        "id > 5 or md5(customer) == 'x'",
+        "id == amount",
+        "id",
+        "unknown_column == 1",
+        "config['limit'] > id",
+    ],
+)
+def test_filter_criterion_untranslatable(expression):
+    """Expressions that could select fewer rows than Python are not translated."""
+    assert get_filter_criterion(expression, TABLE.columns) is None
+
+
+def test_referenced_names():
+    """Names and record keys are referenced, the whole record reads everything."""
+    assert get_referenced_names("md5(customer) + _['id'] + config['x']") == {
+        "customer",
+        "id",
+    }
+    assert get_referenced_names("self * 2", "amount") == {"amount"}
+    assert get_referenced_names("json.dumps(record)") is None
+
+
+@pytest.mark.parametrize(
+    ("map_transform", "column_names"),
+    [
+        ({}, COLUMN_NAMES),
+        (
+            {"notes": None, "rate": "__NULL__"},
+            ["id", "customer", "amount", "updated_at"],
+        ),
+        (
+            {"notes": None, "rate": None, "__filter__": "rate > 1"},
+            ["id", "customer", "amount", "rate", "updated_at"],
+        ),
+        ({"__else__": None, "total": "amount * rate"}, ["id", "amount", "rate"]),
+        ({"__else__": None, "customer": "self.upper()"}, ["id", "customer"]),
+        ({"notes": None, "copy": "str(record)"}, COLUMN_NAMES),
+    ],
+)
+def test_mapped_column_names(map_transform, column_names):
+    """Columns dropped by a stream map are not read, unless it reads them."""
+    assert get_mapped_column_names(map_transform, COLUMN_NAMES, ["id"]) == column_names
@@ -0,0 +1,1421 @@
+"""Tests DB2 stream extraction against a local SQLite stand-in."""
+
+import ast
+import contextlib
+import datetime
+import decimal
+import gzip
+import inspect
+import json
+import sqlite3
+import textwrap
+import threading
+import types
+
+import ibm_db  # type: ignore
+import ibm_db_sa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+import pytest
+import sqlalchemy as sa
+from ibm_db_sa.ibm_db import DB2Dialect_ibm_db  # type: ignore
+from ibm_db_sa.reflection import OS390Reflector  # type: ignore
+from singer_sdk import Tap
+from singer_sdk.exceptions import AbortedSyncFailedException
+from singer_sdk.helpers._batch import BatchConfig
+
+from tap_db2.batch import DB2Batcher
+from tap_db2.connector import DB2Connector, _set_row_array_size
+from tap_db2.stream import DB2Stream
+from tap_db2.syscat import get_table_statistics
+from tap_db2.tap import TapDB2
+from tap_db2.telemetry import Telemetry
+
+STREAM_ID = "main-orders"
+
+TEST_CONFIG = {
+    "host": "localhost",
+    "port": 50000,
+    "database": "testdb",
+    "user": "db2inst1",
+    "password": "password",
+}
+
+
+@pytest.fixture
+def sqlite_url(tmp_path):
+    """Return the URL of a SQLite database with a populated ORDERS table."""
+    url = f"sqlite:///{tmp_path / 'orders.db'}"
+    engine = sa.create_engine(url)
+    metadata = sa.MetaData()
+    orders = sa.Table(
+        "orders",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("customer", sa.String(20)),
+        sa.Column("amount", sa.Numeric(10, 2)),
+        sa.Column("updated_at", sa.DateTime, nullable=False),
+    )
+    metadata.create_all(engine)
+    start = datetime.datetime(2024, 1, 1, 8, 0, 0)
+    with engine.begin() as conn:
+        conn.execute(
+            orders.insert(),
+            [
+                {
+                    "id": idx,
+                    "customer": f"customer {idx % 7}",
+                    "amount": decimal.Decimal(idx) / 4,
+                    "updated_at": start + datetime.timedelta(minutes=idx),
+                }
+                for idx in range(1, 251)
+            ],
+        )
+    engine.dispose()
+    return url
+
+
+def build_tap(sqlite_url, config=None, state=None, replication_key=None):
+    """Return a tap with the ORDERS stream of the SQLite database selected."""
+    tap_config = {**TEST_CONFIG, **(config or {})}
+    connector = DB2Connector(tap_config, sqlalchemy_url=sqlite_url)
+    catalog = {"streams": connector.discover_catalog_entries()}
+    for catalog_entry in catalog["streams"]:
+        for metadata in catalog_entry["metadata"]:
+            if not metadata["breadcrumb"]:
+                metadata["metadata"]["selected"] = True
+                if replication_key:
+                    metadata["metadata"]["replication-key"] = replication_key
+                    metadata["metadata"]["replication-method"] = "INCREMENTAL"
+        if replication_key:
+            catalog_entry["replication_key"] = replication_key
+            catalog_entry["replication_method"] = "INCREMENTAL"
+
+    tap = TapDB2(config=tap_config, catalog=catalog, state=state)
+    tap._tap_connector = DB2Connector(dict(tap.config), sqlalchemy_url=sqlite_url)
+    return tap
+
+
+def run_tap(sqlite_url, capsys, config=None, state=None, replication_key=None):
+    """Sync the ORDERS stream from SQLite and return the emitted messages."""
+    tap = build_tap(sqlite_url, config, state, replication_key)
+    capsys.readouterr()
+    tap.sync_all()
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def records_of(messages):
+    """Return the records of all RECORD messages."""
+    return [message["record"] for message in messages if message["type"] == "RECORD"]
+
+
+def test_full_table_sync(sqlite_url, capsys):
+    """All rows are emitted in a full table sync."""
+    records = records_of(run_tap(sqlite_url, capsys))
+
+    assert len(records) == 250
+    assert {record["id"] for record in records} == set(range(1, 251))
+
+
+@pytest.mark.parametrize("fetch_size", [1, 7, 1000])
+def test_fetch_size_streams_results(sqlite_url, capsys, fetch_size):
+    """Results fetched in blocks of `fetch_size` rows match the default results."""
+    statements = []
+
+    @sa.event.listens_for(sa.engine.Engine, "before_execute")
+    def record_options(conn, clauseelement, multiparams, params, options):
+        statements.append(conn.get_execution_options())
+
+    try:
+        config = {"query_options": {STREAM_ID: {"fetch_size": fetch_size}}}
+        records = records_of(run_tap(sqlite_url, capsys, config))
+    finally:
+        sa.event.remove(sa.engine.Engine, "before_execute", record_options)
+
+    assert records == records_of(run_tap(sqlite_url, capsys))
+    assert any(options.get("yield_per") == fetch_size for options in statements)
+
+
+def test_fetch_size_row_array_size(sqlite_url, monkeypatch):
+    """ibm_db statements fetch `fetch_size` rows per request to DB2."""
+    row_array_sizes = []
+    monkeypatch.setattr(
+        "tap_db2.connector.ibm_db.set_option",
+        lambda handler, options, is_statement: row_array_sizes.append(
+            (handler, options, is_statement)
+        ),
+    )
+    monkeypatch.setattr("tap_db2.connector._SUPPORTS_ROWSETS", True)
+    engine = build_tap(sqlite_url).tap_connector._engine
+    assert sa.event.contains(engine, "after_cursor_execute", _set_row_array_size)
+
+    cursor = types.SimpleNamespace(stmt_handler="stmt")
+    with engine.connect() as conn:
+        _set_row_array_size(conn, cursor)
+        conn.execution_options(yield_per=500)
+        _set_row_array_size(conn, cursor)
+        # Other drivers have no statement handles
+        _set_row_array_size(conn, object())
+
+    assert row_array_sizes == [("stmt", {ibm_db.SQL_ATTR_ROW_ARRAY_SIZE: 500}, 0)]
+
+
+@pytest.mark.parametrize("fetch_size", [None, 9])
+def test_partitioned_sync(sqlite_url, capsys, fetch_size):
+    """Partitioned queries return every row exactly once."""
+    config = {
+        "query_partition": {STREAM_ID: {"partition_key": "id", "partition_size": 40}}
+    }
+    if fetch_size:
+        config["query_options"] = {"*": {"fetch_size": fetch_size}}
+    records = records_of(run_tap(sqlite_url, capsys, config))
+
+    assert [record["id"] for record in records] == list(range(1, 251))
+
+
+def test_parallel_streams(sqlite_url, capsys):
+    """Streams synced in parallel emit well-formed messages and their own state."""
+    engine = sa.create_engine(sqlite_url)
+    metadata = sa.MetaData()
+    orders = sa.Table("orders", metadata, autoload_with=engine)
+    with engine.begin() as conn:
+        for idx in range(2, 6):
+            copy = orders.to_metadata(metadata, name=f"orders_{idx}")
+            copy.create(conn)
+            conn.execute(copy.insert().from_select(orders.columns, orders.select()))
+    engine.dispose()
+
+    messages = run_tap(
+        sqlite_url,
+        capsys,
+        config={"max_parallel_streams": 3, "query_options": {"*": {"fetch_size": 10}}},
+        replication_key="updated_at",
+    )
+
+    stream_ids = [STREAM_ID, *(f"{STREAM_ID}_{idx}" for idx in range(2, 6))]
+    for stream_id in stream_ids:
+        records = [
+            message["record"]
+            for message in messages
+            if message["type"] == "RECORD" and message["stream"] == stream_id
+        ]
+        assert [record["id"] for record in records] == list(range(1, 251))
+
+    bookmarks = messages[-1]["value"]["bookmarks"]
+    assert set(bookmarks) == set(stream_ids)
+    for bookmark in bookmarks.values():
+        assert bookmark["replication_key_value"] == "2024-01-01T12:10:00+00:00"
+
+
+def test_parallel_sync_mirrors_sdk_sync_all():
+    """The parallel sync repeats the steps of the final `Tap.sync_all` of the SDK."""
+    tree = ast.parse(textwrap.dedent(inspect.getsource(Tap.sync_all)))
+    called = {
+        node.func.attr
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+    }
+    assert called == {
+        "_reset_state_progress_markers",
+        "_set_compatible_replication_methods",
+        "write_message",
+        "values",
+        "info",
+        "debug",
+        "sync",
+        "finalize_state_progress_markers",
+        "log_sync_costs",
+    }
+
+
+def test_incremental_sub_second_bookmark(sqlite_url, capsys):
+    """Bookmarks keep their fraction of a second, so earlier rows are not re-read."""
+    state = {
+        "bookmarks": {
+            STREAM_ID: {
+                "replication_key": "updated_at",
+                "replication_key_value": "2024-01-01T12:09:00.500000+00:00",
+            }
+        }
+    }
+    records = records_of(
+        run_tap(sqlite_url, capsys, state=state, replication_key="updated_at")
+    )
+
+    assert [record["id"] for record in records] == [250]
+
+
+def test_incremental_compound_bookmark(sqlite_url, capsys):
+    """Rows sharing the bookmarked timestamp are told apart by the primary key."""
+    engine = sa.create_engine(sqlite_url)
+    orders = sa.Table("orders", sa.MetaData(), autoload_with=engine)
+    last_update = datetime.datetime(2024, 1, 1, 12, 10)
+    with engine.begin() as conn:
+        conn.execute(
+            orders.update().where(orders.c.id >= 245).values(updated_at=last_update)
+        )
+    config = {"query_options": {"*": {"compound_bookmark": True}}}
+
+    messages = run_tap(sqlite_url, capsys, config, replication_key="updated_at")
+    assert len(records_of(messages)) == 250
+    state = messages[-1]["value"]
+    assert state["bookmarks"][STREAM_ID]["replication_key_tiebreak"] == [250]
+
+    # Nothing changed since the last sync
+    messages = run_tap(sqlite_url, capsys, config, state, "updated_at")
+    assert records_of(messages) == []
+
+    # A new row with the bookmarked timestamp and an interrupted sync
+    with engine.begin() as conn:
+        conn.execute(
+            orders.insert().values(
+                id=251, customer="late", amount=1, updated_at=last_update
+            )
+        )
+    engine.dispose()
+    records = records_of(run_tap(sqlite_url, capsys, config, state, "updated_at"))
+    assert [record["id"] for record in records] == [251]
+
+    state["bookmarks"][STREAM_ID]["replication_key_tiebreak"] = [247]
+    records = records_of(run_tap(sqlite_url, capsys, config, state, "updated_at"))
+    assert [record["id"] for record in records] == [248, 249, 250, 251]
+
+    # Without compound bookmarks, all rows of the bookmarked instant are re-read
+    records = records_of(
+        run_tap(sqlite_url, capsys, state=state, replication_key="updated_at")
+    )
+    assert [record["id"] for record in records] == list(range(245, 252))
+
+
+def test_incremental_compound_bookmark_date_time_keys(tmp_path, capsys):
+    """Tie-break values of DATE and TIMESTAMP keys are bookmarked as read."""
+    sqlite_url = f"sqlite:///{tmp_path / 'events.db'}"
+    engine = sa.create_engine(sqlite_url)
+    metadata = sa.MetaData()
+    events = sa.Table(
+        "events",
+        metadata,
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("logged_at", sa.DateTime, primary_key=True),
+        sa.Column("version", sa.Integer, nullable=False),
+    )
+    metadata.create_all(engine)
+    start = datetime.datetime(2024, 1, 1, 8, 0, 0, 250000)
+    with engine.begin() as conn:
+        conn.execute(
+            events.insert(),
+            [
+                {
+                    "day": (start + datetime.timedelta(days=idx // 2)).date(),
+                    "logged_at": start + datetime.timedelta(hours=idx),
+                    "version": min(idx, 3),
+                }
+                for idx in range(6)
+            ],
+        )
+    config = {"query_options": {"*": {"compound_bookmark": True}}}
+
+    messages = run_tap(sqlite_url, capsys, config, replication_key="version")
+    assert len(records_of(messages)) == 6
+    state = messages[-1]["value"]
+    assert state["bookmarks"]["main-events"]["replication_key_tiebreak"] == [
+        "2024-01-03",
+        "2024-01-01T13:00:00.250000",
+    ]
+
+    # The bookmark is read back on the next sync
+    messages = run_tap(sqlite_url, capsys, config, state, "version")
+    assert records_of(messages) == []
+
+    with engine.begin() as conn:
+        conn.execute(
+            events.insert().values(
+                day=datetime.date(2024, 1, 3),
+                logged_at=datetime.datetime(2024, 1, 1, 13, 0, 0, 250001),
+                version=3,
+            )
+        )
+    engine.dispose()
+    records = records_of(run_tap(sqlite_url, capsys, config, state, "version"))
+    assert [record["logged_at"] for record in records] == [
+        "2024-01-01T13:00:00.250001+00:00"
+    ]
+
+
+@pytest.mark.parametrize("partition_size", [None, 40])
+def test_key_ranges(sqlite_url, capsys, partition_size):
+    """Key ranges are read in parallel and each range is bookmarked on its own."""
+    partition_config = {"partition_key": "id", "key_ranges": 4}
+    if partition_size:
+        partition_config["partition_size"] = partition_size
+    config = {"query_partition": {STREAM_ID: partition_config}}
+    messages = run_tap(sqlite_url, capsys, config)
+
+    assert sorted(record["id"] for record in records_of(messages)) == list(
+        range(1, 251)
+    )
+    partitions = messages[-1]["value"]["bookmarks"][STREAM_ID]["partitions"]
+    assert [partition["context"] for partition in partitions] == [
+        {"key_range_start": None, "key_range_end": 63},
+        {"key_range_start": 63, "key_range_end": 125},
+        {"key_range_start": 125, "key_range_end": 187},
+        {"key_range_start": 187, "key_range_end": None},
+    ]
+    assert all(partition["key_range_complete"] for partition in partitions)
+
+
+def test_key_ranges_resume(sqlite_url, capsys):
+    """Only the unfinished key ranges of an interrupted sync are read again."""
+    config = {"query_partition": {STREAM_ID: {"partition_key": "id", "key_ranges": 4}}}
+    state = {
+        "bookmarks": {
+            STREAM_ID: {
+                "partitions": [
+                    {
+                        "context": {"key_range_start": None, "key_range_end": 100},
+                        "key_range_complete": True,
+                    },
+                    {"context": {"key_range_start": 100, "key_range_end": None}},
+                ]
+            }
+        }
+    }
+
+    records = records_of(run_tap(sqlite_url, capsys, config, state))
+    assert sorted(record["id"] for record in records) == list(range(100, 251))
+
+    # A completed sync is split anew
+    records = records_of(run_tap(sqlite_url, capsys, config, state))
+    assert len(records) == 250
+
+
+def test_key_ranges_incremental(sqlite_url, capsys):
+    """Key ranges of an incremental sync continue from their own bookmarks."""
+    config = {
+        "query_partition": {STREAM_ID: {"partition_key": "id", "key_ranges": 2}},
+        "query_options": {"*": {"compound_bookmark": True}},
+    }
+    messages = run_tap(sqlite_url, capsys, config, replication_key="updated_at")
+    state = messages[-1]["value"]
+    partitions = state["bookmarks"][STREAM_ID]["partitions"]
+    assert [partition["replication_key_value"] for partition in partitions] == [
+        "2024-01-01T10:04:00+00:00",
+        "2024-01-01T12:10:00+00:00",
+    ]
+
+    # Unchanged rows are not read again
+    messages = run_tap(sqlite_url, capsys, config, state, replication_key="updated_at")
+    assert records_of(messages) == []
+    assert messages[-1]["value"]["bookmarks"][STREAM_ID]["partitions"] == partitions
+
+    engine = sa.create_engine(sqlite_url)
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "UPDATE orders SET updated_at = '2024-01-02 00:00:00' "
+                "WHERE id IN (1, 250)"
+            )
+        )
+    engine.dispose()
+    records = records_of(
+        run_tap(sqlite_url, capsys, config, state, replication_key="updated_at")
+    )
+    assert sorted(record["id"] for record in records) == [1, 250]
+
+
+@pytest.mark.parametrize("partition_size", [40, 50, 250, 1000])
+def test_partitioned_sync_without_count(sqlite_url, capsys, partition_size):
+    """Pages are read until a short page, without counting the rows upfront."""
+    statements = []
+
+    @sa.event.listens_for(sa.engine.Engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        config = {
+            "query_partition": {
+                STREAM_ID: {"partition_key": "id", "partition_size": partition_size}
+            }
+        }
+        records = records_of(run_tap(sqlite_url, capsys, config))
+    finally:
+        sa.event.remove(sa.engine.Engine, "before_cursor_execute", record_statement)
+
+    assert [record["id"] for record in records] == list(range(1, 251))
+    assert not any("count(" in statement.lower() for statement in statements)
+
+
+@pytest.mark.parametrize("failed_row_count", [0, 5])
+def test_partitioned_sync_backs_off(sqlite_url, capsys, monkeypatch, failed_row_count):
+    """Pages that exceed a resource limit are retried with half the size."""
+    execute = Telemetry.execute
+    page_sizes = []
+
+    def execute_with_limit(self, conn, query):
+        page_sizes.append(query._limit)
+        rows = execute(self, conn, query)
+        if query._limit > 30:
+            # Fail like the resource limit facility, possibly after a few rows
+            for _ in range(failed_row_count):
+                yield next(rows)
+            rows.close()
+            raise sa.exc.OperationalError(
+                "SELECT",
+                {},
+                Exception("SQL0905N  Unsuccessful execution. SQLCODE=-905"),
+            )
+        yield from rows
+
+    monkeypatch.setattr(Telemetry, "execute", execute_with_limit)
+    config = {
+        "query_partition": {STREAM_ID: {"partition_key": "id", "partition_size": 120}}
+    }
+    records = records_of(run_tap(sqlite_url, capsys, config))
+
+    assert [record["id"] for record in records] == list(range(1, 251))
+    assert page_sizes[:3] == [120, 60, 30]
+    assert set(page_sizes[3:]) == {30}
+
+
+def test_partitioned_sync_fails_at_minimum_size(sqlite_url, capsys, monkeypatch):
+    """Pages are not retried below the minimum size."""
+
+    def execute(self, conn, query):
+        raise sa.exc.OperationalError("SELECT", {}, Exception("SQLCODE=-952"))
+        yield
+
+    monkeypatch.setattr(Telemetry, "execute", execute)
+    config = {
+        "query_partition": {
+            STREAM_ID: {
+                "partition_key": "id",
+                "partition_size": 40,
+                "min_partition_size": 10,
+            }
+        }
+    }
+    with pytest.raises(sa.exc.OperationalError, match="SQLCODE=-952"):
+        run_tap(sqlite_url, capsys, config)
+
+
+def run_tap_with_disconnects(
+    sqlite_url, capsys, failures, config=None, replication_key=None
+):
+    """Sync the ORDERS stream from a SQLite engine whose connection drops.
+
+    A fetch fails like a dropped DB2 connection once the sync has fetched the next
+    number of rows in `failures`.
+    """
+    failures = sorted(failures)
+    row_count = 0
+
+    class DisconnectingCursor(sqlite3.Cursor):
+        def _fetch(self, fetch, *args):
+            nonlocal row_count
+            if failures and row_count >= failures[0]:
+                failures.pop(0)
+                msg = "SQL30081N  A communication error has been detected."
+                raise sqlite3.OperationalError(msg)
+            rows = fetch(*args)
+            if isinstance(rows, list):
+                row_count += len(rows)
+            elif rows is not None:
+                row_count += 1
+            return rows
+
+        def fetchone(self):
+            return self._fetch(super().fetchone)
+
+        def fetchmany(self, *args):
+            return self._fetch(super().fetchmany, *args)
+
+        def fetchall(self):
+            return self._fetch(super().fetchall)
+
+    class DisconnectingConnection(sqlite3.Connection):
+        def cursor(self, factory=DisconnectingCursor):
+            return super().cursor(factory)
+
+    tap = build_tap(sqlite_url, config, replication_key=replication_key)
+    tap.tap_connector._cached_engine = sa.create_engine(
+        sqlite_url, connect_args={"factory": DisconnectingConnection}
+    )
+    capsys.readouterr()
+    tap.sync_all()
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.parametrize(
+    ("query_options", "query_partition", "replication_key"),
+    [
+        ({}, None, None),
+        ({}, None, "updated_at"),
+        ({"fetch_size": 7, "prefetch_blocks": 2}, None, "updated_at"),
+        ({}, {"partition_key": "id", "partition_size": 40}, None),
+        ({"fetch_size": 9}, {"partition_size": 40}, "updated_at"),
+    ],
+)
+def test_sync_reconnects(
+    sqlite_url, capsys, monkeypatch, query_options, query_partition, replication_key
+):
+    """Queries resume after the last emitted row on a new connection."""
+    delays = []
+    monkeypatch.setattr("tap_db2.stream.time.sleep", delays.append)
+    config = {
+        "query_options": {
+            STREAM_ID: {
+                **query_options,
+                "reconnect_attempts": 2,
+                "reconnect_backoff": 0.5,
+            }
+        }
+    }
+    if query_partition:
+        config["query_partition"] = {STREAM_ID: query_partition}
+    messages = run_tap_with_disconnects(
+        sqlite_url, capsys, [20, 20, 70], config, replication_key
+    )
+
+    assert [record["id"] for record in records_of(messages)] == list(range(1, 251))
+    assert delays == [0.5, 1.0, 0.5]
+
+
+def test_sync_fails_without_reconnects(sqlite_url, capsys):
+    """Lost connections fail the sync unless reconnects are configured."""
+    with pytest.raises(sa.exc.OperationalError, match="SQL30081N"):
+        run_tap_with_disconnects(sqlite_url, capsys, [20])
+
+
+def test_sync_fails_after_reconnect_attempts(sqlite_url, capsys, monkeypatch):
+    """The sync fails once all attempts without progress are used up."""
+    monkeypatch.setattr("tap_db2.stream.time.sleep", lambda delay: None)
+    config = {"query_options": {STREAM_ID: {"reconnect_attempts": 2}}}
+    with pytest.raises(sa.exc.OperationalError, match="SQL30081N"):
+        run_tap_with_disconnects(sqlite_url, capsys, [20, 20, 20], config)
+
+
+@pytest.mark.parametrize(
+    ("partition_size", "max_partition_size", "row_seconds", "expected_page_sizes"),
+    [(20, 60, 0.01, [20, 40, 60, 60, 60, 60]), (200, 1000, 0.02, [200, 100])],
+)
+def test_partitioned_sync_adaptive(
+    sqlite_url,
+    capsys,
+    monkeypatch,
+    partition_size,
+    max_partition_size,
+    row_seconds,
+    expected_page_sizes,
+):
+    """Page sizes adapt to the time fetching a page takes."""
+    execute = Telemetry.execute
+    page_sizes = []
+
+    def execute_slowly(self, conn, query):
+        page_sizes.append(query._limit)
+        for row in execute(self, conn, query):
+            self.fetch_duration += row_seconds
+            yield row
+
+    monkeypatch.setattr(Telemetry, "execute", execute_slowly)
+    config = {
+        "query_partition": {
+            STREAM_ID: {
+                "partition_key": "id",
+                "partition_size": partition_size,
+                "target_page_seconds": 1.0,
+                "max_partition_size": max_partition_size,
+            }
+        }
+    }
+    records = records_of(run_tap(sqlite_url, capsys, config))
+
+    assert [record["id"] for record in records] == list(range(1, 251))
+    assert page_sizes == expected_page_sizes
+
+
+@pytest.mark.parametrize("prefetch_blocks", [1, 3])
+def test_prefetch_sync(sqlite_url, capsys, prefetch_blocks):
+    """Rows fetched ahead in a background thread are emitted in order."""
+    config = {"query_options": {"*": {"prefetch_blocks": prefetch_blocks}}}
+    messages = run_tap(sqlite_url, capsys, config)
+
+    assert records_of(messages) == records_of(run_tap(sqlite_url, capsys))
+
+
+def test_prefetch_abort(sqlite_url, capsys, monkeypatch):
+    """The background fetch stops when the record limit aborts the sync."""
+    monkeypatch.setattr(DB2Stream, "ABORT_AT_RECORD_COUNT", 30)
+    config = {
+        "query_partition": {STREAM_ID: {"partition_key": "id", "partition_size": 40}},
+        "query_options": {"*": {"prefetch_blocks": 1, "fetch_size": 5}},
+    }
+    tap = build_tap(sqlite_url, config)
+
+    with pytest.raises(AbortedSyncFailedException):
+        tap.sync_all()
+
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(records_of(messages)) == 30
+    assert not [
+        thread for thread in threading.enumerate() if thread.name.endswith("-fetch")
+    ]
+
+
+@pytest.mark.parametrize("query_options", [{}, {"prefetch_blocks": 2, "fetch_size": 7}])
+def test_partitioned_sync_bookmarks(sqlite_url, capsys, monkeypatch, query_options):
+    """The last key of every emitted page is bookmarked and the sync resumes there."""
+    monkeypatch.setattr(DB2Stream, "STATE_MSG_FREQUENCY", 10)
+    config = {
+        "query_partition": {STREAM_ID: {"partition_key": "id", "partition_size": 40}},
+        "query_options": {STREAM_ID: query_options},
+    }
+    messages = run_tap(sqlite_url, capsys, config)
+
+    emitted_ids = set()
+    bookmarks = []
+    for message in messages:
+        if message["type"] == "RECORD":
+            emitted_ids.add(message["record"]["id"])
+        elif message["type"] == "STATE":
+            stream_state = message["value"].get("bookmarks", {}).get(STREAM_ID, {})
+            if "partition_key_value" in stream_state:
+                assert stream_state["partition_key"] == ["id"]
+                (bookmark,) = stream_state["partition_key_value"]
+                assert set(range(1, bookmark + 1)) <= emitted_ids
+                bookmarks.append(bookmark)
+    assert bookmarks[-1] == 240
+    assert "partition_key_value" not in messages[-1]["value"]["bookmarks"][STREAM_ID]
+
+    state = {
+        "bookmarks": {
+            STREAM_ID: {"partition_key": ["id"], "partition_key_value": [100]}
+        }
+    }
+    records = records_of(run_tap(sqlite_url, capsys, config, state))
+    assert [record["id"] for record in records] == list(range(101, 251))
+
+
+def test_partitioned_sync_with_filtered_records(sqlite_url, capsys, monkeypatch):
+    """Records filtered by post_process() do not stall the pagination."""
+    monkeypatch.setattr(
+        DB2Stream,
+        "post_process",
+        lambda self, row, context=None: row if row["id"] % 3 == 0 else None,
+    )
+    config = {
+        "query_partition": {STREAM_ID: {"partition_key": "id", "partition_size": 40}}
+    }
+    records = records_of(run_tap(sqlite_url, capsys, config))
+
+    assert [record["id"] for record in records] == list(range(3, 251, 3))
+
+
+@pytest.mark.parametrize("partition_size", [1, 7, 40])
+def test_partitioned_sync_composite_key(sqlite_url, capsys, partition_size):
+    """Composite keys of string and numeric columns are paginated by all columns."""
+    config = {
+        "query_partition": {
+            STREAM_ID: {
+                "partition_key": ["customer", "id"],
+                "partition_size": partition_size,
+            }
+        }
+    }
+    records = records_of(run_tap(sqlite_url, capsys, config))
+
+    assert [(record["customer"], record["id"]) for record in records] == sorted(
+        (f"customer {idx % 7}", idx) for idx in range(1, 251)
+    )
+
+
+def test_partitioned_sync_defaults_to_primary_key(sqlite_url, capsys):
+    """Without a partition key, pages are read by the primary key."""
+    statements = []
+
+    @sa.event.listens_for(sa.engine.Engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        config = {"query_partition": {STREAM_ID: {"partition_size": 40}}}
+        records = records_of(run_tap(sqlite_url, capsys, config))
+    finally:
+        sa.event.remove(sa.engine.Engine, "before_cursor_execute", record_statement)
+
+    assert [record["id"] for record in records] == list(range(1, 251))
+    assert sum("LIMIT" in statement for statement in statements) == 7
+
+
+def test_partitioned_sync_resumes_timestamp_key(sqlite_url, capsys, monkeypatch):
+    """Bookmarks of timestamp keys are restored to timestamps on resume."""
+    monkeypatch.setattr(DB2Stream, "STATE_MSG_FREQUENCY", 10)
+    config = {
+        "query_partition": {
+            STREAM_ID: {"partition_key": "updated_at", "partition_size": 40}
+        }
+    }
+    messages = run_tap(sqlite_url, capsys, config)
+    bookmarks = [
+        stream_state["partition_key_value"]
+        for message in messages
+        if message["type"] == "STATE"
+        and "partition_key_value"
+        in (stream_state := message["value"].get("bookmarks", {}).get(STREAM_ID, {}))
+    ]
+    assert bookmarks[0] == ["2024-01-01T08:40:00"]
+
+    state = {
+        "bookmarks": {
+            STREAM_ID: {
+                "partition_key": ["updated_at"],
+                "partition_key_value": bookmarks[0],
+            }
+        }
+    }
+    records = records_of(run_tap(sqlite_url, capsys, config, state))
+    assert [record["id"] for record in records] == list(range(41, 251))
+
+
+def build_tap_with_statistics(
+    sqlite_url, tmp_path, monkeypatch, tables, indexes=(), config=None
+):
+    """Return a tap whose engine reads table statistics from a fake SYSCAT schema.
+
+    `tables` are the TABNAME, CARD and NPAGES of SYSCAT.TABLES, `indexes` the
+    TABNAME, COLNAMES and FIRSTKEYCARD of SYSCAT.INDEXES, with the names in upper
+    case like DB2 stores them.
+    """
+    syscat_path = tmp_path / "syscat.db"
+    with contextlib.closing(sqlite3.connect(syscat_path)) as conn, conn:
+        conn.execute(
+            "CREATE TABLE TABLES "
+            "(TABSCHEMA VARCHAR, TABNAME VARCHAR, CARD BIGINT, NPAGES BIGINT)"
+        )
+        conn.execute(
+            "CREATE TABLE INDEXES "
+            "(TABSCHEMA VARCHAR, TABNAME VARCHAR, COLNAMES VARCHAR, FIRSTKEYCARD BIGINT)"
+        )
+        conn.executemany("INSERT INTO TABLES VALUES ('MAIN', ?, ?, ?)", tables)
+        conn.executemany("INSERT INTO INDEXES VALUES ('MAIN', ?, ?, ?)", indexes)
+
+    tap = build_tap(sqlite_url, config)
+    engine = sa.create_engine(sqlite_url)
+
+    @sa.event.listens_for(engine, "connect")
+    def attach_syscat(dbapi_connection, _):
+        dbapi_connection.execute(f"ATTACH DATABASE '{syscat_path}' AS SYSCAT")
+
+    tap.tap_connector._cached_engine = engine
+    return tap
+
+
+@pytest.mark.parametrize(
+    ("tables", "partition_config"),
+    [
+        ([("ORDERS", 250, 10)], (None, None)),
+        ([("ORDERS", 5000, 200)], (["id"], 40)),
+        # Views and tables without RUNSTATS have a CARD of -1
+        ([("ORDERS", -1, -1)], (["id"], 40)),
+        ([("ORDERS", 250, None)], (["id"], 40)),
+        ([], (["id"], 40)),
+    ],
+)
+def test_statistics_min_table_rows(
+    sqlite_url, capsys, tmp_path, monkeypatch, tables, partition_config
+):
+    """Tables with fewer rows than `min_table_rows` are read with a single query."""
+    config = {
+        "query_partition": {STREAM_ID: {"partition_size": 40, "min_table_rows": 1000}}
+    }
+    tap = build_tap_with_statistics(
+        sqlite_url, tmp_path, monkeypatch, tables, config=config
+    )
+    stream = tap.streams[STREAM_ID]
+
+    assert stream._get_partition_config() == partition_config
+    capsys.readouterr()
+    tap.sync_all()
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["id"] for record in records_of(messages)] == list(range(1, 251))
+
+
+@pytest.mark.parametrize(
+    ("tables", "partition_size"),
+    [([("ORDERS", 250, 10)], 50), ([("ORDERS", 250, 0)], 1000), ([], 1000)],
+)
+def test_statistics_partition_pages(
+    sqlite_url, tmp_path, monkeypatch, tables, partition_size
+):
+    """Partitions hold the rows of `partition_pages` data pages."""
+    config = {"query_partition": {STREAM_ID: {"partition_pages": 2}}}
+    tap = build_tap_with_statistics(
+        sqlite_url, tmp_path, monkeypatch, tables, config=config
+    )
+
+    assert tap.streams[STREAM_ID]._get_partition_config() == (["id"], partition_size)
+
+
+@pytest.mark.parametrize(
+    ("indexes", "range_count"),
+    [([], 3), ([("ORDERS", "+ID", 2)], 2), ([("ORDERS", "+CUSTOMER", 2)], 3)],
+)
+def test_statistics_key_ranges(
+    sqlite_url, capsys, tmp_path, monkeypatch, indexes, range_count
+):
+    """The row count and the leading key cardinality limit the key ranges."""
+    config = {
+        "query_partition": {
+            STREAM_ID: {
+                "partition_key": "id",
+                "key_ranges": 8,
+                "rows_per_key_range": 100,
+            }
+        }
+    }
+    tap = build_tap_with_statistics(
+        sqlite_url, tmp_path, monkeypatch, [("ORDERS", 250, 10)], indexes, config
+    )
+    capsys.readouterr()
+    tap.sync_all()
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert sorted(record["id"] for record in records_of(messages)) == list(
+        range(1, 251)
+    )
+    assert len(messages[-1]["value"]["bookmarks"][STREAM_ID]["partitions"]) == (
+        range_count
+    )
+
+
+def test_statistics_progress(sqlite_url, tmp_path, monkeypatch):
+    """Full syncs log their progress against the row count of the statistics."""
+    logged = []
+    monkeypatch.setattr(
+        DB2Stream,
+        "_log_progress",
+        lambda self, progress: logged.append(
+            (progress.row_count, progress.get_fraction())
+        ),
+    )
+    monkeypatch.setattr("tap_db2.stream.PROGRESS_BLOCK_ROWS", 60)
+    config = {"telemetry": {"progress_interval": 1e-9}}
+    tap = build_tap_with_statistics(
+        sqlite_url, tmp_path, monkeypatch, [("ORDERS", 500, 20)], config=config
+    )
+    tap.sync_all()
+
+    assert logged == [(60, 0.12), (120, 0.24), (180, 0.36), (240, 0.48), (250, 0.5)]
+
+
+def test_statistics_progress_outside_lock(sqlite_url, tmp_path, monkeypatch):
+    """The statistics of the progress are read without blocking other writers."""
+    config = {"telemetry": {"progress_interval": 1e-9}}
+    tap = build_tap_with_statistics(
+        sqlite_url, tmp_path, monkeypatch, [("ORDERS", 500, 20)], config=config
+    )
+    lock_available = []
+
+    def get_statistics(*args):
+        def acquire():
+            if tap.message_lock.acquire(blocking=False):
+                tap.message_lock.release()
+                lock_available.append(True)
+            else:
+                lock_available.append(False)
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        thread.join()
+        return get_table_statistics(*args)
+
+    monkeypatch.setattr("tap_db2.stream.get_table_statistics", get_statistics)
+    tap.sync_all()
+
+    assert lock_available == [True]
+
+
+def test_statistics_skipped_without_syscat(sqlite_url, tmp_path, monkeypatch):
+    """Statistics are not queried from DB2 for z/OS and IBM i."""
+    tap = build_tap_with_statistics(
+        sqlite_url, tmp_path, monkeypatch, [("ORDERS", 500, 20)]
+    )
+    engine = tap.tap_connector._cached_engine
+    with engine.connect():
+        engine.dialect._reflector = OS390Reflector(engine.dialect)
+    statements = []
+
+    @sa.event.listens_for(engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    stream = tap.streams[STREAM_ID]
+    assert stream.table_statistics is None
+    assert not [statement for statement in statements if "SYSCAT" in statement]
+
+
+def test_statistics_order_parallel_streams(sqlite_url, tmp_path, monkeypatch):
+    """Parallel syncs start with the streams of the most data pages."""
+    engine = sa.create_engine(sqlite_url)
+    metadata = sa.MetaData()
+    orders = sa.Table("orders", metadata, autoload_with=engine)
+    with engine.begin() as conn:
+        for idx in range(2, 5):
+            orders.to_metadata(metadata, name=f"orders_{idx}").create(conn)
+    engine.dispose()
+    tables = [("ORDERS", 250, 10), ("ORDERS_3", 100, 40), ("ORDERS_4", 300, 20)]
+    tap = build_tap_with_statistics(
+        sqlite_url, tmp_path, monkeypatch, tables, config={"max_parallel_streams": 2}
+    )
+    started = []
+    monkeypatch.setattr(tap, "_sync_stream", lambda stream: started.append(stream.name))
+    tap.sync_all()
+
+    assert started == [
+        f"{STREAM_ID}_3",
+        f"{STREAM_ID}_4",
+        STREAM_ID,
+        f"{STREAM_ID}_2",
+    ]
+
+
+def compile_db2(query):
+    """Return the SQL of a query as rendered for DB2."""
+    compiled = query.compile(
+        dialect=DB2Dialect_ibm_db(), compile_kwargs={"literal_binds": True}
+    )
+    return " ".join(str(compiled).split())
+
+
+# Characters of one to four bytes in UTF-8
+MULTIBYTE_TEXT = "aé€😀"
+
+
+@pytest.fixture
+def lob_url(tmp_path):
+    """Return the URL of a SQLite database with a DOCUMENTS table of LOB values."""
+    url = f"sqlite:///{tmp_path / 'documents.db'}"
+    engine = sa.create_engine(url)
+    metadata = sa.MetaData()
+    documents = sa.Table(
+        "documents",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("title", sa.String(20)),
+        sa.Column("body", sa.CLOB),
+        sa.Column("payload", sa.BLOB),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            documents.insert(),
+            [
+                {"id": 1, "title": "empty", "body": "", "payload": b""},
+                {"id": 2, "title": "null", "body": None, "payload": None},
+                {"id": 3, "title": "short", "body": "abc", "payload": b"\x00\x01"},
+                {
+                    "id": 4,
+                    "title": "long",
+                    "body": "0123456789" * 10_000,
+                    "payload": bytes(range(256)) * 200,
+                },
+                {
+                    "id": 5,
+                    "title": "multibyte",
+                    "body": MULTIBYTE_TEXT * 10_000,
+                    "payload": MULTIBYTE_TEXT.encode() * 1_000,
+                },
+            ],
+        )
+    engine.dispose()
+    return url
+
+
+def test_lob_policy_skip(lob_url, capsys):
+    """Skipped LOB columns are neither read nor emitted."""
+    config = {"query_options": {"*": {"lob_policy": "skip"}}}
+    records = records_of(run_tap(lob_url, capsys, config))
+
+    assert records == [
+        {"id": 1, "title": "empty"},
+        {"id": 2, "title": "null"},
+        {"id": 3, "title": "short"},
+        {"id": 4, "title": "long"},
+        {"id": 5, "title": "multibyte"},
+    ]
+
+
+@pytest.mark.parametrize("lob_max_bytes", [8, 40_000])
+def test_lob_policy_truncate(lob_url, capsys, lob_max_bytes):
+    """LOB values are truncated to `lob_max_bytes` by DB2.
+
+    Character values are cut on character boundaries to the number of characters
+    that always fit in `lob_max_bytes`.
+    """
+    full_records = records_of(run_tap(lob_url, capsys))
+    config = {
+        "query_options": {
+            "*": {"lob_policy": "truncate", "lob_max_bytes": lob_max_bytes}
+        }
+    }
+    records = records_of(run_tap(lob_url, capsys, config))
+
+    assert [record["body"] for record in records] == [
+        record["body"] and record["body"][: lob_max_bytes // 4]
+        for record in full_records
+    ]
+    assert records[4]["body"] == (MULTIBYTE_TEXT * 10_000)[: lob_max_bytes // 4]
+    assert len(records[4]["body"].encode()) <= lob_max_bytes
+    assert len(records[3]["payload"]) < len(full_records[3]["payload"])
+
+
+@pytest.mark.parametrize("lob_chunk_size", [4000, 40_000])
+def test_lob_policy_chunked(lob_url, capsys, lob_chunk_size):
+    """LOB values read in chunks equal the values read in the row.
+
+    Character values are read in chunks of the number of characters that always
+    fit in `lob_chunk_size`, binary values in chunks of `lob_chunk_size` bytes.
+    """
+    statements = []
+
+    @sa.event.listens_for(sa.engine.Engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        config = {
+            "query_options": {
+                "*": {"lob_policy": "chunked", "lob_chunk_size": lob_chunk_size}
+            }
+        }
+        records = records_of(run_tap(lob_url, capsys, config))
+    finally:
+        sa.event.remove(sa.engine.Engine, "before_cursor_execute", record_statement)
+
+    assert records == records_of(run_tap(lob_url, capsys))
+    assert records[4]["body"] == MULTIBYTE_TEXT * 10_000
+    chunk_statements = [
+        statement
+        for statement in statements
+        if "WHERE main.documents.id = ?" in statement
+    ]
+    # Empty and NULL values are not read
+    assert len(chunk_statements) == sum(
+        -(-length // (lob_chunk_size // 4)) for length in [3, 100_000, 40_000]
+    ) + sum(-(-length // lob_chunk_size) for length in [2, 51_200, 10_000])
+
+
+@pytest.mark.parametrize("partition_size", [None, 40])
+def test_stream_map_pushdown(sqlite_url, capsys, monkeypatch, partition_size):
+    """Stream map filters and dropped columns are pushed down into the query."""
+    config = {
+        "stream_maps": {
+            STREAM_ID: {
+                "__filter__": (
+                    "amount >= 10 and customer in ('customer 1', 'customer 2') "
+                    "and md5(customer) != ''"
+                ),
+                "updated_at": None,
+                "double_amount": "amount * 2",
+            }
+        },
+    }
+    if partition_size:
+        config["query_partition"] = {
+            STREAM_ID: {"partition_key": "id", "partition_size": partition_size}
+        }
+    statements = []
+
+    @sa.event.listens_for(sa.engine.Engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, *_):
+        if "FROM main.orders" in statement:
+            statements.append(statement)
+
+    try:
+        records = records_of(run_tap(sqlite_url, capsys, config))
+        monkeypatch.setattr(DB2Stream, "_get_map_transform", lambda _: None)
+        statements_count = len(statements)
+        expected = records_of(run_tap(sqlite_url, capsys, config))
+    finally:
+        sa.event.remove(sa.engine.Engine, "before_cursor_execute", record_statement)
+
+    assert records == expected
+    assert len(records) == 60
+    for statement in statements[:statements_count]:
+        assert "updated_at" not in statement
+        assert "main.orders.amount >= ?" in statement
+        assert "main.orders.customer IN (?, ?)" in statement
+    for statement in statements[statements_count:]:
+        assert "updated_at" in statement
+        assert "customer IN" not in statement
+
+
+def test_stream_map_pushdown_disabled_for_several_maps(sqlite_url):
+    """Rows mapped to several streams must satisfy all maps."""
+    config = {
+        "stream_maps": {
+            STREAM_ID: {"__filter__": "id > 10"},
+            "large_orders": {"__source__": STREAM_ID, "__filter__": "amount > 50"},
+        },
+    }
+    stream = build_tap(sqlite_url, config).streams[STREAM_ID]
+    table = stream.connector.get_table(stream.fully_qualified_name)
+
+    assert "WHERE" not in compile_db2(stream._get_query(table, None))
+
+
+def test_query_read_clauses(sqlite_url):
+    """Isolation, read-only and optimizer clauses are appended for DB2."""
+    config = {
+        "query_options": {
+            "*": {"isolation_level": "CS"},
+            STREAM_ID: {
+                "isolation_level": "UR",
+                "read_only": True,
+                "optimize_for_rows": 5000,
+            },
+        },
+        "query_partition": {STREAM_ID: {"partition_key": "id", "partition_size": 40}},
+    }
+    stream = build_tap(sqlite_url, config).streams[STREAM_ID]
+    table = stream.connector.get_table(stream.fully_qualified_name)
+    query = stream._get_query(table, None)
+
+    assert compile_db2(query).endswith(
+        "ORDER BY main.orders.id FOR READ ONLY OPTIMIZE FOR 5000 ROWS WITH UR"
+    )
+    assert compile_db2(query.limit(40)).endswith(
+        "ORDER BY main.orders.id FETCH FIRST 40 ROWS ONLY "
+        "FOR READ ONLY OPTIMIZE FOR 5000 ROWS WITH UR"
+    )
+    # Other dialects don't know the clauses
+    assert "WITH UR" not in str(query.compile(dialect=sa.dialects.sqlite.dialect()))
+
+
+def test_query_read_clauses_global(sqlite_url, capsys):
+    """Options of `*` apply to all streams and are omitted if not configured."""
+    stream = build_tap(sqlite_url).streams[STREAM_ID]
+    table = stream.connector.get_table(stream.fully_qualified_name)
+    assert compile_db2(stream._get_query(table, None)).endswith("FROM main.orders")
+
+    config = {"query_options": {"*": {"isolation_level": "UR", "read_only": True}}}
+    stream = build_tap(sqlite_url, config).streams[STREAM_ID]
+    assert compile_db2(stream._get_query(table, None)).endswith(
+        "FROM main.orders FOR READ ONLY WITH UR"
+    )
+    assert len(records_of(run_tap(sqlite_url, capsys, config))) == 250
+
+
+def test_telemetry_metrics(sqlite_url, capsys, monkeypatch):
+    """Timings and counts of every phase are logged as metrics."""
+    points = []
+    monkeypatch.setattr(
+        DB2Stream, "_log_metric", lambda self, point: points.append(point)
+    )
+    config = {
+        "query_partition": {STREAM_ID: {"partition_key": "id", "partition_size": 100}}
+    }
+    tap = build_tap(sqlite_url, config)
+    capsys.readouterr()
+    tap.sync_all()
+    lines = capsys.readouterr().out.splitlines(keepends=True)
+
+    values = {point.metric.value: point.value for point in points}
+    assert values["row_count"] == 250
+    assert values["page_count"] == 3
+    assert values["byte_count"] == sum(
+        len(line.encode()) for line in lines if json.loads(line)["type"] == "RECORD"
+    )
+    for metric in ("fetch_duration", "transform_duration", "emit_duration"):
+        assert values[metric] > 0
+    assert 0 < values["time_to_first_row"] <= values["fetch_duration"]
+    page_points = [point for point in points if point.metric == "page_duration"]
+    assert len(page_points) == 3
+    assert page_points[0].tags == {"stream": STREAM_ID, "context": None}
+
+
+@pytest.mark.parametrize("summary_format", ["json", "prometheus"])
+def test_telemetry_summary(sqlite_url, capsys, tmp_path, summary_format):
+    """A summary of all streams is written at the end of the run."""
+    summary_path = tmp_path / "metrics" / "tap-db2.prom"
+    config = {
+        "max_parallel_streams": 2,
+        "telemetry": {
+            "summary_path": str(summary_path),
+            "summary_format": summary_format,
+        },
+    }
+    run_tap(sqlite_url, capsys, config)
+
+    content = summary_path.read_text()
+    if summary_format == "json":
+        summary = json.loads(content)["streams"]["main-orders"]
+        assert summary["row_count"] == 250
+        assert summary["fetch_duration"] > 0
+    else:
+        assert "# TYPE tap_db2_rows_total gauge" in content
+        assert 'tap_db2_rows_total{stream="main-orders"} 250' in content
+    assert list(summary_path.parent.iterdir()) == [summary_path]
+
+
+@pytest.mark.parametrize("max_parallel_streams", [1, 2])
+def test_fast_writer_output(sqlite_url, capsys, monkeypatch, max_parallel_streams):
+    """The fast writer emits the same bytes as the default writer."""
+    time_extracted = datetime.datetime(2024, 5, 1, 12, 0, tzinfo=datetime.timezone.utc)
+    monkeypatch.setattr("singer_sdk.streams.core.utc_now", lambda: time_extracted)
+    config = {
+        "max_parallel_streams": max_parallel_streams,
+        "query_options": {"*": {"trim_char": True}},
+    }
+
+    outputs = []
+    for writer_config in [{}, {"fast_writer": {"buffer_size": 4096}}]:
+        tap = build_tap(sqlite_url, {**config, **writer_config})
+        capsys.readouterr()
+        tap.sync_all()
+        outputs.append(capsys.readouterr().out)
+
+    default_output, fast_output = outputs
+    assert len(records_of(json.loads(line) for line in fast_output.splitlines())) == 250
+    assert fast_output == default_output
+
+
+def read_batch_files(messages):
+    """Return the records of the files of all BATCH messages."""
+    records = []
+    for message in messages:
+        if message["type"] == "BATCH":
+            for url in message["manifest"]:
+                path = url.removeprefix("file://")
+                opener = gzip.open if path.endswith(".gz") else open
+                with opener(path, "rt") as batch_file:
+                    records.extend(json.loads(line) for line in batch_file)
+    return records
+
+
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+def test_batch_sync(sqlite_url, capsys, tmp_path, compression):
+    """Records are written to JSON Lines files with at most `batch_size` rows."""
+    config = {
+        "batch_config": {
+            "encoding": {"format": "jsonl", "compression": compression},
+            "storage": {"root": f"file://{tmp_path / 'batches'}", "prefix": "orders-"},
+            "batch_size": 100,
+        }
+    }
+    messages = run_tap(sqlite_url, capsys, config)
+
+    assert not records_of(messages)
+    batch_messages = [message for message in messages if message["type"] == "BATCH"]
+    assert [len(message["manifest"]) for message in batch_messages] == [1, 1, 1]
+    assert batch_messages[0]["encoding"]["compression"] == compression
+    assert read_batch_files(messages) == records_of(run_tap(sqlite_url, capsys))
+    assert all(
+        path.name.startswith("orders-") for path in (tmp_path / "batches").iterdir()
+    )
+
+
+def test_batch_max_file_size(sqlite_url, capsys, tmp_path):
+    """Files are completed once they reach `max_file_size` bytes."""
+    config = {
+        "batch_config": {
+            "encoding": {"format": "jsonl", "compression": "none"},
+            "storage": {"root": f"file://{tmp_path / 'batches'}"},
+            "max_file_size": 2000,
+        }
+    }
+    messages = run_tap(sqlite_url, capsys, config)
+
+    assert [record["id"] for record in read_batch_files(messages)] == list(
+        range(1, 251)
+    )
+    sizes = [path.stat().st_size for path in (tmp_path / "batches").iterdir()]
+    assert len(sizes) > 1
+    # A file is completed with the record exceeding the limit
+    assert max(sizes) < 2100
+
+
+def test_batch_sync_key_ranges(sqlite_url, capsys, tmp_path):
+    """Key ranges of batched streams are read one after another."""
+    config = {
+        "query_partition": {
+            STREAM_ID: {"partition_key": "id", "partition_size": 40, "key_ranges": 4}
+        },
+        "batch_config": {
+            "encoding": {"format": "jsonl", "compression": "gzip"},
+            "storage": {"root": f"file://{tmp_path / 'batches'}"},
+        },
+    }
+    messages = run_tap(sqlite_url, capsys, config)
+
+    records = read_batch_files(messages)
+    assert sorted(record["id"] for record in records) == list(range(1, 251))
+    stream_state = messages[-1]["value"]["bookmarks"][STREAM_ID]
+    assert all(
+        partition["key_range_complete"] for partition in stream_state["partitions"]
+    )
+
+
+def test_batch_sync_parquet(sqlite_url, capsys, tmp_path):
+    """Records are written to Parquet files typed by the column types."""
+    config = {
+        "batch_config": {
+            "encoding": {"format": "parquet", "compression": "gzip"},
+            "storage": {"root": f"file://{tmp_path / 'batches'}"},
+            "batch_size": 100,
+        }
+    }
+    messages = run_tap(sqlite_url, capsys, config)
+
+    tables = [
+        pq.read_table(url.removeprefix("file://"))
+        for message in messages
+        if message["type"] == "BATCH"
+        for url in message["manifest"]
+    ]
+    assert [table.num_rows for table in tables] == [100, 100, 50]
+    assert str(tables[0].schema.field("amount").type) == "decimal128(10, 2)"
+    assert tables[0].column("amount")[3].as_py() == decimal.Decimal("1.00")
+
+
+def test_batch_parquet_types(tmp_path):
+    """DOUBLE columns are written as doubles, DECIMAL columns as decimals."""
+    batch_config = BatchConfig.from_dict(
+        {
+            "encoding": {"format": "parquet"},
+            "storage": {"root": f"file://{tmp_path}"},
+            "batch_size": 100,
+        }
+    )
+    columns = [
+        sa.Column("ratio", ibm_db_sa.base.DOUBLE()),
+        sa.Column("share", sa.REAL()),
+        sa.Column("price", sa.DECIMAL(31, 8)),
+    ]
+    records = [
+        {"ratio": decimal.Decimal("1.5E+300"), "share": 0.5, "price": None},
+        {
+            "ratio": decimal.Decimal("0.000000000001"),
+            "share": None,
+            "price": decimal.Decimal("12.34567891"),
+        },
+        {"ratio": None, "share": 1e-40, "price": decimal.Decimal("-1")},
+    ]
+    batcher = DB2Batcher("tap-db2", STREAM_ID, batch_config, columns=columns)
+    ((url,),) = batcher.get_batches(iter(records))
+    table = pq.read_table(url.removeprefix("file://"))
+
+    assert [str(field.type) for field in table.schema] == [
+        "double",
+        "double",
+        "decimal128(31, 8)",
+    ]
+    assert table.to_pylist() == [
+        {"ratio": 1.5e300, "share": 0.5, "price": None},
+        {
+            "ratio": 1e-12,
+            "share": None,
+            "price": decimal.Decimal("12.34567891"),
+        },
+        {"ratio": None, "share": 1e-40, "price": decimal.Decimal("-1.00000000")},
+    ]
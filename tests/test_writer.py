@@ -0,0 +1,78 @@
+"""Tests the fast serialization of RECORD messages."""
+
+import datetime
+import decimal
+
+import pytest
+from singer_sdk._singerlib import RecordMessage
+from singer_sdk._singerlib.encoding import SimpleSingerWriter
+
+from tap_db2.writer import BufferedWriter, RecordEncoder
+
+TIME_EXTRACTED = datetime.datetime(
+    2024, 5, 1, 12, 30, 15, 123456, datetime.timezone.utc
+)
+
+RECORDS = [
+    {
+        "ID": 1,
+        "NAME": 'Grüße "quoted" \\ 😀\n',
+        "CODE": "AB      ",
+        "PRICE": decimal.Decimal("1234.50"),
+        "TINY": decimal.Decimal("0.0000001"),
+        "SCALED": decimal.Decimal("1E+3"),
+        "RATE": 1e16,
+        "SMALL_RATE": 1e-7,
+        "ENABLED": True,
+        "CREATED_AT": "2024-01-01T08:00:00.123456+00:00",
+        "DUE_DATE": "2024-01-31T00:00:00+00:00",
+        "START_TIME": "08:00:00",
+        "RAW_TIMESTAMP": datetime.datetime(2024, 1, 1, 8, 0),
+        "RAW_DATE": datetime.date(2024, 1, 31),
+        "NOTES": None,
+        "BIG": 10**30,
+        "NESTED": {"tags": ["a", 1, None], "price": decimal.Decimal("2.5")},
+    },
+    {},
+]
+
+
+@pytest.mark.parametrize("record", RECORDS)
+@pytest.mark.parametrize("version", [None, 3])
+def test_encode_matches_default(record, version):
+    """Messages are serialized byte for byte like the Singer SDK serializes them."""
+    message = RecordMessage(
+        stream="main-ORDERS ä",
+        record=record,
+        version=version,
+        time_extracted=TIME_EXTRACTED,
+    )
+
+    expected = SimpleSingerWriter().format_message(message)
+    assert RecordEncoder(message.stream).encode(message) == expected
+
+
+@pytest.mark.parametrize(
+    "value", [float("nan"), float("inf"), decimal.Decimal("NaN"), {1j: "key"}]
+)
+def test_encode_invalid_values(value):
+    """Values the Singer SDK cannot serialize raise the same errors."""
+    message = RecordMessage(stream="orders", record={"VALUE": value})
+
+    with pytest.raises((ValueError, TypeError)) as expected:
+        SimpleSingerWriter().format_message(message)
+    with pytest.raises(expected.type):
+        RecordEncoder("orders").encode(message)
+
+
+def test_buffered_writer(capsys):
+    """Lines are written once the buffer is full or flushed."""
+    writer = BufferedWriter(buffer_size=10)
+
+    writer.write("abcd\n")
+    assert capsys.readouterr().out == ""
+    writer.write("efghi\n")
+    assert capsys.readouterr().out == "abcd\nefghi\n"
+    writer.write("j\n")
+    writer.flush()
+    assert capsys.readouterr().out == "j\n"